@@ -0,0 +1,266 @@
+"""
+Benchmark de escalado sobre históricos sintéticos.
+
+Genera históricos de 1k, 10k, 100k y 1M sorteos con el formato CSV del
+proyecto (modules/synthetic.py), mide cada análisis público sobre cada tamaño y guarda los
+resultados en JSON junto con los datos de la máquina. Comparando con una
+ejecución anterior marca las regresiones, y con varios tamaños estima cómo
+crece el coste de cada método (exponente de la curva tiempo ~ tamaño^k).
+
+Uso:
+    python benchmarks/bench_scaling.py
+    python benchmarks/bench_scaling.py --sizes 1000 10000 --output base.json
+    python benchmarks/bench_scaling.py --baseline base.json --threshold 1.25
+    python benchmarks/bench_scaling.py --only streak_analysis pattern_analysis
+
+Los métodos cuyo tiempo previsto para el siguiente tamaño supera
+--max-seconds se omiten en los tamaños mayores.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from tabulate import tabulate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from modules import PACKAGE_CONFIG  # noqa: E402
+from modules.data_loader import DataLoader  # noqa: E402
+from modules.draw_parser import read_draws  # noqa: E402
+from modules.draw_store import DrawStore  # noqa: E402
+from modules import result_cache  # noqa: E402
+from modules.synthetic import SyntheticHistory, count_draws  # noqa: E402
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+# pandas < 3 convierte las fechas a datetime64[ns]: nada posterior a 2262
+LAST_DATE = '2262-04-11'
+EARLIEST_START = '1678-01-07'
+
+
+def write_synthetic_csv(filename, n, seed=0):
+    """
+    Escribe un histórico sintético de n sorteos uniformes con el formato del CSV
+    real. Empieza en el primer sorteo real si cabe; si no, antes y con varios
+    sorteos por fecha, para que todas las fechas sean válidas para pandas.
+    """
+    start = PACKAGE_CONFIG['first_draw']
+    per_date = 1
+    if n > count_draws(start, LAST_DATE):
+        start = EARLIEST_START
+        per_date = -(-n // count_draws(start, LAST_DATE))
+    SyntheticHistory(start, seed=seed, draws_per_date=per_date).write_csv(filename, n)
+
+
+def _context(df):
+    """Objetos reutilizados por los benchmarks de un mismo tamaño."""
+    from modules.analyzer import DataAnalyzer
+    from modules.generator import CombinationGenerator
+    from modules.predictor import Predictor
+    from modules.snapshot import DrawSnapshot
+    from modules.statistics import Statistics
+    # Todos los analizadores comparten la misma instantánea, como en la aplicación
+    snapshot = DrawSnapshot(df)
+    generator = CombinationGenerator(snapshot)
+    with contextlib.redirect_stdout(io.StringIO()):
+        combinations = generator.generate_balanced(5)
+    return {
+        'df': snapshot.df,
+        'statistics': Statistics(snapshot),
+        'analyzer': DataAnalyzer(snapshot),
+        'predictor': Predictor(snapshot),
+        'generator': generator,
+        'combinations': combinations
+    }
+
+
+# Nombre -> función que recibe (contexto, archivo CSV)
+BENCHMARKS = {
+    'load_data': lambda ctx, path: DataLoader(path).load_data(verbose=False),
+    'read_draws': lambda ctx, path: read_draws(path),
+    'draw_store_from_csv': lambda ctx, path: DrawStore.from_csv(path),
+    'streak_analysis': lambda ctx, path: ctx['statistics'].streak_analysis(),
+    'get_probability_analysis': lambda ctx, path: ctx['statistics'].get_probability_analysis(),
+    'pattern_analysis': lambda ctx, path: ctx['statistics'].pattern_analysis(),
+    'number_frequency_analysis': lambda ctx, path: ctx['statistics'].number_frequency_analysis(),
+    'quick_stats': lambda ctx, path: ctx['statistics'].quick_stats(),
+    'get_complete_report': lambda ctx, path: ctx['statistics'].get_complete_report(),
+    'get_hot_numbers': lambda ctx, path: ctx['predictor'].get_hot_numbers(),
+    'get_cold_numbers': lambda ctx, path: ctx['predictor'].get_cold_numbers(),
+    'predict_next_draw': lambda ctx, path: ctx['predictor'].predict_next_draw(),
+    'analyze_combination': lambda ctx, path: ctx['analyzer'].analyze_combination([4, 17, 20, 25, 45], [8, 9]),
+    'generate_statistical': lambda ctx, path: ctx['generator'].generate_statistical(5),
+    'generate_balanced': lambda ctx, path: ctx['generator'].generate_balanced(5),
+    'generate_smart': lambda ctx, path: ctx['generator'].generate_smart(5),
+    'evaluate_combinations': lambda ctx, path: ctx['generator'].evaluate_combinations(ctx['combinations'])
+}
+
+
+def _time_call(func, repeat):
+    best = None
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _growth(points):
+    """Exponente k del ajuste tiempo ~ tamaño^k (None con menos de dos puntos)."""
+    points = [(s, t) for s, t in points if t and t > 0]
+    if len(points) < 2:
+        return None
+    sizes, times = np.log([p[0] for p in points]), np.log([p[1] for p in points])
+    return round(float(np.polyfit(sizes, times, 1)[0]), 2)
+
+
+def _predicted(points, size):
+    """Tiempo previsto para `size` extrapolando el crecimiento observado (lineal si no hay datos)."""
+    last_size, last_time = points[-1]
+    k = _growth(points) or 1.0
+    return last_time * (size / last_size) ** max(k, 1.0)
+
+
+def metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    import pandas as pd
+    return {
+        'fecha': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'procesador': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count()
+    }
+
+
+def run(sizes, names, data_dir, repeat, max_seconds, seed):
+    results = {name: {} for name in names}
+    skipped = {name: None for name in names}
+    os.makedirs(data_dir, exist_ok=True)
+
+    for size in sizes:
+        path = os.path.join(data_dir, f"sinteticos_{size}_{seed}.csv")
+        if not os.path.exists(path):
+            print(f"🔧 Generando histórico sintético de {size:,} sorteos...", file=sys.stderr)
+            write_synthetic_csv(path, size, seed)
+
+        ctx = None
+        for name in names:
+            points = [(int(s), t) for s, t in results[name].items()]
+            if skipped[name] is not None or (points and _predicted(points, size) > max_seconds):
+                skipped[name] = skipped[name] or size
+                continue
+            if ctx is None:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    ctx = _context(DataLoader(path).load_data(verbose=False))
+            print(f"⏱️ {name} ({size:,} sorteos)...", file=sys.stderr)
+            results[name][str(size)] = _time_call(lambda: BENCHMARKS[name](ctx, path), repeat)
+
+    return results, skipped
+
+
+def compare(results, baseline, threshold):
+    """Filas (método, tamaño, base, actual, ratio, marca) frente a una ejecución anterior."""
+    rows = []
+    regressions = 0
+    for name, by_size in results.items():
+        for size, seconds in by_size.items():
+            base = baseline.get('resultados', {}).get(name, {}).get(size)
+            if not base:
+                continue
+            ratio = seconds / base
+            flag = ''
+            if ratio > threshold:
+                flag = '❌ regresión'
+                regressions += 1
+            elif ratio < 1 / threshold:
+                flag = '✅ mejora'
+            rows.append([name, size, f"{base * 1000:.1f}", f"{seconds * 1000:.1f}", f"{ratio:.2f}x", flag])
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de escalado sobre históricos sintéticos')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--only', nargs='+', choices=sorted(BENCHMARKS), help='Métodos a medir')
+    parser.add_argument('--repeat', type=int, default=1, help='Repeticiones por medida (se toma la mejor)')
+    parser.add_argument('--max-seconds', type=float, default=60.0,
+                        help='Omitir un método en tamaños cuyo tiempo previsto supere este límite')
+    parser.add_argument('--data-dir', default=os.path.join(tempfile.gettempdir(), 'euromillones-bench'),
+                        help='Directorio donde se generan (y reutilizan) los históricos sintéticos')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Guardar los resultados en este archivo JSON')
+    parser.add_argument('--baseline', help='Resultados JSON de referencia con los que comparar')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='Ratio a partir del cual se marca una regresión')
+    args = parser.parse_args()
+
+    # Se mide el cálculo, no la lectura de resultados guardados
+    result_cache.disable()
+    names = args.only or list(BENCHMARKS)
+    sizes = sorted(args.sizes)
+    results, skipped = run(sizes, names, args.data_dir, args.repeat, args.max_seconds, args.seed)
+
+    rows = []
+    growth = {}
+    for name in names:
+        by_size = results[name]
+        growth[name] = _growth([(int(s), t) for s, t in by_size.items()])
+        row = [name]
+        for size in sizes:
+            seconds = by_size.get(str(size))
+            row.append(f"{seconds * 1000:.1f}" if seconds is not None else 'omitido')
+        row.append(growth[name] if growth[name] is not None else '-')
+        rows.append(row)
+
+    print("\n📈 TIEMPO POR TAMAÑO DEL HISTÓRICO (ms)")
+    print(tabulate(rows, headers=['Método'] + [f"{s:,}" for s in sizes] + ['Crecimiento (k)'],
+                   tablefmt='pretty'))
+    print("k ≈ 1: lineal en el número de sorteos; k < 1: dominado por costes fijos.")
+
+    report = {
+        'metadatos': metadata(),
+        'tamaños': sizes,
+        'resultados': results,
+        'crecimiento': growth,
+        'omitidos_desde': {name: size for name, size in skipped.items() if size}
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ Resultados guardados en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        comparison, regressions = compare(results, baseline, args.threshold)
+        print(f"\n🔍 COMPARACIÓN CON {args.baseline} "
+              f"(commit {baseline.get('metadatos', {}).get('commit')})")
+        print(tabulate(comparison, headers=['Método', 'Sorteos', 'Base (ms)', 'Actual (ms)', 'Ratio', ''],
+                       tablefmt='pretty'))
+        if regressions:
+            print(f"\n❌ {regressions} regresiones por encima de {args.threshold}x")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
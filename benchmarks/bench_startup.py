@@ -0,0 +1,113 @@
+"""
+Benchmark de tiempo de arranque.
+
+Mide, en procesos nuevos, lo que tarda en importarse el paquete y en
+responder cada comando de la CLI, y lista los módulos que más pesan según
+`python -X importtime`. Sirve para detectar regresiones cuando un cambio
+vuelve a cargar pandas, matplotlib u openpyxl en el arranque.
+
+Uso:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --repeat 10 --json startup.json
+    python benchmarks/bench_startup.py --max-ms 800
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from tabulate import tabulate
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Los comandos se miden sin la caché de resultados, que respondería sin calcular
+CASES = [
+    ('import modules', ['-c', 'import modules']),
+    ('import modules.statistics', ['-c', 'import modules.statistics']),
+    ('main.py summary', ['main.py', '--no-cache', 'summary']),
+    ('main.py freq', ['main.py', '--no-cache', 'freq', '--top', '10']),
+    ('main.py check', ['main.py', '--no-cache', 'check', '4', '17', '20', '25', '45', '--stars', '8', '9']),
+    ('main.py report', ['main.py', '--no-cache', 'report'])
+]
+
+# Módulos pesados cuya presencia en el arranque conviene vigilar
+HEAVY_MODULES = ['pandas', 'matplotlib', 'seaborn', 'openpyxl', 'scipy']
+
+
+def _run(args):
+    start = time.perf_counter()
+    subprocess.run([sys.executable] + args, cwd=ROOT, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(repeat):
+    """Mediana y mínimo (ms) de cada caso, descartando una ejecución de calentamiento."""
+    results = []
+    for name, args in CASES:
+        _run(args)
+        times = [_run(args) for _ in range(repeat)]
+        results.append({
+            'caso': name,
+            'mediana_ms': round(statistics.median(times), 1),
+            'minimo_ms': round(min(times), 1)
+        })
+    return results
+
+
+def import_profile(args, top=10):
+    """Módulos de primer nivel con mayor tiempo acumulado de importación."""
+    proc = subprocess.run([sys.executable, '-X', 'importtime'] + args, cwd=ROOT,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    totals = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        parts = line.split('|')
+        try:
+            cumulative = int(parts[1])
+        except ValueError:
+            continue
+        module = parts[2].strip().split('.')[0]
+        totals[module] = max(totals.get(module, 0), cumulative)
+    ranking = sorted(totals.items(), key=lambda x: x[1], reverse=True)[:top]
+    return [{'modulo': m, 'acumulado_ms': round(us / 1000, 1),
+             'pesado': '⚠️' if m in HEAVY_MODULES else ''} for m, us in ranking]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de tiempo de arranque')
+    parser.add_argument('--repeat', type=int, default=5, help='Ejecuciones por caso')
+    parser.add_argument('--json', help='Guardar los resultados en un archivo JSON')
+    parser.add_argument('--max-ms', type=float,
+                        help='Falla si la mediana de algún comando supera este tiempo')
+    args = parser.parse_args()
+
+    results = measure(args.repeat)
+    print("\n⏱️ TIEMPO DE ARRANQUE")
+    print(tabulate(results, headers='keys', tablefmt='pretty'))
+
+    profile = import_profile(['main.py', '--no-cache', 'summary'])
+    print("\n📦 IMPORTACIONES MÁS COSTOSAS (main.py --no-cache summary)")
+    print(tabulate(profile, headers='keys', tablefmt='pretty'))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'casos': results,
+                       'importaciones': profile}, f, ensure_ascii=False, indent=2)
+        print(f"\n✅ Resultados guardados en {args.json}")
+
+    if args.max_ms is not None:
+        slow = [r for r in results if r['caso'].startswith('main.py') and r['mediana_ms'] > args.max_ms]
+        if slow:
+            for r in slow:
+                print(f"❌ {r['caso']}: {r['mediana_ms']} ms > {args.max_ms} ms")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,5 +1,14 @@
 import sys
+
+# Con argumentos se usa la CLI no interactiva (ver modules/cli.py). Se despacha
+# antes de importar los módulos del menú para no cargar pandas ni openpyxl en
+# comandos que no los necesitan.
+if __name__ == "__main__" and len(sys.argv) > 1:
+    from modules.cli import main as cli_main
+    sys.exit(cli_main(sys.argv[1:]))
+
 import os
+import threading
 from datetime import datetime
 from modules.data_loader import DataLoader
 from modules.analyzer import DataAnalyzer
@@ -8,25 +17,72 @@ from modules.generator import CombinationGenerator
 from modules.statistics import Statistics
 from modules.visualizer import Visualizer
 from modules.helpers import Helpers
+from modules.report_planner import ReportPlanner
+from modules.snapshot import DrawSnapshot
+from modules.frequency_service import get_service
+from modules import star_eras
 import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill
-from openpyxl.utils import get_column_letter
 
 class EuromillonesApp:
-    def __init__(self):
+    def __init__(self, watch=None):
         self.helper = Helpers()
         self.loader = DataLoader()
-        self.df = self.loader.load_data()
-        self.analyzer = DataAnalyzer(self.df)
-        self.predictor = Predictor(self.df)
-        self.generator = CombinationGenerator(self.df)
-        self.statistics = Statistics(self.df)
+        self._set_data(self.loader.load_data())
         self.visualizer = Visualizer()
 
+        # Recarga en caliente: el hilo del watcher prepara el histórico nuevo
+        # y el menú lo aplica entre dos opciones, nunca durante un análisis
+        self.watcher = None
+        self._pending = None
+        self._pending_lock = threading.Lock()
+        if watch:
+            from modules.watcher import FileWatcher
+            self.store = self.snapshot.store
+            self.watcher = FileWatcher(self.loader.filename, interval=watch).start(self._reload)
+
+    def _set_data(self, data):
+        """
+        Sustituye el histórico y los analizadores que trabajan sobre él.
+
+        Todos comparten la misma instantánea de solo lectura.
+        """
+        self.snapshot = DrawSnapshot.of(data)
+        self.df = self.snapshot.df
+        self.loader.df = self.df
+        self.analyzer = DataAnalyzer(self.snapshot)
+        self.predictor = Predictor(self.snapshot)
+        self.generator = CombinationGenerator(self.snapshot)
+        self.statistics = Statistics(self.snapshot)
+
+    def _reload(self):
+        """Se ejecuta en el hilo del watcher: calcula el histórico nuevo sin aplicarlo."""
+        from modules.watcher import reload_store
+        result = reload_store(self.store, self.loader.filename)
+        if result.store is not self.store:
+            snapshot = DrawSnapshot.from_store(result.store)
+            with self._pending_lock:
+                self._pending = (result, snapshot)
+
+    def _apply_pending_data(self):
+        with self._pending_lock:
+            pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        result, snapshot = pending
+        self.store = result.store
+        previous = self.snapshot
+        self._set_data(snapshot)
+        # Las frecuencias de la versión anterior ya no se van a pedir
+        if 'store' in vars(previous):
+            get_service().invalidate(previous.store.version)
+        modo = "recarga completa" if result.full else "incremental"
+        print(f"\n🔄 Datos actualizados ({modo}): {result.added} sorteos nuevos, "
+              f"{len(snapshot)} en total")
+
     def run(self):
         """Ejecuta la aplicación principal."""
         while True:
+            self._apply_pending_data()
             self.show_main_menu()
             option = input("\nSeleccione una opción: ")
 
@@ -211,7 +267,8 @@ class EuromillonesApp:
             print("4. Análisis de rachas")
             print("5. Informe completo")
             print("6. Números más frecuentes y combinaciones")
-            print("7. Volver")
+            print("7. Análisis de supervivencia")
+            print("8. Volver")
 
             option = input("\nSeleccione una opción: ")
 
@@ -228,6 +285,8 @@ class EuromillonesApp:
             elif option == "6":
                 self.statistics.show_frequent_numbers()
             elif option == "7":
+                self.statistics.get_survival_analysis()
+            elif option == "8":
                 break
             else:
                 print("Opción no válida. Intente de nuevo.")
@@ -444,120 +503,172 @@ class EuromillonesApp:
         combinations = self.generator.generate_smart(num_combinations=num_combinations)
         self.generator.evaluate_combinations(combinations)
 
-    def generate_full_report(self):
+    def generate_full_report(self, max_workers=None):
         print("\n📊 GENERANDO INFORME COMPLETO")
         
+        # Las secciones se calculan en paralelo compartiendo los intermedios;
+        # la escritura en el libro se hace después, en orden y en un solo hilo
+        planner = ReportPlanner(self.snapshot, max_workers=max_workers)
+        planner.add_section('basicas', self.statistics.show_basic_stats)
+        planner.add_section('frecuencia_de_numeros', self._number_frequency_rows,
+                            requires=['frecuencia_numeros'])
+        planner.add_section('frecuencia_de_estrellas', self._star_frequency_rows,
+                            requires=['frecuencia_estrellas'])
+        planner.add_section('calientes_y_frios', self._hot_cold_rows,
+                            requires=['ventanas_calientes'])
+        # La predicción escribe en pantalla mientras calcula: fuera del pool
+        planner.add_section('predicciones', self.predictor.predict_next_draw, serial=True)
+        planner.add_section('patrones', self._pattern_summary,
+                            requires=['rasgos_patrones'])
+        secciones = planner.run()
+        
+        from openpyxl import Workbook  # Solo se carga al exportar a Excel
         wb = Workbook()
         
-        try:
-            self._generate_basic_stats(wb)
-            print("Estadísticas básicas generadas")
-        except Exception as e:
-            print(f"Error al generar estadísticas básicas: {str(e)}")
-        
-        try:
-            self._generate_number_frequency(wb)
-            print("Análisis de frecuencia de números generado")
-        except Exception as e:
-            print(f"Error al generar frecuencia de números: {str(e)}")
-        
-        try:
-            self._generate_star_frequency(wb)
-            print("Análisis de frecuencia de estrellas generado")
-        except Exception as e:
-            print(f"Error al generar frecuencia de estrellas: {str(e)}")
-        
-        try:
-            self._generate_hot_cold_numbers(wb)
-            print("Análisis de números calientes y fríos generado")
-        except Exception as e:
-            print(f"Error al generar números calientes y fríos: {str(e)}")
-        
-        try:
-            self._generate_predictions(wb)
-            print("Predicciones generadas")
-        except Exception as e:
-            print(f"Error al generar predicciones: {str(e)}")
-        
-        try:
-            self._generate_patterns(wb)
-            print("Análisis de patrones generado")
-        except Exception as e:
-            print(f"Error al generar análisis de patrones: {str(e)}")
-        
-        try:
-            self._generate_combination_analysis(wb)
-            print("Análisis de combinaciones generado")
-        except Exception as e:
-            print(f"Error al generar análisis de combinaciones: {str(e)}")
+        sheets = [
+            ('basicas', self._generate_basic_stats, "Estadísticas básicas generadas",
+             "Error al generar estadísticas básicas"),
+            ('frecuencia_de_numeros', self._generate_number_frequency,
+             "Análisis de frecuencia de números generado", "Error al generar frecuencia de números"),
+            ('frecuencia_de_estrellas', self._generate_star_frequency,
+             "Análisis de frecuencia de estrellas generado", "Error al generar frecuencia de estrellas"),
+            ('calientes_y_frios', self._generate_hot_cold_numbers,
+             "Análisis de números calientes y fríos generado", "Error al generar números calientes y fríos"),
+            ('predicciones', self._generate_predictions, "Predicciones generadas",
+             "Error al generar predicciones"),
+            ('patrones', self._generate_patterns, "Análisis de patrones generado",
+             "Error al generar análisis de patrones")
+        ]
+        
+        for name, generate, ok_message, error_message in sheets:
+            if name in planner.errors:
+                print(f"{error_message}: {planner.errors[name]}")
+                continue
+            try:
+                generate(wb, secciones[name])
+                print(ok_message)
+            except Exception as e:
+                print(f"{error_message}: {str(e)}")
+        
+        planner.print_timings()
         
         filename = "Informe_Euromillones.xlsx"
         wb.save(filename)
         print(f"\nInforme completo generado y guardado como {filename}")
 
-    def _generate_basic_stats(self, wb):
+    def _number_frequency_rows(self, frecuencia_numeros):
+        esperado = frecuencia_numeros.sum() / 50
+        rows = []
+        for num, frecuencia in frecuencia_numeros.items():
+            porcentaje = round(frecuencia / len(self.df) * 100, 2)
+            desviacion = round((frecuencia - esperado) / esperado * 100, 2)
+            rows.append([num, int(frecuencia), porcentaje, f"{desviacion:+.2f}%"])
+        return rows
+
+    def _star_frequency_rows(self, frecuencia_estrellas):
+        # Frecuencia esperada según el bombo de cada etapa
+        esperadas = star_eras.expected_counts(self.snapshot.store)
+        rows = []
+        for star, frecuencia in frecuencia_estrellas.items():
+            porcentaje = round(frecuencia / len(self.df) * 100, 2)
+            desviacion = round((frecuencia - esperadas[star - 1]) / esperadas[star - 1] * 100, 2)
+            rows.append([star, int(frecuencia), porcentaje, f"{desviacion:+.2f}%"])
+        return rows
+
+    def _hot_cold_rows(self, ventanas_calientes, window=20):
+        """Números calientes y fríos de los últimos sorteos frente al histórico."""
+        freq_total = ventanas_calientes[len(self.df)]
+        freq_ventana = ventanas_calientes[min(window, len(self.df))]
+        
+        rows = []
+        for num, count in freq_ventana.items():
+            porcentaje = round(count / window * 100, 1)
+            freq_esperada = freq_total[num] / len(self.df) * window
+            tendencia = (count - freq_esperada) / freq_esperada * 100 if freq_esperada > 0 else 0
+            rows.append([num, int(count), porcentaje, f"{tendencia:+.2f}%"])
+        
+        rows.sort(key=lambda x: x[1], reverse=True)
+        return {'calientes': rows[:10], 'frios': rows[::-1][:10]}
+
+    def _pattern_summary(self, rasgos_patrones):
+        total = len(rasgos_patrones)
+        paridad = rasgos_patrones['pares'].value_counts().sort_index()
+        decenas = rasgos_patrones['decenas'].value_counts().sort_index()
+        consecutivos = rasgos_patrones['consecutivos'].value_counts().sort_index()
+        
+        return {
+            'Paridad (pares por sorteo)': {
+                f"{pares} pares": f"{count / total * 100:.2f}%" for pares, count in paridad.items()
+            },
+            'Decenas distintas por sorteo': {
+                f"{dec} decenas": f"{count / total * 100:.2f}%" for dec, count in decenas.items()
+            },
+            'Suma de los números': {
+                'Media': round(rasgos_patrones['suma'].mean(), 2),
+                'Mínima': int(rasgos_patrones['suma'].min()),
+                'Máxima': int(rasgos_patrones['suma'].max())
+            },
+            'Números consecutivos': {
+                f"{n} consecutivos": f"{count / total * 100:.2f}%" for n, count in consecutivos.items()
+            }
+        }
+
+    def _generate_basic_stats(self, wb, stats):
         ws = wb.active
         ws.title = "Estadísticas Básicas"
         ws.append(["Estadísticas Básicas del Euromillones"])
         ws.append([])
         
-        stats = self.statistics.show_basic_stats()
         for stat in stats:
             ws.append(stat)
         
         self._format_worksheet(ws)
 
-    def _generate_number_frequency(self, wb):
+    def _generate_number_frequency(self, wb, freq_data):
         ws = wb.create_sheet("Frecuencia de Números")
         ws.append(["Frecuencia de Números"])
         ws.append([])
         
-        freq_data = self.statistics.number_frequency_analysis()
         ws.append(["Número", "Frecuencia", "Porcentaje", "Desviación"])
         for row in freq_data:
             ws.append(row)
         
         self._format_worksheet(ws)
 
-    def _generate_star_frequency(self, wb):
+    def _generate_star_frequency(self, wb, star_data):
         ws = wb.create_sheet("Frecuencia de Estrellas")
         ws.append(["Frecuencia de Estrellas"])
         ws.append([])
         
-        star_data = self.statistics.star_frequency_analysis()
         ws.append(["Estrella", "Frecuencia", "Porcentaje", "Desviación"])
         for row in star_data:
             ws.append(row)
         
         self._format_worksheet(ws)
 
-    def _generate_hot_cold_numbers(self, wb):
+    def _generate_hot_cold_numbers(self, wb, hot_cold):
         ws = wb.create_sheet("Números Calientes y Fríos")
         ws.append(["Números Calientes y Fríos"])
         ws.append([])
         
-        hot_numbers = self.predictor.get_hot_numbers()
-        cold_numbers = self.predictor.get_cold_numbers()
-        
         ws.append(["Números Calientes"])
         ws.append(["Número", "Frecuencia", "Porcentaje", "Tendencia"])
-        for row in hot_numbers:
+        for row in hot_cold['calientes']:
             ws.append(row)
         
         ws.append([])
         ws.append(["Números Fríos"])
         ws.append(["Número", "Frecuencia", "Porcentaje", "Tendencia"])
-        for row in cold_numbers:
+        for row in hot_cold['frios']:
             ws.append(row)
         
         self._format_worksheet(ws)
 
-    def _generate_predictions(self, wb):
+    def _generate_predictions(self, wb, prediction):
         ws = wb.create_sheet("Predicciones")
         ws.append(["Predicciones para el Próximo Sorteo"])
         ws.append([])
         
-        prediction = self.predictor.predict_next_draw()
         ws.append(["Números Predichos", "Estrellas Predichas"])
         ws.append([" - ".join(map(str, prediction['numbers'])), " - ".join(map(str, prediction['stars']))])
         
@@ -568,12 +679,11 @@ class EuromillonesApp:
         
         self._format_worksheet(ws)
 
-    def _generate_patterns(self, wb):
+    def _generate_patterns(self, wb, patterns):
         ws = wb.create_sheet("Patrones")
         ws.append(["Patrones Identificados"])
         ws.append([])
         
-        patterns = self.analyzer.identify_patterns()
         for pattern_name, pattern_data in patterns.items():
             ws.append([pattern_name])
             for key, value in pattern_data.items():
@@ -582,21 +692,9 @@ class EuromillonesApp:
         
         self._format_worksheet(ws)
 
-    def _generate_combination_analysis(self, wb):
-        ws = wb.create_sheet("Análisis de Combinaciones")
-        ws.append(["Análisis de Combinaciones"])
-        ws.append([])
-        
-        combination_data = self.analyzer.analyze_combinations()
-        for section, data in combination_data.items():
-            ws.append([section])
-            for key, value in data.items():
-                ws.append([key, value])
-            ws.append([])
-        
-        self._format_worksheet(ws)
-
     def _format_worksheet(self, ws):
+        from openpyxl.styles import Font, Alignment, PatternFill
+
         for row in ws.iter_rows():
             for cell in row:
                 cell.alignment = Alignment(horizontal='center', vertical='center')
@@ -621,8 +719,12 @@ class EuromillonesApp:
             cell.fill = header_fill
 
 if __name__ == "__main__":
+    from modules.profiling import enable_from_env
+    from modules.watcher import interval_from_env
+    enable_from_env()
+
     try:
-        app = EuromillonesApp()
+        app = EuromillonesApp(watch=interval_from_env())
         app.run()
     except KeyboardInterrupt:
         print("\n\n👋 ¡Hasta luego!")
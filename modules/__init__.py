@@ -13,13 +13,38 @@ Módulos:
     - helpers: Funciones de utilidad
 """
 
-from .analyzer import DataAnalyzer
-from .data_loader import DataLoader
-from .generator import CombinationGenerator
-from .predictor import Predictor
-from .statistics import Statistics
-from .visualizer import Visualizer
-from .helpers import Helpers
+import os
+from importlib import import_module
+from importlib.util import find_spec
+
+# Clases públicas y el submódulo que las define. Se importan bajo demanda
+# (PEP 562) para que `import modules` no cargue pandas, matplotlib ni el
+# resto de dependencias pesadas hasta que realmente se usen.
+_LAZY_EXPORTS = {
+    'DataAnalyzer': 'analyzer',
+    'DataLoader': 'data_loader',
+    'CombinationGenerator': 'generator',
+    'Predictor': 'predictor',
+    'Statistics': 'statistics',
+    'Visualizer': 'visualizer',
+    'Helpers': 'helpers',
+    'DrawStore': 'draw_store'
+}
+
+__all__ = list(_LAZY_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _LAZY_EXPORTS:
+        value = getattr(import_module(f'.{_LAZY_EXPORTS[name]}', __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
+
 
 __version__ = '1.0.0'
 __author__ = 'Tu Nombre'
@@ -34,9 +59,21 @@ PACKAGE_CONFIG = {
     'min_number': 1,
     'default_analysis_period': 10,
     'date_format': '%d-%m-%Y',
-    'csv_filename': 'Euromillones - 2004 a 2024.csv'
+    'csv_filename': 'Euromillones - 2004 a 2024.csv',
+    # Calendario: viernes desde el primer sorteo y también martes desde 2011
+    'first_draw': '2004-02-13',
+    'tuesday_draws_since': '2011-05-10',
+    # Tamaño del bombo de estrellas: (fecha desde la que rige, estrellas)
+    'star_eras': [
+        ('2004-02-13', 9),
+        ('2011-05-10', 11),
+        ('2016-09-27', 12)
+    ]
 }
 
+# Directorio de datos del proyecto
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
 # Mapeo de nombres de día
 WEEKDAY_NAMES = {
     0: 'Lunes',
@@ -123,6 +160,10 @@ def get_config():
     """Retorna la configuración actual del paquete."""
     return PACKAGE_CONFIG
 
+def get_data_file():
+    """Retorna la ruta del CSV de sorteos por defecto."""
+    return os.path.join(DATA_DIR, PACKAGE_CONFIG['csv_filename'])
+
 def get_color(name):
     """Retorna un código de color ANSI por nombre."""
     return COLORS.get(name, '')
@@ -152,12 +193,9 @@ def initialize():
         'tabulate'
     ]
     
-    missing_packages = []
-    for package in required_packages:
-        try:
-            __import__(package)
-        except ImportError:
-            missing_packages.append(package)
+    # find_spec comprueba que el paquete está instalado sin importarlo
+    missing_packages = [package for package in required_packages
+                        if find_spec(package) is None]
     
     if missing_packages:
         raise ImportError(
@@ -0,0 +1,135 @@
+"""
+Búsqueda de periodos análogos en el histórico.
+
+Resume cada sorteo con unos pocos rasgos (suma, pares, decenas distintas y
+números repetidos del sorteo anterior) y busca en el pasado las ventanas de
+`window` sorteos cuya trayectoria se parece más a la de los últimos `window`
+sorteos. Cada rasgo se normaliza dentro de cada ventana (media 0, desviación
+1), así que cuenta la forma de la trayectoria y no su nivel, y las
+distancias de todas las ventanas se obtienen a la vez con el algoritmo MASS:
+productos escalares deslizantes por FFT (np.fft.rfft sobre todas las columnas)
+y medias y desviaciones deslizantes con sumas acumuladas. La distancia de una
+ventana es la suma de las distancias euclídeas al cuadrado de cada rasgo.
+
+    analogos = find_analogs(store, window=10, top=5, horizon=1)
+
+Las ventanas elegidas no se solapan entre sí ni con la ventana reciente; de
+cada una se informa de lo que vino después (los `horizon` sorteos
+siguientes).
+"""
+import numpy as np
+
+from .similarity import NUMBER_BITS, popcount
+
+TRAJECTORY_COLUMNS = ['suma', 'pares', 'decenas', 'repetidos']
+
+
+def trajectory_features(store):
+    """Rasgos de cada sorteo (TRAJECTORY_COLUMNS), en orden cronológico, como float64."""
+    features = store.features
+    repeated = np.zeros(len(store), dtype=np.float64)
+    if len(store) > 1:
+        repeated[1:] = popcount(store.masks[1:] & store.masks[:-1] & NUMBER_BITS)
+    return np.column_stack([
+        features[:, 2],  # suma
+        features[:, 0],  # pares
+        features[:, 1],  # decenas
+        repeated
+    ]).astype(np.float64)
+
+
+def _sliding_stats(series, window):
+    """Media y desviación de cada ventana de `window` filas, por columna."""
+    cumsum = np.vstack([np.zeros(series.shape[1]), np.cumsum(series, axis=0)])
+    cumsq = np.vstack([np.zeros(series.shape[1]), np.cumsum(series ** 2, axis=0)])
+    mean = (cumsum[window:] - cumsum[:-window]) / window
+    var = (cumsq[window:] - cumsq[:-window]) / window - mean ** 2
+    return mean, np.sqrt(np.maximum(var, 0))
+
+
+def _flat_windows(series, window):
+    """
+    Ventanas de `window` filas en que cada columna es constante.
+
+    Se cuentan los cambios de valor dentro de cada ventana: con las sumas
+    acumuladas de los cuadrados la varianza de una ventana constante puede
+    salir pequeña pero no nula por el redondeo.
+    """
+    changes = np.vstack([np.zeros((1, series.shape[1]), dtype=np.int64),
+                         np.cumsum(series[1:] != series[:-1], axis=0)])
+    return changes[window - 1:] == changes[:len(changes) - window + 1]
+
+
+def _sliding_dot(query, series):
+    """Producto escalar de `query` (m x d) con cada ventana de `series` (n x d), por FFT."""
+    n, m = len(series), len(query)
+    size = 1 << int(np.ceil(np.log2(n + m)))
+    product = np.fft.rfft(series, size, axis=0) * np.fft.rfft(query[::-1], size, axis=0)
+    return np.fft.irfft(product, size, axis=0)[m - 1:n]
+
+
+def distance_profile(series, query):
+    """
+    Distancia (normalizada por ventana) entre `query` y cada ventana de `series`.
+
+    Retorna un array de len(series) - len(query) + 1 distancias: la suma por
+    columnas de la distancia euclídea al cuadrado entre las ventanas
+    normalizadas. Si la ventana o la consulta son constantes en una columna,
+    esa columna cuenta como correlación 1 si ambas lo son y 0 si no.
+    """
+    m = len(query)
+    # Centrar mejora la precisión de las sumas acumuladas
+    center = series.mean(axis=0)
+    series, query = series - center, query - center
+    mean, std = _sliding_stats(series, m)
+    q_mean, q_std = query.mean(axis=0), query.std(axis=0)
+
+    dot = _sliding_dot(query, series)
+    flat_series, flat_query = _flat_windows(series, m), (query == query[0]).all(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        corr = (dot - m * mean * q_mean) / (m * std * q_std)
+    corr = np.where(flat_series | flat_query, (flat_series & flat_query).astype(np.float64), corr)
+    corr = np.clip(corr, -1, 1)
+    return (2 * m * (1 - corr)).sum(axis=1)
+
+
+def _pick(profile, count, exclusion):
+    """Las `count` ventanas de menor distancia separadas al menos `exclusion` posiciones."""
+    profile = profile.copy()
+    chosen = []
+    for _ in range(count):
+        best = int(np.argmin(profile))
+        if not np.isfinite(profile[best]):
+            break
+        chosen.append(best)
+        profile[max(0, best - exclusion + 1):best + exclusion] = np.inf
+    return chosen
+
+
+def find_analogs(store, window=10, top=5, horizon=1):
+    """
+    Periodos pasados más parecidos a los últimos `window` sorteos.
+
+    Retorna (filas, reciente): cada fila tiene las posiciones de la ventana
+    ('inicio', 'fin', incluida), su 'distancia' y 'siguientes', las
+    posiciones de los `horizon` sorteos que vinieron después; `reciente` son
+    las posiciones de la ventana buscada.
+    """
+    n = len(store)
+    # Inicios válidos: la ventana acaba antes de la reciente y le siguen `horizon` sorteos
+    last = min(n - 2 * window, n - window - horizon)
+    if window < 2 or last < 0:
+        raise ValueError(f"No hay sorteos suficientes para buscar ventanas de {window}")
+    series = trajectory_features(store)
+    profile = distance_profile(series[:last + window], series[n - window:])
+
+    rows = []
+    for start in _pick(profile, top, window):
+        end = start + window - 1
+        rows.append({
+            'inicio': start,
+            'fin': end,
+            'distancia': float(profile[start]),
+            'siguientes': np.arange(end + 1, end + 1 + horizon)
+        })
+    return rows, np.arange(n - window, n)
@@ -3,12 +3,17 @@ import numpy as np
 from tabulate import tabulate
 from datetime import datetime, timedelta
 import calendar
-import seaborn as sns
-import matplotlib.pyplot as plt
+
+from .frequency_service import get_service
+from .snapshot import DrawSnapshot
+from . import similarity, star_eras
 
 class DataAnalyzer:
     def __init__(self, df):
-        self.df = df
+        # Instantánea de solo lectura: acepta un DataFrame o una DrawSnapshot compartida
+        self.snapshot = DrawSnapshot.of(df)
+        self.df = self.snapshot.df
+        self.frequencies = get_service()
 
     def analyze_number(self, number):
         """Análisis detallado de un número específico."""
@@ -116,22 +121,16 @@ class DataAnalyzer:
         """Análisis histórico de la combinación."""
         print("\n3️⃣ ANÁLISIS HISTÓRICO")
         
-        # Verificar si la combinación ha salido antes
-        combinaciones_similares = 0
-        coincidencias_maximas = 0
+        # Aciertos contra todo el histórico con las máscaras de bits de cada sorteo
+        store = self.snapshot.store
+        aciertos, _ = similarity.hits(similarity.ticket_masks(numbers, stars), store.masks)
+        aciertos = aciertos[0]
+        coincidencias_maximas = int(aciertos.max()) if len(aciertos) else 0
+        combinaciones_similares = int((aciertos >= 4).sum())
+        # El más reciente con el máximo (el histórico del store es cronológico)
         fecha_similar = None
-        
-        for _, row in self.df.iterrows():
-            nums_sorteo = set([row['n1'], row['n2'], row['n3'], row['n4'], row['n5']])
-            nums_check = set(numbers)
-            coincidencias = len(nums_check & nums_sorteo)
-            
-            if coincidencias > coincidencias_maximas:
-                coincidencias_maximas = coincidencias
-                fecha_similar = row['fecha']
-            
-            if coincidencias >= 4:
-                combinaciones_similares += 1
+        if coincidencias_maximas > 0:
+            fecha_similar = pd.Timestamp(store.dates[np.flatnonzero(aciertos == coincidencias_maximas)[-1]])
 
         print(f"\nMáximas coincidencias encontradas: {coincidencias_maximas} números")
         if fecha_similar:
@@ -140,6 +139,19 @@ class DataAnalyzer:
         if combinaciones_similares > 0:
             print(f"\nCombinaciones similares (4+ números): {combinaciones_similares}")
 
+        # Sorteos más parecidos contando también las estrellas
+        indices, puntuaciones = similarity.nearest(store, numbers, stars, k=5)
+        parecidos = []
+        for i, puntuacion in zip(indices[0], puntuaciones[0]):
+            parecidos.append([
+                pd.Timestamp(store.dates[i]).strftime('%d-%m-%Y'),
+                ' - '.join(map(str, store.numbers[i])),
+                ' - '.join(map(str, store.stars[i])),
+                puntuacion
+            ])
+        print("\nSorteos más parecidos (números + 0.5 por estrella):")
+        print(tabulate(parecidos, headers=['Fecha', 'Números', 'Estrellas', 'Similitud'], tablefmt='pretty'))
+
     def _calculate_score(self, numbers, stars):
         """Calcula un score para la combinación."""
         score = 0
@@ -207,11 +219,7 @@ class DataAnalyzer:
         }
         
         # Números más frecuentes
-        todos_numeros = []
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            todos_numeros.extend(self.df[col].tolist())
-        
-        freq = pd.Series(todos_numeros).value_counts()
+        freq = self.frequencies.counts(self.snapshot, 'numbers')
         stats['numero_mas_frecuente'] = freq.index[0]
         stats['numero_menos_frecuente'] = freq.index[-1]
         
@@ -221,8 +229,8 @@ class DataAnalyzer:
         """Analiza tendencias mensuales."""
         print("\n📊 TENDENCIAS MENSUALES")
         
-        self.df['mes'] = self.df['fecha'].dt.month
-        monthly_counts = self.df.groupby('mes').size().reset_index(name='conteo')
+        meses = self.snapshot.calendar['mes']
+        monthly_counts = self.df.groupby(meses).size().reset_index(name='conteo')
         monthly_counts['mes'] = monthly_counts['mes'].apply(lambda x: calendar.month_abbr[x])
         
         print(tabulate(monthly_counts, headers=['Mes', 'Número de sorteos'], tablefmt='pretty'))
@@ -230,7 +238,7 @@ class DataAnalyzer:
         # Análisis de números por mes
         numeros_por_mes = {}
         for mes in range(1, 13):
-            sorteos_mes = self.df[self.df['mes'] == mes]
+            sorteos_mes = self.df[meses == mes]
             numeros_mes = []
             for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
                 numeros_mes.extend(sorteos_mes[col].tolist())
@@ -256,18 +264,8 @@ class DataAnalyzer:
         """Analiza tendencias por estaciones."""
         print("\n🌞 ANÁLISIS POR ESTACIONES")
         
-        def get_season(month):
-            if month in [12, 1, 2]:
-                return 'Invierno'
-            elif month in [3, 4, 5]:
-                return 'Primavera'
-            elif month in [6, 7, 8]:
-                return 'Verano'
-            else:
-                return 'Otoño'
-        
-        self.df['estacion'] = self.df['fecha'].dt.month.apply(get_season)
-        seasonal_counts = self.df.groupby('estacion').size().reset_index(name='conteo')
+        estaciones = self.snapshot.calendar['estacion']
+        seasonal_counts = self.df.groupby(estaciones, observed=True).size().reset_index(name='conteo')
         
         print(tabulate(seasonal_counts, headers=['Estación', 'Número de sorteos'], tablefmt='pretty'))
         
@@ -276,7 +274,7 @@ class DataAnalyzer:
         for estacion in ['Primavera', 'Verano', 'Otoño', 'Invierno']:
             numeros_estacion = []
             for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-                numeros_estacion.extend(self.df[self.df['estacion'] == estacion][col].tolist())
+                numeros_estacion.extend(self.df[estaciones == estacion][col].tolist())
             total_numeros = len(numeros_estacion)
             freq = pd.Series(numeros_estacion).value_counts().head(5)
             numeros_por_estacion[estacion] = [
@@ -326,8 +324,8 @@ class DataAnalyzer:
         """Analiza tendencias por día de la semana."""
         print("\n📆 ANÁLISIS POR DÍA DE LA SEMANA")
         
-        self.df['dia_semana'] = self.df['fecha'].dt.dayofweek
-        weekday_counts = self.df.groupby('dia_semana').size().reset_index(name='conteo')
+        dias = self.snapshot.calendar['dia_semana']
+        weekday_counts = self.df.groupby(dias).size().reset_index(name='conteo')
         weekday_counts['dia_semana'] = weekday_counts['dia_semana'].apply(lambda x: calendar.day_name[x])
         
         print(tabulate(weekday_counts, headers=['Día', 'Número de sorteos'], tablefmt='pretty'))
@@ -337,7 +335,7 @@ class DataAnalyzer:
         for dia in range(7):
             numeros_dia = []
             for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-                numeros_dia.extend(self.df[self.df['dia_semana'] == dia][col].tolist())
+                numeros_dia.extend(self.df[dias == dia][col].tolist())
             total_numeros = len(numeros_dia)
             freq = pd.Series(numeros_dia).value_counts().head(5)
             numeros_por_dia[calendar.day_name[dia]] = [
@@ -422,8 +420,8 @@ class DataAnalyzer:
                 print(f"- Entre la posición {i} y {j}: {interpretacion}")
         
         # Correlación con factores temporales
-        numeros['mes'] = self.df['fecha'].dt.month
-        numeros['dia_semana'] = self.df['fecha'].dt.dayofweek
+        numeros['mes'] = self.snapshot.calendar['mes']
+        numeros['dia_semana'] = self.snapshot.calendar['dia_semana']
         
         corr_temporal = numeros.corr()[['mes', 'dia_semana']].iloc[:-2]
         
@@ -462,6 +460,8 @@ class DataAnalyzer:
 
     def visualizar_correlaciones_simplificadas(self, corr_matrix):
         """Crea una visualización muy simplificada de las relaciones entre posiciones."""
+        import matplotlib.pyplot as plt  # Solo se carga al dibujar
+
         plt.figure(figsize=(10, 8))
         
         # Crear una matriz de texto para las relaciones
@@ -515,11 +515,7 @@ class DataAnalyzer:
         print("\n⭐ ANÁLISIS DE ESTRELLAS")
         
         # Frecuencia de las estrellas
-        estrellas = []
-        for col in ['e1', 'e2']:
-            estrellas.extend(self.df[col].tolist())
-        
-        freq_estrellas = pd.Series(estrellas).value_counts().sort_index()
+        freq_estrellas = self.frequencies.counts(self.snapshot, 'stars').sort_index()
         total_sorteos = len(self.df)
         
         print("\nFrecuencia de aparición de las estrellas:")
@@ -545,27 +541,44 @@ class DataAnalyzer:
                        headers=['Combinación', 'Apariciones', '% de Sorteos'],
                        tablefmt='pretty'))
 
-        # Análisis de tendencias recientes
-        ultimos_sorteos = self.df.head(20)
-        estrellas_recientes = []
-        for col in ['e1', 'e2']:
-            estrellas_recientes.extend(ultimos_sorteos[col].tolist())
-        
-        freq_recientes = pd.Series(estrellas_recientes).value_counts()
+        # Frecuencia normalizada por etapas del bombo (9, 11 y 12 estrellas)
+        puntuaciones = star_eras.star_scores(self.snapshot.store, window=20)
+        
+        print("\nFrecuencia según el bombo de cada etapa:")
+        datos_etapas = []
+        for fila in puntuaciones:
+            datos_etapas.append([
+                fila['estrella'],
+                fila['apariciones'],
+                fila['esperadas'],
+                fila['sorteos_disponibles'],
+                '-' if fila['puntuacion'] is None else fila['puntuacion'],
+                fila['estado']
+            ])
         
+        print(tabulate(datos_etapas, 
+                       headers=['Estrella', 'Apariciones', 'Esperadas', 'Sorteos en el bombo',
+                                'Puntuación z', 'Estado'],
+                       tablefmt='pretty'))
+
+        # Análisis de tendencias recientes: frente a la tasa de cada estrella
+        # en los sorteos en que estaba en el bombo
         print("\nTendencias recientes de estrellas (últimos 20 sorteos):")
         datos_recientes = []
-        for estrella in range(1, 13):
-            freq_reciente = freq_recientes.get(estrella, 0)
-            freq_total = freq_estrellas.get(estrella, 0)
-            tendencia = ((freq_reciente / 40) / (freq_total / (total_sorteos * 2)) - 1) * 100
-            datos_recientes.append([estrella, freq_reciente, f"{tendencia:+.2f}%"])
+        for fila in puntuaciones:
+            if fila['tasa']:
+                tendencia = f"{((fila['recientes'] / min(20, total_sorteos)) / fila['tasa'] - 1) * 100:+.2f}%"
+            else:
+                tendencia = '-'
+            datos_recientes.append([fila['estrella'], fila['recientes'], fila['recientes_esperadas'],
+                                    tendencia])
         
         print(tabulate(datos_recientes, 
-                       headers=['Estrella', 'Apariciones Recientes', 'Tendencia'],
+                       headers=['Estrella', 'Apariciones Recientes', 'Esperadas', 'Tendencia'],
                        tablefmt='pretty'))
 
         # Visualización de la frecuencia de las estrellas
+        import matplotlib.pyplot as plt  # Solo se carga al dibujar
         plt.figure(figsize=(12, 6))
         freq_estrellas.plot(kind='bar')
         plt.title('Frecuencia de aparición de las estrellas')
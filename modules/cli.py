@@ -0,0 +1,522 @@
+"""
+Interfaz de línea de comandos no interactiva.
+
+Permite lanzar análisis sueltos desde scripts o tareas programadas:
+
+    python main.py freq --top 10 --format json
+    python main.py check 4 17 20 25 45 --stars 8 9
+    python main.py report --format table
+    python main.py --as-of 2019-03-15 hot       # Tal como estaba ese día
+
+Cada subcomando carga solo los módulos e índices que necesita.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+
+FORMATS = ['json', 'csv', 'table']
+GENERATION_METHODS = ['statistical', 'balanced', 'smart', 'random']
+
+
+def _is_binary(args):
+    return bool(args.data) and args.data.lower().endswith('.npy')
+
+
+def _load_frame(args):
+    if _is_binary(args) or args.as_of:
+        return _load_store(args).to_dataframe()
+    from .data_loader import DataLoader
+    return DataLoader(args.data).load_data(verbose=False)
+
+
+def _load_store(args):
+    # Las consultas numéricas no necesitan pandas: se lee el CSV con NumPy
+    # (o se abre el formato binario como memory-map)
+    from . import get_data_file
+    from .draw_store import DrawStore
+    if _is_binary(args):
+        store = DrawStore.load(args.data)
+    else:
+        store = DrawStore.from_csv(args.data or get_data_file())
+    if args.as_of:
+        store = store.as_of(_parse_date(args.as_of))
+        if not len(store):
+            raise ValueError(f"No hay sorteos hasta el {args.as_of}")
+    return store
+
+
+def _unfiltered(store):
+    """Histórico completo (sin --as-of) que corresponde al archivo de datos."""
+    loaded = store()
+    return loaded._origin[0] if loaded._origin is not None else loaded
+
+
+def _cached(args, name, params, compute):
+    """
+    Resultado de `compute(store)` a través de la caché en disco.
+
+    Con la caché activa y la versión del archivo ya conocida, un acierto no
+    llega a leer el histórico.
+    """
+    from . import get_data_file, result_cache
+    cache = result_cache.active()
+    if cache is None:
+        return compute(_load_store(args))
+
+    loaded = []
+
+    def store():
+        if not loaded:
+            loaded.append(_load_store(args))
+        return loaded[0]
+
+    if args.as_of:
+        params = dict(params, as_of=str(_parse_date(args.as_of)))
+    version = cache.dataset_version(args.data or get_data_file(),
+                                    lambda: _unfiltered(store).version)
+    return cache.cached(version, name, params, lambda: compute(store()))
+
+
+def _cmd_summary(args):
+    from . import queries
+    return _cached(args, 'summary', {}, queries.summary)
+
+
+def _cmd_last(args):
+    from . import queries
+    return _cached(args, 'last', {'n': args.n}, lambda store: queries.last_draws(store, args.n))
+
+
+def _cmd_freq(args):
+    from . import queries
+    pool = 'stars' if args.stars else 'numbers'
+    return _cached(args, 'freq', {'pool': pool, 'window': args.window, 'top': args.top},
+                   lambda store: queries.frequencies(store, pool, window=args.window, top=args.top))
+
+
+def _cmd_hot(args):
+    from . import queries
+    return _cached(args, 'hot', {'window': args.window, 'top': args.top},
+                   lambda store: queries.hot_numbers(store, window=args.window, top=args.top))
+
+
+def _cmd_cold(args):
+    from . import queries
+    return _cached(args, 'cold', {'window': args.window, 'top': args.top},
+                   lambda store: queries.cold_numbers(store, window=args.window, top=args.top))
+
+
+def _cmd_streaks(args):
+    from . import queries
+    pool = 'stars' if args.stars else 'numbers'
+    return _cached(args, 'streaks', {'pool': pool, 'top': args.top},
+                   lambda store: queries.streaks(store, pool, top=args.top))
+
+
+def _cmd_survival(args):
+    from . import survival
+    pool = 'stars' if args.stars else 'numbers'
+    # El número de hilos no cambia el resultado: no forma parte de la clave
+    return _cached(args, 'survival', {'pool': pool, 'top': args.top, 'bootstrap': args.bootstrap,
+                                      'seed': args.seed},
+                   lambda store: survival.overdue_table(store, pool, bootstrap=args.bootstrap, seed=args.seed,
+                                                        workers=args.workers, top=args.top))
+
+
+def _cmd_periodicity(args):
+    from . import periodicity
+    pool = 'stars' if args.stars else 'numbers'
+    # El número de procesos no cambia el resultado: no forma parte de la clave
+    tables = _cached(args, 'periodicity', {'permutations': args.permutations, 'seed': args.seed,
+                                           'max_period': args.max_period},
+                     lambda store: periodicity.scan(store, args.permutations, args.seed,
+                                                    args.max_period, workers=args.workers))
+    return tables[pool][:args.top]
+
+
+def _cmd_similar(args):
+    from . import queries
+    if args.pairs:
+        if args.numbers or args.stars:
+            raise ValueError("--pairs no admite combinación: compara los sorteos del histórico entre sí")
+        return _cached(args, 'similar_pairs', {'top': args.top, 'metric': args.metric,
+                                               'star_weight': args.star_weight},
+                       lambda store: queries.similar_pairs(store, args.top, args.metric, args.star_weight,
+                                                           workers=args.workers))
+    valid, message = queries.validate_ticket(args.numbers, args.stars or [])
+    if not valid:
+        raise ValueError(message)
+    return _cached(args, 'similar', {'numbers': args.numbers, 'stars': args.stars, 'top': args.top,
+                                     'metric': args.metric, 'star_weight': args.star_weight},
+                   lambda store: queries.similar_draws(store, args.numbers, args.stars, args.top,
+                                                       args.metric, args.star_weight))
+
+
+def _cmd_analogs(args):
+    from . import queries
+    return _cached(args, 'analogs', {'window': args.window, 'top': args.top, 'horizon': args.horizon},
+                   lambda store: queries.analog_periods(store, args.window, args.top, args.horizon))
+
+
+def _cmd_check(args):
+    from . import queries
+    valid, message = queries.validate_ticket(args.numbers, args.stars)
+    if not valid:
+        raise ValueError(message)
+    return _cached(args, 'check', {'numbers': args.numbers, 'stars': args.stars},
+                   lambda store: queries.check_ticket(store, args.numbers, args.stars))
+
+
+def _cmd_generate(args):
+    from .helpers import Helpers
+    if args.method == 'random':
+        combinaciones = [Helpers.generate_random_combination() for _ in range(args.n)]
+        return [{'numeros': c['numbers'], 'estrellas': c['stars']} for c in combinaciones]
+
+    from .generator import CombinationGenerator
+    generator = CombinationGenerator(_load_frame(args))
+    method = {
+        'statistical': generator.generate_statistical,
+        'balanced': generator.generate_balanced,
+        'smart': generator.generate_smart
+    }[args.method]
+
+    # Los generadores informan por pantalla; aquí solo interesa el resultado
+    with contextlib.redirect_stdout(io.StringIO()):
+        combinaciones = method(num_combinations=args.n)
+    return [{'numeros': [int(n) for n in c['numeros']],
+             'estrellas': [int(e) for e in c['estrellas']]} for c in combinaciones]
+
+
+def _cmd_report(args):
+    from . import queries
+    return _cached(args, 'report', {'top': args.top}, lambda store: queries.report(store, top=args.top))
+
+
+def _parse_date(text):
+    import numpy as np
+    for separator in ('/', '-'):
+        parts = text.split(separator)
+        if len(parts) == 3 and all(p.isdigit() for p in parts):
+            day, month, year = parts if separator == '/' else parts[::-1]
+            try:
+                return np.datetime64(f"{int(year):04d}-{int(month):02d}-{int(day):02d}", 'D')
+            except ValueError:
+                break
+    raise ValueError(f"Fecha no válida: {text} (usa DD/MM/AAAA o AAAA-MM-DD)")
+
+
+def _new_draws(args):
+    """Sorteos a añadir: los de --file o el indicado en la línea de comandos."""
+    import numpy as np
+    if args.file:
+        if args.draw or args.stars:
+            raise ValueError("Indica un sorteo o --file, no ambos")
+        from .draw_parser import read_draws
+        from .draw_store import _parse_irregular
+        parsed = read_draws(args.file)
+        dates, values = parsed.dates, parsed.values
+        if parsed.irregular:
+            extra_dates, extra_values = _parse_irregular(parsed.irregular)
+            dates = np.concatenate([dates, extra_dates])
+            values = np.concatenate([values, extra_values])
+        return dates, values[:, :5], values[:, 5:]
+
+    if len(args.draw) != 6 or not args.stars:
+        raise ValueError("Indica la fecha, cinco números y --stars con dos estrellas (o --file)")
+    try:
+        numbers = [int(n) for n in args.draw[1:]]
+    except ValueError:
+        raise ValueError("Los números deben ser enteros") from None
+    return [_parse_date(args.draw[0])], [numbers], [args.stars]
+
+
+def _cmd_append(args):
+    from . import get_data_file
+    from .draw_store import append_draws
+    if args.as_of:
+        raise ValueError("append no admite --as-of")
+    dates, numbers, stars = _new_draws(args)
+    store = _load_store(args)
+    updated = append_draws(args.data or get_data_file(), dates, numbers, stars, store=store)
+    return {
+        'añadidos': len(updated) - len(store),
+        'total_sorteos': len(updated),
+        'ultimo_sorteo': str(updated.dates[-1]) if len(updated) else None,
+        'version_anterior': store.version,
+        'version': updated.version
+    }
+
+
+def _cmd_synth(args):
+    import time
+    from . import PACKAGE_CONFIG
+    from .synthetic import SyntheticHistory, add_years, biased_weights, count_draws
+
+    start = args.start or PACKAGE_CONFIG['first_draw']
+    count = args.draws
+    if args.years is not None:
+        count = count_draws(start, add_years(start, args.years), args.draws_per_date)
+    if count < 1:
+        raise ValueError("El número de sorteos debe ser positivo")
+
+    number_weights = star_weights = None
+    if args.hot_numbers:
+        number_weights = biased_weights(PACKAGE_CONFIG['max_numbers'], args.hot_numbers, args.bias)
+    if args.hot_stars:
+        star_weights = biased_weights(PACKAGE_CONFIG['max_stars'], args.hot_stars, args.bias)
+
+    history = SyntheticHistory(start, seed=args.seed, number_weights=number_weights,
+                               star_weights=star_weights, draws_per_date=args.draws_per_date)
+    started = time.perf_counter()
+    formato = history.write(args.file, count)
+    return {
+        'archivo': args.file,
+        'formato': formato,
+        'sorteos': count,
+        'segundos': round(time.perf_counter() - started, 2),
+        'tamaño_mb': round(os.path.getsize(args.file) / 1024 / 1024, 2)
+    }
+
+
+def _cmd_serve(args):
+    from .server import run_server
+    if args.as_of:
+        raise ValueError("serve no admite --as-of")
+    run_server(args.data, host=args.host, port=args.port, workers=args.workers,
+               executor=args.executor, watch=args.watch)
+
+
+def _add_global_options(parser, defaults=True):
+    """
+    Opciones comunes a todos los subcomandos.
+
+    Se declaran en el analizador principal y también en cada subcomando, así
+    que valen antes o después de él. En los subcomandos no tienen valor por
+    defecto (SUPPRESS) para no pisar las que se dieron delante.
+    """
+    def default(value):
+        return value if defaults else argparse.SUPPRESS
+
+    parser.add_argument('--data', default=default(None),
+                        help='Ruta del CSV de sorteos (también .gz o .zst) o de un histórico .npy '
+                             '(por defecto, el CSV de data/)')
+    parser.add_argument('--format', choices=FORMATS, default=default('json'), help='Formato de salida')
+    parser.add_argument('--output', '-o', default=default(None),
+                        help='Archivo de salida (por defecto, salida estándar)')
+    parser.add_argument('--profile', action='store_true', default=default(False),
+                        help='Medir tiempos y memoria de cada análisis (resumen por stderr)')
+    parser.add_argument('--profile-no-memory', action='store_true', default=default(False),
+                        help='Con --profile, no medir memoria (tiempos más representativos)')
+    parser.add_argument('--profile-dir', default=default(None),
+                        help='Guardar además un perfil cProfile por llamada en este directorio')
+    parser.add_argument('--as-of', metavar='FECHA', default=default(None),
+                        help='Analizar el histórico tal como estaba ese día (DD/MM/AAAA o AAAA-MM-DD)')
+    parser.add_argument('--no-cache', action='store_true', default=default(False),
+                        help='No leer ni guardar resultados en la caché en disco')
+    parser.add_argument('--cache-dir', default=default(None),
+                        help='Directorio de la caché de resultados (por defecto, ~/.cache/euromillones)')
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='main.py',
+        description='Euromillones Analyzer Pro - análisis no interactivo'
+    )
+    _add_global_options(parser)
+    common = argparse.ArgumentParser(add_help=False)
+    _add_global_options(common, defaults=False)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_command(name, **kwargs):
+        return subparsers.add_parser(name, parents=[common], **kwargs)
+
+    sub = add_command('summary', help='Estadísticas básicas del histórico')
+    sub.set_defaults(handler=_cmd_summary)
+
+    sub = add_command('last', help='Últimos sorteos')
+    sub.add_argument('-n', type=int, default=5, help='Número de sorteos')
+    sub.set_defaults(handler=_cmd_last)
+
+    sub = add_command('freq', help='Frecuencia de números o estrellas')
+    sub.add_argument('--stars', action='store_true', help='Analizar estrellas en lugar de números')
+    sub.add_argument('--window', type=int, help='Limitar a los últimos N sorteos')
+    sub.add_argument('--top', type=int, help='Mostrar solo los N más frecuentes')
+    sub.set_defaults(handler=_cmd_freq)
+
+    for name, handler, help_text in [('hot', _cmd_hot, 'Números calientes'),
+                                     ('cold', _cmd_cold, 'Números fríos')]:
+        sub = add_command(name, help=help_text)
+        sub.add_argument('--window', type=int, default=20, help='Últimos N sorteos')
+        sub.add_argument('--top', type=int, default=10)
+        sub.set_defaults(handler=handler)
+
+    sub = add_command('streaks', help='Rachas de aparición y ausencia')
+    sub.add_argument('--stars', action='store_true', help='Analizar estrellas en lugar de números')
+    sub.add_argument('--top', type=int, default=10)
+    sub.set_defaults(handler=_cmd_streaks)
+
+    sub = add_command('survival', help='Números o estrellas atrasados según su supervivencia')
+    sub.add_argument('--stars', action='store_true', help='Analizar estrellas en lugar de números')
+    sub.add_argument('--top', type=int, default=10)
+    sub.add_argument('--bootstrap', type=int, default=1000, help='Réplicas bootstrap de las bandas de confianza')
+    sub.add_argument('--seed', type=int, default=0, help='Semilla del bootstrap')
+    sub.add_argument('--workers', type=int, help='Hilos para el bootstrap (por defecto, uno por CPU)')
+    sub.set_defaults(handler=_cmd_survival)
+
+    sub = add_command('periodicity', help='Periodos dominantes de cada número o estrella')
+    sub.add_argument('--stars', action='store_true', help='Analizar estrellas en lugar de números')
+    sub.add_argument('--top', type=int, default=10)
+    sub.add_argument('--permutations', type=int, default=1000, help='Permutaciones de la hipótesis nula')
+    sub.add_argument('--seed', type=int, default=0, help='Semilla de las permutaciones')
+    sub.add_argument('--max-period', type=int, help='Periodo máximo en sorteos (por defecto, un cuarto del histórico)')
+    sub.add_argument('--workers', type=int, help='Procesos para las permutaciones (por defecto, uno por CPU)')
+    sub.set_defaults(handler=_cmd_periodicity)
+
+    sub = add_command('check', help='Comparar una combinación con el histórico')
+    sub.add_argument('numbers', type=int, nargs=5, help='Cinco números (1-50)')
+    sub.add_argument('--stars', type=int, nargs=2, required=True, help='Dos estrellas (1-12)')
+    sub.set_defaults(handler=_cmd_check)
+
+    sub = add_command('similar', help='Sorteos más parecidos a una combinación (o entre sí)')
+    sub.add_argument('numbers', type=int, nargs='*', help='Cinco números (1-50)')
+    sub.add_argument('--stars', type=int, nargs=2, help='Dos estrellas (1-12)')
+    sub.add_argument('--pairs', action='store_true',
+                     help='Buscar las parejas de sorteos del histórico más parecidas entre sí')
+    sub.add_argument('--top', type=int, default=10)
+    sub.add_argument('--metric', choices=['weighted', 'jaccard'], default='weighted',
+                     help='weighted: aciertos de números + peso x aciertos de estrellas; '
+                          'jaccard: elementos comunes / distintos')
+    sub.add_argument('--star-weight', type=float, default=0.5, help='Peso de cada estrella acertada (weighted)')
+    sub.add_argument('--workers', type=int, help='Hilos para --pairs (por defecto, uno por CPU)')
+    sub.set_defaults(handler=_cmd_similar)
+
+    sub = add_command('analogs', help='Periodos pasados parecidos a los últimos sorteos')
+    sub.add_argument('--window', type=int, default=10, help='Sorteos recientes que se comparan')
+    sub.add_argument('--top', type=int, default=5)
+    sub.add_argument('--horizon', type=int, default=1, help='Sorteos posteriores de cada periodo que se muestran')
+    sub.set_defaults(handler=_cmd_analogs)
+
+    sub = add_command('generate', help='Generar combinaciones')
+    sub.add_argument('--method', choices=GENERATION_METHODS, default='statistical')
+    sub.add_argument('-n', type=int, default=1, help='Número de combinaciones')
+    sub.set_defaults(handler=_cmd_generate)
+
+    sub = add_command('report', help='Informe resumido')
+    sub.add_argument('--top', type=int, default=10)
+    sub.set_defaults(handler=_cmd_report)
+
+    sub = add_command('append', help='Añadir sorteos nuevos al histórico sin recargarlo')
+    sub.add_argument('draw', nargs='*', metavar='VALOR',
+                     help='Fecha (DD/MM/AAAA o AAAA-MM-DD) y cinco números (1-50)')
+    sub.add_argument('--stars', type=int, nargs=2, help='Dos estrellas (1-12)')
+    sub.add_argument('--file', help='CSV con los sorteos nuevos (mismo formato que el histórico)')
+    sub.set_defaults(handler=_cmd_append)
+
+    sub = add_command('synth', help='Generar un histórico sintético (CSV o .npy)')
+    sub.add_argument('file', help='Archivo de destino; con extensión .npy se usa el formato binario')
+    size = sub.add_mutually_exclusive_group(required=True)
+    size.add_argument('--draws', type=int, help='Número de sorteos')
+    size.add_argument('--years', type=int, help='Años de sorteos según el calendario real')
+    sub.add_argument('--start', help='Fecha del primer sorteo, AAAA-MM-DD (por defecto, 2004-02-13)')
+    sub.add_argument('--seed', type=int, help='Semilla para obtener siempre el mismo histórico')
+    sub.add_argument('--draws-per-date', type=int, default=1,
+                     help='Sorteos por fecha del calendario (para históricos muy largos en CSV)')
+    sub.add_argument('--hot-numbers', type=int, nargs='+', default=[], help='Números favorecidos')
+    sub.add_argument('--hot-stars', type=int, nargs='+', default=[], help='Estrellas favorecidas')
+    sub.add_argument('--bias', type=float, default=1.5, help='Peso relativo de los valores favorecidos')
+    sub.set_defaults(handler=_cmd_synth)
+
+    sub = add_command('serve', help='Servidor HTTP/JSON de análisis')
+    sub.add_argument('--host', default='127.0.0.1')
+    sub.add_argument('--port', type=int, default=8080)
+    sub.add_argument('--workers', type=int, help='Tamaño del pool de trabajo (por defecto, nº de CPUs)')
+    sub.add_argument('--executor', choices=['thread', 'process'], default='thread')
+    sub.add_argument('--watch', type=float, nargs='?', const=1.0, metavar='SEGUNDOS',
+                     help='Recargar el histórico cuando cambie el archivo (comprobando cada N segundos)')
+    sub.set_defaults(handler=_cmd_serve)
+
+    return parser
+
+
+def _is_table(value):
+    return isinstance(value, list) and bool(value) and isinstance(value[0], dict)
+
+
+def _tables(result):
+    """Divide un resultado en (título, filas) para los formatos tabulares."""
+    if isinstance(result, list):
+        return [(None, result)]
+
+    tables = []
+    scalars = [{'campo': k, 'valor': v} for k, v in result.items()
+               if not isinstance(v, dict) and not _is_table(v)]
+    if scalars:
+        tables.append((None, scalars))
+    for key, value in result.items():
+        if isinstance(value, dict):
+            tables.append((key, [{'campo': k, 'valor': v} for k, v in value.items()]))
+        elif _is_table(value):
+            tables.append((key, value))
+    return tables
+
+
+def _render(result, fmt):
+    if fmt == 'json':
+        return json.dumps(result, ensure_ascii=False, indent=2, default=str) + '\n'
+
+    buffer = io.StringIO()
+    for title, rows in _tables(result):
+        if not rows:
+            continue
+        if fmt == 'csv':
+            if title:
+                buffer.write(f"# {title}\n")
+            writer = csv.DictWriter(buffer, fieldnames=list(rows[0].keys()), lineterminator='\n')
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            from tabulate import tabulate
+            if title:
+                buffer.write(f"\n{title}\n")
+            buffer.write(tabulate(rows, headers='keys', tablefmt='pretty') + '\n')
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    """Punto de entrada de la CLI. Retorna el código de salida."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    from . import profiling
+    if args.profile or args.profile_dir:
+        profiling.enable(dump_dir=args.profile_dir, memory=not args.profile_no_memory)
+    else:
+        profiling.enable_from_env()
+
+    from . import result_cache
+    if args.no_cache:
+        result_cache.disable()
+    elif args.cache_dir:
+        result_cache.configure(args.cache_dir)
+
+    try:
+        result = args.handler(args)
+    except (ValueError, OSError) as e:
+        print(f"❌ {str(e)}", file=sys.stderr)
+        return 2
+
+    if result is None:
+        return 0
+
+    output = _render(result, args.format)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            f.write(output)
+    else:
+        sys.stdout.write(output)
+    return 0
@@ -0,0 +1,211 @@
+import time
+import numpy as np
+from .helpers import Helpers
+from .combinatorics import count_combinations, unrank_combinations
+
+COLUMNS = ['n1', 'n2', 'n3', 'n4', 'n5', 'e1', 'e2']
+EXCEL_MAX_ROWS = 1048575  # Límite de filas de una hoja de Excel (sin cabecera)
+
+
+def _encode_rows(values, segments):
+    """
+    Codifica filas de enteros de 1-2 cifras como texto sin bucles por fila.
+
+    `segments` alterna bytes constantes (bytes) e índices de columna (int). Cada
+    valor ocupa dos bytes y la cifra de las decenas se descarta con una máscara
+    cuando el valor es menor que 10.
+    """
+    rows = len(values)
+    blocks = []
+    masks = []
+    for segment in segments:
+        if isinstance(segment, bytes):
+            const = np.frombuffer(segment, dtype=np.uint8)
+            blocks.append(np.broadcast_to(const, (rows, len(const))))
+            masks.append(np.ones((rows, len(const)), dtype=bool))
+        else:
+            column = values[:, segment]
+            blocks.append(np.stack([column // 10 + 48, column % 10 + 48], axis=1).astype(np.uint8))
+            masks.append(np.stack([column >= 10, np.ones(rows, dtype=bool)], axis=1))
+
+    data = np.concatenate(blocks, axis=1)
+    mask = np.concatenate(masks, axis=1)
+    return data[mask].tobytes()
+
+
+CSV_SEGMENTS = [0, b',', 1, b',', 2, b',', 3, b',', 4, b',', 5, b',', 6, b'\n']
+JSONL_SEGMENTS = [b'{"n1":', 0, b',"n2":', 1, b',"n3":', 2, b',"n4":', 3, b',"n5":', 4,
+                  b',"e1":', 5, b',"e2":', 6, b'}\n']
+
+
+class CombinationExporter:
+    """
+    Exporta en streaming todas las combinaciones de 5 números y 2 estrellas
+    que se pueden formar con un conjunto de números y estrellas.
+
+    Las combinaciones se generan por bloques a partir de su rango, de modo que
+    la memoria usada depende del tamaño del bloque y no del total de filas.
+    """
+
+    FORMATS = {
+        'csv': '.csv',
+        'jsonl': '.jsonl',
+        'parquet': '.parquet',
+        'excel': '.xlsx'
+    }
+
+    def __init__(self, numbers, stars, chunk_size=200000):
+        if len(numbers) < 5 or len(stars) < 2:
+            raise ValueError("Se necesitan al menos 5 números y 2 estrellas")
+
+        # Se respeta el orden recibido, igual que itertools.combinations
+        self.numbers = np.asarray(numbers, dtype=np.int64)
+        self.stars = np.asarray(stars, dtype=np.int64)
+        self.chunk_size = chunk_size
+        self.number_combinations = count_combinations(len(self.numbers), 5)
+        self.star_combinations = count_combinations(len(self.stars), 2)
+        self.total_rows = self.number_combinations * self.star_combinations
+
+    def rows(self, start, stop):
+        """Retorna las filas [start, stop) como una matriz (filas x 7)."""
+        ranks = np.arange(start, stop, dtype=np.int64)
+        number_idx = unrank_combinations(ranks // self.star_combinations, len(self.numbers), 5)
+        star_idx = unrank_combinations(ranks % self.star_combinations, len(self.stars), 2)
+        return np.concatenate([self.numbers[number_idx], self.stars[star_idx]], axis=1)
+
+    def chunks(self, start=0):
+        """Genera las combinaciones por bloques de `chunk_size` filas a partir de la fila `start`."""
+        for chunk_start in range(start, self.total_rows, self.chunk_size):
+            yield self.rows(chunk_start, min(chunk_start + self.chunk_size, self.total_rows))
+
+    def estimate_size(self, format='csv'):
+        """
+        Estima el tamaño del archivo en bytes.
+
+        Para CSV y JSONL el cálculo es exacto: cada elemento aparece en el mismo
+        número de combinaciones, así que el total de cifras se obtiene sin
+        generarlas.
+        """
+        def digits(values):
+            return int(sum(len(str(v)) for v in values))
+
+        number_digits = (count_combinations(len(self.numbers) - 1, 4) * self.star_combinations *
+                         digits(self.numbers))
+        star_digits = (count_combinations(len(self.stars) - 1, 1) * self.number_combinations *
+                       digits(self.stars))
+
+        if format == 'csv':
+            header = len(','.join(COLUMNS)) + 1
+            return header + number_digits + star_digits + self.total_rows * 7
+        if format == 'jsonl':
+            overhead = sum(len(s) for s in JSONL_SEGMENTS if isinstance(s, bytes))
+            return number_digits + star_digits + self.total_rows * overhead
+        if format == 'parquet':
+            # Aproximación: 7 columnas uint8 antes de compresión
+            return self.total_rows * 7
+        if format == 'excel':
+            # Aproximación empírica de una hoja xlsx comprimida
+            return self.total_rows * 25
+        raise ValueError(f"Formato no soportado: {format}")
+
+    def export(self, filename, format='csv', show_progress=True, start_row=0):
+        """
+        Exporta las combinaciones al archivo indicado.
+
+        Con `start_row` > 0 se reanuda una exportación CSV/JSONL interrumpida,
+        añadiendo al final del archivo las filas a partir de esa posición.
+        """
+        if format not in self.FORMATS:
+            return False, "Formato no soportado"
+        if start_row and format not in ('csv', 'jsonl'):
+            return False, "Solo las exportaciones CSV y JSONL se pueden reanudar"
+        if format == 'excel' and self.total_rows > EXCEL_MAX_ROWS:
+            return False, (f"Excel admite como máximo {EXCEL_MAX_ROWS} filas; "
+                           f"use CSV, JSONL o Parquet para {self.total_rows} combinaciones")
+
+        writers = {
+            'csv': self._write_csv,
+            'jsonl': self._write_jsonl,
+            'parquet': self._write_parquet,
+            'excel': self._write_excel
+        }
+
+        try:
+            start = time.perf_counter()
+            written = writers[format](filename, show_progress, start, start_row)
+            elapsed = time.perf_counter() - start
+            if show_progress:
+                print()
+            rate = written / elapsed if elapsed > 0 else 0
+            return True, (f"{written} combinaciones exportadas a {filename} en {elapsed:.2f} s "
+                          f"({Helpers.format_large_number(int(rate))} filas/s)")
+        except ImportError as e:
+            return False, f"Falta una dependencia opcional: {str(e)}"
+        except Exception as e:
+            return False, f"Error al exportar: {str(e)}"
+
+    def _report_progress(self, written, start, bytes_written=None, start_row=0):
+        elapsed = time.perf_counter() - start
+        rate = written / elapsed if elapsed > 0 else 0
+        position = start_row + written
+        message = (f"\r{Helpers.get_progress_bar(position, self.total_rows, width=30)} "
+                   f"{position}/{self.total_rows} filas, "
+                   f"{Helpers.format_large_number(int(rate))} filas/s")
+        if bytes_written is not None and elapsed > 0:
+            message += f", {bytes_written / elapsed / 1024 / 1024:.1f} MB/s"
+        print(message, end='', flush=True)
+
+    def _write_text(self, filename, header, segments, show_progress, start, start_row):
+        written = 0
+        bytes_written = 0
+        with open(filename, 'ab' if start_row else 'wb') as f:
+            if not start_row:
+                f.write(header)
+                bytes_written += len(header)
+            for chunk in self.chunks(start_row):
+                data = _encode_rows(chunk, segments)
+                f.write(data)
+                written += len(chunk)
+                bytes_written += len(data)
+                if show_progress:
+                    self._report_progress(written, start, bytes_written, start_row)
+        return written
+
+    def _write_csv(self, filename, show_progress, start, start_row):
+        header = (','.join(COLUMNS) + '\n').encode()
+        return self._write_text(filename, header, CSV_SEGMENTS, show_progress, start, start_row)
+
+    def _write_jsonl(self, filename, show_progress, start, start_row):
+        return self._write_text(filename, b'', JSONL_SEGMENTS, show_progress, start, start_row)
+
+    def _write_parquet(self, filename, show_progress, start, start_row):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(col, pa.uint8()) for col in COLUMNS])
+        written = 0
+        with pq.ParquetWriter(filename, schema) as writer:
+            for chunk in self.chunks():
+                chunk = chunk.astype(np.uint8)
+                table = pa.Table.from_arrays([pa.array(chunk[:, i]) for i in range(7)], schema=schema)
+                writer.write_table(table)
+                written += len(chunk)
+                if show_progress:
+                    self._report_progress(written, start)
+        return written
+
+    def _write_excel(self, filename, show_progress, start, start_row):
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Combinaciones")
+        ws.append(COLUMNS)
+        written = 0
+        for chunk in self.chunks():
+            for row in chunk.tolist():
+                ws.append(row)
+            written += len(chunk)
+            if show_progress:
+                self._report_progress(written, start)
+        wb.save(filename)
+        return written
@@ -0,0 +1,112 @@
+from math import comb
+import numpy as np
+
+
+def count_combinations(n, k):
+    """Número de combinaciones de k elementos tomados de n."""
+    return comb(n, k)
+
+
+def unrank_combinations(ranks, n, k):
+    """
+    Convierte rangos lexicográficos en combinaciones de k índices de range(n).
+
+    Usa el sistema combinatorio (combinadic) de forma vectorizada: para cada
+    posición se busca con searchsorted el primer índice cuyo bloque de
+    combinaciones contiene al rango, en lugar de iterar combinación a combinación.
+    """
+    ranks = np.asarray(ranks, dtype=np.int64).copy()
+    result = np.empty((len(ranks), k), dtype=np.int64)
+    start = np.zeros(len(ranks), dtype=np.int64)
+
+    for i in range(k):
+        remaining = k - i - 1
+        # cum[x] = combinaciones que preceden a las que tienen x en la posición i
+        counts = np.array([comb(n - 1 - x, remaining) for x in range(n)], dtype=np.int64)
+        cum = np.concatenate(([0], np.cumsum(counts)))
+
+        target = ranks + cum[start]
+        chosen = np.searchsorted(cum, target, side='right') - 1
+        ranks = target - cum[chosen]
+        result[:, i] = chosen
+        start = chosen + 1
+
+    return result
+
+
+def rank_combinations(indices, n):
+    """Operación inversa de unrank_combinations: retorna el rango de cada fila de índices."""
+    indices = np.asarray(indices, dtype=np.int64)
+    k = indices.shape[1]
+    ranks = np.zeros(len(indices), dtype=np.int64)
+    start = np.zeros(len(indices), dtype=np.int64)
+
+    for i in range(k):
+        remaining = k - i - 1
+        counts = np.array([comb(n - 1 - x, remaining) for x in range(n)], dtype=np.int64)
+        cum = np.concatenate(([0], np.cumsum(counts)))
+        ranks += cum[indices[:, i]] - cum[start]
+        start = indices[:, i] + 1
+
+    return ranks
+
+
+def partition_ranks(total, parts):
+    """Divide el rango [0, total) en `parts` tramos contiguos de tamaño similar."""
+    bounds = np.linspace(0, total, parts + 1).astype(np.int64)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def iter_combination_chunks(pool, k, chunk_size=100000, start=0, stop=None, predicate=None):
+    """
+    Recorre las combinaciones de k elementos de `pool` por bloques.
+
+    Genera tuplas (rangos, combinaciones) donde `combinaciones` es una matriz
+    NumPy (filas x k) con los valores de `pool` en orden lexicográfico, igual
+    que itertools.combinations. `start` y `stop` permiten reanudar o repartir
+    el recorrido entre varios procesos; `predicate` recibe cada bloque y
+    retorna una máscara booleana con las filas que se conservan.
+    """
+    pool = np.asarray(pool)
+    total = comb(len(pool), k)
+    stop = total if stop is None else min(stop, total)
+
+    for chunk_start in range(start, stop, chunk_size):
+        ranks = np.arange(chunk_start, min(chunk_start + chunk_size, stop), dtype=np.int64)
+        combos = pool[unrank_combinations(ranks, len(pool), k)]
+        if predicate is not None:
+            mask = np.asarray(predicate(combos), dtype=bool)
+            ranks, combos = ranks[mask], combos[mask]
+            if len(ranks) == 0:
+                continue
+        yield ranks, combos
+
+
+def sample_combinations(pool, k, size, predicate=None, rng=None, batch_size=10000, max_batches=1000):
+    """
+    Extrae `size` combinaciones aleatorias distintas de `pool` que cumplan `predicate`.
+
+    Se sortean rangos uniformes por lotes y solo se des-rankean esos rangos, así
+    que el coste no depende del número total de combinaciones.
+    """
+    pool = np.asarray(pool)
+    rng = rng if rng is not None else np.random.default_rng()
+    total = comb(len(pool), k)
+    selected = []
+    seen = set()
+
+    for _ in range(max_batches):
+        ranks = rng.integers(0, total, size=min(batch_size, total), dtype=np.int64)
+        combos = pool[unrank_combinations(ranks, len(pool), k)]
+        if predicate is not None:
+            mask = np.asarray(predicate(combos), dtype=bool)
+            ranks, combos = ranks[mask], combos[mask]
+
+        for rank, combo in zip(ranks.tolist(), combos):
+            if rank not in seen:
+                seen.add(rank)
+                selected.append(combo)
+                if len(selected) == size:
+                    return np.array(selected)
+
+    raise ValueError("No se encontraron suficientes combinaciones que cumplan la condición")
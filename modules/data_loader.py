@@ -1,98 +1,146 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import io
 import sys
 import os
 
+from . import get_data_file
+from .data_quality import quality_report
+from .draw_parser import read_draws
+from .draw_store import invalid_draws, sort_draws
+from .queries import validate_ticket
+
+NUMERIC_COLUMNS = ['n1', 'n2', 'n3', 'n4', 'n5', 'e1', 'e2']
+# Posición de cada columna numérica en el CSV (la 6 es la columna vacía)
+NUMERIC_POSITIONS = [1, 2, 3, 4, 5, 7, 8]
+
 class DataLoader:
-    def __init__(self):
-        self.filename = 'data/Euromillones - 2004 a 2024.csv'
+    def __init__(self, filename=None):
+        self.filename = filename or get_data_file()
         self.required_columns = ['FECHA', 'COMB. GANADORA', 'ESTRELLAS']
         self.df = None
 
-    def load_data(self):
+    def load_data(self, verbose=True):
         """Carga y prepara los datos del CSV."""
         try:
-            print("\n📂 Cargando datos del Euromillones...")
+            if verbose:
+                print("\n📂 Cargando datos del Euromillones...")
             
             # Verificar que existe el archivo
             if not os.path.exists(self.filename):
                 raise FileNotFoundError(f"No se encuentra el archivo {self.filename}")
 
-            # Cargar CSV
-            self.df = pd.read_csv(self.filename)
+            # Leer el CSV: las filas con el formato fijo se decodifican sin pandas
+            parsed = read_draws(self.filename)
             
             # Verificar estructura básica
-            self._verify_data_structure()
+            self._verify_data_structure(parsed)
             
             # Preparar y limpiar datos
-            self.df = self._prepare_data()
+            self.df = self._prepare_data(parsed)
             
-            print("✅ Datos cargados y preparados correctamente")
-            print(f"📊 Total de sorteos analizados: {len(self.df)}")
-            print(f"📅 Rango de fechas: {self.df['fecha'].min().strftime('%d-%m-%Y')} "
-                  f"a {self.df['fecha'].max().strftime('%d-%m-%Y')}")
+            if verbose:
+                print("✅ Datos cargados y preparados correctamente")
+                print(f"📊 Total de sorteos analizados: {len(self.df)}")
+                print(f"📅 Rango de fechas: {self.df['fecha'].min().strftime('%d-%m-%Y')} "
+                      f"a {self.df['fecha'].max().strftime('%d-%m-%Y')}")
             
             return self.df
 
         except Exception as e:
-            print(f"\n❌ Error al cargar datos: {str(e)}")
+            print(f"\n❌ Error al cargar datos: {str(e)}", file=sys.stdout if verbose else sys.stderr)
             sys.exit(1)
 
-    def _verify_data_structure(self):
+    def _verify_data_structure(self, parsed):
         """Verifica la estructura básica del CSV."""
         # Verificar columnas necesarias
         for col in self.required_columns:
-            if col not in self.df.columns:
+            if col not in parsed.header:
                 raise ValueError(f"Columna requerida '{col}' no encontrada en el CSV")
 
         # Verificar que hay datos
-        if len(self.df) == 0:
+        if parsed.rows == 0:
             raise ValueError("El archivo CSV está vacío")
 
-    def _prepare_data(self):
-        """Prepara y limpia los datos."""
-        # Copiar DataFrame para no modificar el original
-        df = self.df.copy()
-
-        # Renombrar columnas
-        df.columns = ['fecha', 'n1', 'n2', 'n3', 'n4', 'n5', 'unnamed', 'e1', 'e2']
-        
-        # Eliminar columna innecesaria
-        df = df.drop('unnamed', axis=1)
-
-        # Convertir fecha a datetime
-        df['fecha'] = pd.to_datetime(df['fecha'], format='%d/%m/%Y', errors='coerce')
-
-        # Ordenar por fecha descendente (más reciente primero)
-        df = df.sort_values('fecha', ascending=False)
-
-        # Verificar y convertir números a int
-        num_columns = ['n1', 'n2', 'n3', 'n4', 'n5', 'e1', 'e2']
-        for col in num_columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-
-        # Eliminar filas con datos faltantes
-        df = df.dropna()
-
-        # Verificar rangos válidos
-        self._verify_number_ranges(df)
-
+    def _prepare_data(self, parsed):
+        """
+        Prepara y limpia los datos.
+
+        El DataFrame resultante guarda números y estrellas como uint8 (cada
+        sorteo ordenado de menor a mayor) y se construye directamente desde
+        los arrays del lector, sin DataFrames intermedios.
+        """
+        fechas, valores = parsed.dates, parsed.values
+        indice = pd.RangeIndex(parsed.rows)
+
+        # Las líneas sin el formato fijo se interpretan con pandas
+        if parsed.irregular:
+            filas_irregulares = np.array([fila for fila, _ in parsed.irregular])
+            extra_fechas, extra_valores, extra_filas = self._parse_irregular(parsed)
+            filas = np.concatenate([np.setdiff1d(indice, filas_irregulares, assume_unique=True),
+                                    extra_filas])
+            # Se mantiene el orden del archivo (y el índice de cada fila)
+            orden = np.argsort(filas, kind='stable')
+            fechas = np.concatenate([fechas, extra_fechas])[orden]
+            valores = np.concatenate([valores, extra_valores])[orden]
+            indice = pd.Index(filas[orden])
+
+        # Ordenar cada sorteo y verificar rangos y duplicados sobre el array compacto
+        numeros, estrellas = valores[:, :5], valores[:, 5:]
+        sort_draws(numeros, estrellas)
+        self._verify_number_ranges(numeros, estrellas, indice)
+
+        # Ordenar por fecha descendente (más reciente primero) si no lo está ya
+        if len(fechas) > 1 and (fechas[1:] > fechas[:-1]).any():
+            orden = np.argsort(fechas, kind='stable')[::-1]
+            fechas, valores, indice = fechas[orden], valores[orden], indice[orden]
+
+        df = pd.DataFrame(valores, columns=NUMERIC_COLUMNS, index=indice)
+        df.insert(0, 'fecha', fechas)
         return df
 
-    def _verify_number_ranges(self, df):
-        """Verifica que los números están en rangos válidos."""
-        # Verificar números principales (1-50)
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            invalid = df[~df[col].between(1, 50)]
-            if len(invalid) > 0:
-                raise ValueError(f"Encontrados números fuera de rango (1-50) en columna {col}")
+    def _parse_irregular(self, parsed):
+        """
+        Interpreta con pandas las líneas que no tienen el formato fijo.
+
+        Suelen ser pocas (días o números sin cero inicial, filas incompletas),
+        así que el coste de pandas no pesa. Se descartan las filas con campos
+        vacíos o no numéricos. Retorna (fechas, valores uint8, filas).
+        """
+        texto = '\n'.join(linea for _, linea in parsed.irregular)
+        ancho = len(parsed.header)
+        # Las líneas con campos de más se recortan al ancho de la cabecera
+        raw = pd.read_csv(io.StringIO(texto), header=None, names=range(ancho),
+                          skip_blank_lines=False, engine='python',
+                          on_bad_lines=lambda campos: campos[:ancho])
+        raw.index = [fila for fila, _ in parsed.irregular]
+
+        # Columnas por posición: fecha, cinco números, columna vacía, dos estrellas
+        fechas = pd.to_datetime(raw.iloc[:, 0], format='%d/%m/%Y', errors='coerce').to_numpy()
+        valores = np.empty((len(raw), len(NUMERIC_COLUMNS)), dtype=np.float64)
+        for i, pos in enumerate(NUMERIC_POSITIONS):
+            valores[:, i] = pd.to_numeric(raw.iloc[:, pos], errors='coerce')
 
-        # Verificar estrellas (1-12)
-        for col in ['e1', 'e2']:
-            invalid = df[~df[col].between(1, 12)]
-            if len(invalid) > 0:
-                raise ValueError(f"Encontradas estrellas fuera de rango (1-12) en columna {col}")
+        # Eliminar filas con datos faltantes
+        validas = ~np.isnan(valores).any(axis=1) & ~np.isnat(fechas)
+        fechas, valores = fechas[validas].astype('datetime64[D]'), valores[validas]
+        filas = raw.index[validas].to_numpy()
+
+        # Fuera de rango no se puede reducir a uint8 sin que el valor dé la vuelta
+        numeros, estrellas = valores[:, :5], valores[:, 5:]
+        sort_draws(numeros, estrellas)
+        self._verify_number_ranges(numeros, estrellas, filas)
+        return fechas, valores.astype(np.uint8), filas
+
+    def _verify_number_ranges(self, numeros, estrellas, indice):
+        """Verifica que los números y estrellas están en rango y sin repetir."""
+        invalidas = invalid_draws(numeros, estrellas)
+        if len(invalidas):
+            # Línea del CSV: índice de la fila + cabecera + 1
+            lineas = ', '.join(str(linea + 2) for linea in indice[invalidas[:10]])
+            raise ValueError(f"Encontrados {len(invalidas)} sorteos con números (1-50) o "
+                             f"estrellas (1-12) fuera de rango o repetidos (líneas {lineas})")
 
     def get_data_info(self):
         """Retorna información básica sobre los datos cargados."""
@@ -147,25 +195,7 @@ class DataLoader:
 
     def validate_combination(self, numbers, stars):
         """Valida una combinación de números y estrellas."""
-        # Verificar longitud
-        if len(numbers) != 5:
-            return False, "Debe proporcionar 5 números"
-        if len(stars) != 2:
-            return False, "Debe proporcionar 2 estrellas"
-
-        # Verificar rangos
-        if not all(1 <= n <= 50 for n in numbers):
-            return False, "Los números deben estar entre 1 y 50"
-        if not all(1 <= s <= 12 for s in stars):
-            return False, "Las estrellas deben estar entre 1 y 12"
-
-        # Verificar duplicados
-        if len(set(numbers)) != 5:
-            return False, "No puede haber números duplicados"
-        if len(set(stars)) != 2:
-            return False, "No puede haber estrellas duplicadas"
-
-        return True, "Combinación válida"
+        return validate_ticket(numbers, stars)
 
     def export_data(self, filename, format='csv'):
         """Exporta los datos en diferentes formatos."""
@@ -187,68 +217,44 @@ class DataLoader:
             return False, f"Error al exportar: {str(e)}"
 
     def get_data_quality_report(self):
-        """Genera un reporte de calidad de los datos."""
+        """
+        Genera un reporte de calidad de los datos.
+
+        Los huecos se comparan con el calendario real de sorteos (viernes, y
+        martes desde 2011) y las estrellas con el bombo de cada etapa. Cada
+        problema se reporta con las filas afectadas (etiquetas de `df.index`,
+        es decir, la fila de datos del CSV), no solo con cuántas son.
+        """
         if self.df is None:
             return "No hay datos para analizar"
 
+        calidad = quality_report(self.df['fecha'].to_numpy(),
+                                 self.df[NUMERIC_COLUMNS[:5]].to_numpy(),
+                                 self.df[NUMERIC_COLUMNS[5:]].to_numpy(),
+                                 newest_first=True)
+        filas = self.df.index.to_numpy()
+
         report = {
             'registros_totales': len(self.df),
             'valores_faltantes': self.df.isnull().sum().to_dict(),
-            'duplicados': len(self.df) - len(self.df.drop_duplicates()),
+            'duplicados': filas[calidad['sorteos_duplicados']],
             'rango_fechas': {
                 'inicio': self.df['fecha'].min(),
                 'fin': self.df['fecha'].max(),
-                'dias_faltantes': self._get_missing_dates()
+                'sorteos_faltantes': pd.DatetimeIndex(calidad['sorteos_faltantes']),
+                'fechas_duplicadas': filas[calidad['fechas_duplicadas']],
+                'fechas_desordenadas': filas[calidad['fechas_desordenadas']],
+                'fuera_de_calendario': filas[calidad['fuera_de_calendario']]
             },
-            'validacion_numeros': self._validate_number_consistency(),
-            'validacion_estrellas': self._validate_star_consistency()
+            'validacion_numeros': {
+                'fuera_de_rango': filas[calidad['numeros_fuera_de_rango']],
+                'repetidos': filas[calidad['numeros_repetidos']]
+            },
+            'validacion_estrellas': {
+                'fuera_de_rango': filas[calidad['estrellas_fuera_de_rango']],
+                'repetidas': filas[calidad['estrellas_repetidas']],
+                'fuera_de_etapa': filas[calidad['estrellas_fuera_de_etapa']]
+            }
         }
 
         return report
-
-    def _get_missing_dates(self):
-        """Identifica fechas faltantes en la serie temporal."""
-        fecha_completa = pd.date_range(
-            start=self.df['fecha'].min(),
-            end=self.df['fecha'].max(),
-            freq='D'
-        )
-        fechas_sorteos = set(self.df['fecha'].dt.date)
-        fechas_esperadas = set(fecha_completa.date)
-        return sorted(fechas_esperadas - fechas_sorteos)
-
-    def _validate_number_consistency(self):
-        """Valida la consistencia de los números."""
-        issues = []
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            # Verificar rango
-            out_of_range = self.df[~self.df[col].between(1, 50)]
-            if len(out_of_range) > 0:
-                issues.append(f"Números fuera de rango en {col}: {len(out_of_range)} registros")
-
-            # Verificar duplicados en la misma combinación
-            for other_col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-                if col != other_col:
-                    duplicates = self.df[self.df[col] == self.df[other_col]]
-                    if len(duplicates) > 0:
-                        issues.append(f"Números duplicados entre {col} y {other_col}: {len(duplicates)} registros")
-
-        return issues
-
-    def _validate_star_consistency(self):
-        """Valida la consistencia de las estrellas."""
-        issues = []
-        for col in ['e1', 'e2']:
-            # Verificar rango
-            out_of_range = self.df[~self.df[col].between(1, 12)]
-            if len(out_of_range) > 0:
-                issues.append(f"Estrellas fuera de rango en {col}: {len(out_of_range)} registros")
-
-            # Verificar duplicados en la misma combinación
-            for other_col in ['e1', 'e2']:
-                if col != other_col:
-                    duplicates = self.df[self.df[col] == self.df[other_col]]
-                    if len(duplicates) > 0:
-                        issues.append(f"Estrellas duplicadas entre {col} y {other_col}: {len(duplicates)} registros")
-
-        return issues
@@ -0,0 +1,239 @@
+"""
+Lector rápido del CSV de sorteos.
+
+Las filas del histórico tienen un formato fijo
+(`dd/mm/yyyy,nn,nn,nn,nn,nn,,ee,ee`; el día y el mes pueden venir sin cero
+inicial), así que en lugar de pasar por la inferencia de tipos de un lector
+CSV genérico se leen los bytes por bloques, se localizan las filas con ese
+formato y sus campos se decodifican directamente a arrays NumPy, fechas
+incluidas. Las líneas que no encajan se devuelven aparte para que quien llama
+las interprete con un lector general (pandas en DataLoader, el módulo csv en
+DrawStore).
+
+Los archivos comprimidos con gzip o zstd se detectan por su cabecera y se
+descomprimen como un flujo, sin cargarlos enteros en memoria:
+
+    parsed = read_draws('historico.csv.gz')
+    parsed.values        # matriz uint8 (sorteos x 7): n1..n5, e1, e2
+    parsed.irregular     # [(fila, línea), ...] para el lector general
+"""
+import gzip
+from collections import namedtuple
+
+import numpy as np
+
+# dd/mm/yyyy,nn,nn,nn,nn,nn,,ee,ee (sin el fin de línea). Con d/m/yyyy la
+# fila mide hasta dos bytes menos; se alinea a la derecha y se rellena con ceros.
+ROW_WIDTH = 32
+MIN_ROW_WIDTH = ROW_WIDTH - 2
+# Plantilla de la fila: '0' donde va un dígito y el separador en el resto.
+# Restando la plantilla, una fila es válida si cada byte queda por debajo de
+# LIMITS (9 en los dígitos, 0 en los separadores); en uint8 lo que queda por
+# debajo de la plantilla da la vuelta y también falla.
+TEMPLATE = np.frombuffer(b'00/00/0000,00,00,00,00,00,,00,00', dtype=np.uint8)
+LIMITS = np.where(TEMPLATE == ord('0'), 9, 0).astype(np.uint8)
+# Decenas de cada pareja de dígitos: día, mes, siglo, año, cinco números y dos estrellas
+TENS = [0, 3, 6, 8, 11, 14, 17, 20, 23, 27, 30]
+UNITS = [c + 1 for c in TENS]
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int32)
+
+CSV_HEADER = b'FECHA,COMB. GANADORA,,,,,,ESTRELLAS,\r\n'
+# Ancho de una fila escrita por encode_rows, con el fin de línea CRLF
+LINE_WIDTH = ROW_WIDTH + 2
+
+CHUNK_SIZE = 16 * 1024 * 1024
+GZIP_MAGIC = b'\x1f\x8b'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+ParsedDraws = namedtuple('ParsedDraws', ['header', 'dates', 'values', 'rows', 'irregular'])
+ParsedDraws.__doc__ = """
+Resultado de read_draws.
+
+header: campos de la cabecera. dates (datetime64[D]) y values (uint8,
+sorteos x 7) contienen las filas con el formato fijo, en el orden del
+archivo. rows: número total de filas de datos (sin cabecera ni líneas en
+blanco). irregular: lista de (fila, texto) de las líneas que no tienen el
+formato fijo; `fila` cuenta desde 0 igual que el índice de pandas.
+"""
+
+
+def open_stream(filename):
+    """Abre el archivo en binario, descomprimiendo gzip o zstd si hace falta."""
+    with open(filename, 'rb') as f:
+        magic = f.read(4)
+
+    if magic.startswith(GZIP_MAGIC):
+        return gzip.open(filename, 'rb')
+    if magic.startswith(ZSTD_MAGIC):
+        try:
+            from compression import zstd  # Python 3.14+
+            return zstd.open(filename, 'rb')
+        except ImportError:
+            pass
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("Para leer archivos zstd instala el paquete zstandard "
+                             "(pip install zstandard)") from None
+        return zstandard.ZstdDecompressor().stream_reader(open(filename, 'rb'), closefd=True)
+    return open(filename, 'rb')
+
+
+def _blocks(stream, chunk_size):
+    """Bloques del flujo que terminan siempre en un fin de línea."""
+    tail = b''
+    while True:
+        block = stream.read(chunk_size)
+        if not block:
+            if tail:
+                yield tail + b'\n'
+            return
+        if tail:
+            block = tail + block
+        cut = block.rfind(b'\n') + 1
+        tail = block[cut:]
+        if cut:
+            yield block[:cut]
+
+
+def _normalize_dates(matrix):
+    """
+    Convierte en su sitio las fechas con el mes de una cifra a dd/mm/yyyy.
+
+    Tras rellenar con ceros por la izquierda, 'd/mm/yyyy' ya queda como
+    '0d/mm/yyyy', pero 'dd/m/yyyy' y 'd/m/yyyy' quedan como '0dd/m/yyyy' y
+    '00d/m/yyyy': la primera barra está una posición más a la derecha.
+    """
+    short_month = (matrix[:, 3] == ord('/')) & (matrix[:, 5] == ord('/')) & (matrix[:, 0] == ord('0'))
+    if short_month.any():
+        rows = matrix[short_month]
+        rows[:, 0:2] = rows[:, 1:3]
+        rows[:, 2] = ord('/')
+        rows[:, 3] = ord('0')
+        matrix[short_month] = rows
+
+
+def _row_matrix(buf, starts, lengths):
+    """Matriz (filas x ROW_WIDTH) con cada fila alineada a la derecha."""
+    stride = starts[1] - starts[0] if len(starts) > 1 else ROW_WIDTH
+    if (lengths == ROW_WIDTH).all() and (np.diff(starts) == stride).all():
+        # Todas las filas con el mismo ancho y separación: basta una vista
+        return np.lib.stride_tricks.as_strided(buf[starts[0]:] if len(starts) else buf,
+                                               shape=(len(starts), ROW_WIDTH),
+                                               strides=(stride, 1), writeable=False)
+
+    columns = np.arange(ROW_WIDTH)
+    positions = (starts + lengths)[:, None] - ROW_WIDTH + columns
+    matrix = buf[np.maximum(positions, 0)]
+    matrix[columns < (ROW_WIDTH - lengths)[:, None]] = ord('0')
+    _normalize_dates(matrix)
+    return matrix
+
+
+def _decode_dates(two_digits):
+    """
+    Fechas a partir de las parejas día, mes, siglo y año; NaT si no son válidas.
+
+    Usa la conversión entera de fecha civil a días (H. Hinnant), bastante más
+    rápida que construir las fechas pasando por datetime64[M].
+    """
+    # int32 basta para años de cuatro cifras y es más rápido
+    day = two_digits[:, 0].astype(np.int32)
+    month = two_digits[:, 1].astype(np.int32)
+    year = two_digits[:, 2].astype(np.int32) * 100 + two_digits[:, 3]
+
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    month_days = DAYS_IN_MONTH[np.clip(month, 1, 12) - 1] + (leap & (month == 2))
+    valid = (month >= 1) & (month <= 12) & (day >= 1) & (day <= month_days)
+
+    y = year - (month <= 2)
+    era = y // 400
+    year_of_era = y - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    dates = (era * 146097 + day_of_era - 719468).astype(np.int64).astype('datetime64[D]')
+    dates[~valid] = np.datetime64('NaT')
+    return dates
+
+
+def _parse_block(block, first_row):
+    """Decodifica un bloque de líneas completas. Retorna (fechas, valores, irregulares, filas)."""
+    buf = np.frombuffer(block, dtype=np.uint8)
+    ends = np.flatnonzero(buf == ord('\n'))
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    # Sin el \r de los finales CRLF
+    ends = ends - ((ends > starts) & (buf[ends - 1] == ord('\r')))
+    lengths = ends - starts
+
+    # Las líneas en blanco no cuentan como filas (igual que en pandas)
+    filled = lengths > 0
+    starts, lengths = starts[filled], lengths[filled]
+
+    fixed = np.flatnonzero((lengths >= MIN_ROW_WIDTH) & (lengths <= ROW_WIDTH))
+    matrix = _row_matrix(buf, starts[fixed], lengths[fixed])
+
+    offsets = matrix - TEMPLATE
+    # Los 32 bytes de cada fila se comprueban como cuatro palabras de 64 bits
+    words = (offsets > LIMITS).view(np.uint64)
+    ok = (words[:, 0] | words[:, 1] | words[:, 2] | words[:, 3]) == 0
+    two_digits = offsets[:, TENS] * 10 + offsets[:, UNITS]
+    dates = _decode_dates(two_digits)
+    ok &= ~np.isnat(dates)
+
+    if len(fixed) == len(starts) and ok.all():
+        return dates, two_digits[:, 4:], [], len(starts)
+
+    good = fixed[ok]
+    irregular = np.setdiff1d(np.arange(len(starts)), good, assume_unique=True)
+    lines = [(first_row + int(i), block[starts[i]:starts[i] + lengths[i]].decode('utf-8', errors='replace'))
+             for i in irregular]
+    return dates[ok], two_digits[ok, 4:], lines, len(starts)
+
+
+def read_draws(filename, chunk_size=CHUNK_SIZE):
+    """Lee el CSV de sorteos (opcionalmente comprimido) decodificando el formato fijo."""
+    dates, values, irregular = [], [], []
+    header = None
+    rows = 0
+    with open_stream(filename) as stream:
+        for block in _blocks(stream, chunk_size):
+            if header is None:
+                cut = block.index(b'\n') + 1
+                header = block[:cut].decode('utf-8-sig').rstrip('\r\n').split(',')
+                block = block[cut:]
+                if not block:
+                    continue
+            block_dates, block_values, lines, count = _parse_block(block, rows)
+            dates.append(block_dates)
+            values.append(block_values)
+            irregular.extend(lines)
+            rows += count
+
+    if not dates:
+        return ParsedDraws(header or [], np.empty(0, dtype='datetime64[D]'),
+                           np.empty((0, 7), dtype=np.uint8), rows, irregular)
+    return ParsedDraws(header, np.concatenate(dates), np.concatenate(values), rows, irregular)
+
+
+def encode_rows(dates, numbers, stars):
+    """
+    Convierte un bloque de sorteos en una matriz de bytes (filas x LINE_WIDTH)
+    con el formato del CSV, en el mismo orden en que se reciben.
+    """
+    months = dates.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]').astype(np.int64) + 1970
+    if len(years) and (years.min() < 1000 or years.max() > 9999):
+        raise ValueError("Las fechas deben estar entre los años 1000 y 9999 para el formato dd/mm/yyyy")
+    day = (dates - months.astype('datetime64[D]')).astype(np.int64) + 1
+    month = months.astype(np.int64) % 12 + 1
+
+    rows = np.empty((len(dates), LINE_WIDTH), dtype=np.uint8)
+    rows[:, :ROW_WIDTH] = TEMPLATE
+    rows[:, ROW_WIDTH:] = np.frombuffer(b'\r\n', dtype=np.uint8)
+    fields = [day, month, years // 100, years % 100, *numbers.T, *stars.T]
+    for column, values in zip(TENS, fields):
+        rows[:, column] = values // 10 + ord('0')
+        rows[:, column + 1] = values % 10 + ord('0')
+    return rows
@@ -0,0 +1,776 @@
+import copy
+import csv
+import hashlib
+import io
+import os
+import shutil
+import threading
+from functools import cached_property
+import numpy as np
+
+from .draw_parser import GZIP_MAGIC, ZSTD_MAGIC, encode_rows, read_draws
+
+NUM_COLS = ['n1', 'n2', 'n3', 'n4', 'n5']
+STAR_COLS = ['e1', 'e2']
+POOLS = {
+    'numbers': 50,
+    'stars': 12
+}
+# Formato binario: un .npy de registros en orden cronológico. Se puede abrir
+# como memory-map, así que cargar un histórico enorme no exige leerlo entero.
+BINARY_DTYPE = np.dtype([
+    ('fecha', 'datetime64[D]'),
+    ('numeros', np.uint8, (5,)),
+    ('estrellas', np.uint8, (2,))
+])
+# Columnas de DrawStore.features
+FEATURE_COLUMNS = ['pares', 'decenas', 'suma', 'consecutivos']
+# Filas de DrawStore.streaks(pool)
+STREAK_ROWS = ['racha_maxima', 'racha_actual', 'ausencia_maxima', 'ausencia_actual']
+# Índices derivados con una fila por sorteo; append los prolonga en lugar de recalcularlos
+ROW_INDEXES = ['number_occurrence', 'star_occurrence', 'number_prefix', 'star_prefix', 'features',
+               'number_ages', 'star_ages', 'masks']
+# Bit de la estrella 1 en DrawStore.masks (los números ocupan los bits 0 a 49)
+STAR_SHIFT = 50
+# Tope de DrawStore.ages: las edades se guardan en uint16 y se saturan
+MAX_AGE = np.iinfo(np.uint16).max
+
+
+def sort_draws(numbers, stars):
+    """Ordena en su sitio los números y las estrellas de cada sorteo."""
+    numbers.sort(axis=1)
+    stars.sort(axis=1)
+
+
+def invalid_draws(numbers, stars):
+    """
+    Índices de los sorteos con valores fuera de rango o repetidos.
+
+    Espera filas ya ordenadas (sort_draws): un valor repetido aparece entonces
+    como dos columnas contiguas iguales. Las comparaciones no restan, así que
+    sirven igual para enteros con y sin signo.
+    """
+    bad = np.zeros(len(numbers), dtype=bool)
+    for values, size in ((numbers, POOLS['numbers']), (stars, POOLS['stars'])):
+        bad |= (values < 1).any(axis=1) | (values > size).any(axis=1)
+        bad |= (values[:, 1:] <= values[:, :-1]).any(axis=1)
+    return np.flatnonzero(bad)
+
+
+def runs(matrix):
+    """
+    Rachas de valores True por columna.
+
+    Retorna (racha máxima, racha actual) para cada columna; la racha actual es
+    la que termina en el último sorteo.
+    """
+    padded = np.zeros((matrix.shape[0] + 2, matrix.shape[1]), dtype=np.int8)
+    padded[1:-1] = matrix
+    # Se recorre por columnas para que np.nonzero agrupe los cambios de cada una
+    changes = np.diff(padded.T, axis=1)
+    cols_start, starts = np.nonzero(changes == 1)
+    _, ends = np.nonzero(changes == -1)
+    lengths = ends - starts
+
+    max_run = np.zeros(matrix.shape[1], dtype=np.int64)
+    np.maximum.at(max_run, cols_start, lengths)
+
+    current = np.zeros(matrix.shape[1], dtype=np.int64)
+    at_end = ends == matrix.shape[0]
+    current[cols_start[at_end]] = lengths[at_end]
+    return max_run, current
+
+
+def _extend_runs(max_run, current, block):
+    """Actualiza (racha máxima, racha actual) con un bloque de sorteos nuevos."""
+    block_max, block_current = runs(block)
+    rows = len(block)
+    leading = np.where(block.all(axis=0), rows, block.argmin(axis=0))
+    new_current = np.where(leading == rows, current + rows, block_current)
+    new_max = np.maximum(np.maximum(max_run, block_max), current + leading)
+    return new_max, new_current
+
+
+def _hash_rows(hasher, dates, numbers, stars, chunk_size=1 << 20):
+    """Añade al hash los sorteos fila a fila, con el formato binario de registros."""
+    for start in range(0, len(dates), chunk_size):
+        block = slice(start, start + chunk_size)
+        records = np.empty(len(dates[block]), dtype=BINARY_DTYPE)
+        records['fecha'] = dates[block]
+        records['numeros'] = numbers[block]
+        records['estrellas'] = stars[block]
+        hasher.update(records.tobytes())
+
+
+def _check_draws(numbers, stars, dates):
+    invalid = invalid_draws(numbers, stars)
+    if len(invalid):
+        fechas = ', '.join(str(d) for d in dates[invalid[:5]])
+        raise ValueError(f"{len(invalid)} sorteos con números o estrellas fuera de rango "
+                         f"o repetidos (fechas {fechas})")
+
+
+def _parse_irregular(lines):
+    """
+    Interpreta con el módulo csv las líneas sin el formato fijo.
+
+    Sigue las mismas reglas que DataLoader: se descartan las filas con campos
+    vacíos o no numéricos. Retorna (fechas, valores uint8).
+    """
+    dates, values = [], []
+    for row in csv.reader(line for _, line in lines):
+        # FECHA, cinco números, columna vacía, dos estrellas
+        if len(row) < 9:
+            continue
+        try:
+            day, month, year = row[0].split('/')
+            date = np.datetime64(f"{int(year):04d}-{int(month):02d}-{int(day):02d}", 'D')
+            values.append([int(v) for v in row[1:6] + row[7:9]])
+        except ValueError:
+            continue
+        dates.append(date)
+
+    dates = np.array(dates, dtype='datetime64[D]')
+    values = np.array(values, dtype=np.int64).reshape(-1, 7)
+    # Se comprueba el rango antes de reducir a uint8
+    sort_draws(values[:, :5], values[:, 5:])
+    _check_draws(values[:, :5], values[:, 5:], dates)
+    return dates, values.astype(np.uint8)
+
+
+class _AppendBuffer:
+    """
+    Array con capacidad de reserva compartido por instantáneas sucesivas.
+
+    Cada DrawStore ve solo sus primeras filas, así que escribir a continuación
+    no altera las instantáneas anteriores. Si se añade a una instantánea que ya
+    no es la última (dos ramas desde el mismo estado), se copia.
+    """
+
+    def __init__(self, array):
+        self.data = array
+        self.length = len(array)
+        self._lock = threading.Lock()
+
+    def extend(self, current, rows):
+        """Retorna (buffer, vista) con `rows` a continuación de la vista `current`."""
+        length = len(current)
+        with self._lock:
+            if length != self.length:
+                branch = _AppendBuffer(current)
+                return branch.extend(current, rows)
+            needed = length + len(rows)
+            if needed > len(self.data):
+                # Crecimiento geométrico: el coste de copiar se amortiza
+                grown = np.empty((max(needed, 2 * len(self.data), 1024),) + self.data.shape[1:],
+                                 dtype=self.data.dtype)
+                grown[:length] = current
+                self.data = grown
+            self.data[length:needed] = rows
+            self.length = needed
+            return self, self.data[:needed]
+
+
+class _PositionIndex:
+    """
+    Índice invertido de un bombo: sorteos (posiciones) en que salió cada valor.
+
+    Las posiciones se guardan agrupadas por valor (formato CSR: `indptr` marca
+    dónde empieza cada grupo) junto con, para cada aparición, la racha que
+    termina en ella y los máximos acumulados de rachas y de huecos. Con eso el
+    estado de rachas de los k primeros sorteos sale de una búsqueda binaria por
+    valor, sin recorrer el histórico.
+    """
+
+    # Clave ordenada valor * STRIDE + posición; fija para que añadir sorteos
+    # no cambie las claves ya calculadas
+    STRIDE = 1 << 40
+
+    def __init__(self, occurrence):
+        occurrence = np.asarray(occurrence)
+        size = occurrence.shape[1]
+        self.rows = 0
+        self.indptr = np.zeros(size + 1, dtype=np.int64)
+        self.keys = self.positions = self.run = self.run_max = self.gap_max = np.empty(0, dtype=np.int64)
+        self._add(occurrence)
+
+    def _add(self, block):
+        """
+        Añade las apariciones de `block` (sorteos siguientes a los ya indexados).
+
+        Solo se calculan las apariciones nuevas, continuando la racha y los
+        máximos de la última aparición anterior de cada valor; después se
+        intercalan al final del grupo de su valor (una copia de los arrays).
+        """
+        values, positions = np.nonzero(block.T)
+        positions = positions + self.rows
+        size = len(self.indptr) - 1
+        counts = np.bincount(values, minlength=size)
+
+        # Última aparición ya indexada de cada valor: posición, racha y máximos
+        has_last = self.indptr[1:] > self.indptr[:-1]
+        last = np.maximum(self.indptr[1:] - 1, 0)
+        last_position = np.where(has_last, self.positions[last] if len(self.positions) else 0, -1)
+        last_run, last_run_max, last_gap_max = (
+            np.where(has_last, array[last] if len(array) else 0, 0)
+            for array in (self.run, self.run_max, self.gap_max))
+
+        # Primera aparición nueva de cada valor y posición de la aparición anterior
+        first = np.ones(len(positions), dtype=bool)
+        first[1:] = values[1:] != values[:-1]
+        previous = np.roll(positions, 1)
+        previous[first] = last_position[values[first]]
+
+        # Racha que termina en cada aparición; la primera puede continuar la anterior
+        broken = positions != previous + 1
+        segment = broken | first
+        starts = np.flatnonzero(segment)
+        carried = np.where(broken, 0, last_run[values])
+        start_of = starts[np.cumsum(segment) - 1]
+        run = np.arange(len(positions)) - start_of + 1 + carried[start_of]
+
+        # Hueco (sorteos sin salir) antes de cada aparición
+        gap = positions - previous - 1
+
+        # Máximos acumulados dentro de cada grupo (el desplazamiento por valor
+        # impide que el máximo de un grupo pase al siguiente), con los anteriores
+        offset = values * self.STRIDE
+        run_max = np.maximum(np.maximum.accumulate(run + offset) - offset, last_run_max[values])
+        gap_max = np.maximum(np.maximum.accumulate(gap + offset) - offset, last_gap_max[values])
+
+        # Cada aparición nueva va al final del grupo de su valor
+        where = np.repeat(self.indptr[1:], counts)
+        self.keys = np.insert(self.keys, where, values * self.STRIDE + positions)
+        self.positions = np.insert(self.positions, where, positions)
+        self.run = np.insert(self.run, where, run)
+        self.run_max = np.insert(self.run_max, where, run_max)
+        self.gap_max = np.insert(self.gap_max, where, gap_max)
+        self.indptr = self.indptr + np.concatenate([[0], np.cumsum(counts)])
+        self.rows += len(block)
+
+    def extend(self, block):
+        """Índice nuevo con los sorteos de `block` añadidos; este no cambia."""
+        extended = copy.copy(self)
+        extended._add(np.asarray(block))
+        return extended
+
+    def streaks(self, k):
+        """Estado de rachas (STREAK_ROWS x tamaño) de los k primeros sorteos."""
+        size = len(self.indptr) - 1
+        state = np.zeros((len(STREAK_ROWS), size), dtype=np.int64)
+        state[2:] = k
+        if not len(self.positions):
+            return state
+
+        # Última aparición anterior a k de cada valor (si la hay)
+        end = np.searchsorted(self.keys, np.arange(size) * self.STRIDE + k)
+        seen = end > self.indptr[:-1]
+        last = np.maximum(end - 1, 0)
+        last_position = np.where(seen, self.positions[last], -1)
+        absence = k - 1 - last_position
+
+        state[0] = np.where(seen, self.run_max[last], 0)
+        state[1] = np.where(seen & (last_position == k - 1), self.run[last], 0)
+        state[2] = np.maximum(np.where(seen, self.gap_max[last], 0), absence)
+        state[3] = absence
+        return state
+
+
+class DrawStore:
+    """
+    Representación numérica del histórico de sorteos.
+
+    Los sorteos se guardan en orden cronológico (el más antiguo primero) como
+    arrays NumPy compactos. Los índices derivados (matrices de aparición, sumas
+    acumuladas, hash del contenido) se construyen la primera vez que se usan,
+    de modo que cada consulta solo paga por lo que necesita.
+    """
+
+    def __init__(self, dates, numbers, stars):
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.numbers = np.asarray(numbers, dtype=np.uint8)
+        self.stars = np.asarray(stars, dtype=np.uint8)
+        # Descriptor del segmento de memoria compartida, si el almacén está publicado
+        self.shared = None
+        # Buffers con capacidad de reserva, compartidos con los almacenes de append()
+        self._buffers = {}
+        # (almacén completo, sorteos) si es una vista de as_of()
+        self._origin = None
+
+    @classmethod
+    def from_dataframe(cls, df):
+        """Crea el almacén a partir del DataFrame de DataLoader (más reciente primero)."""
+        df = df.iloc[::-1]
+        return cls(df['fecha'].to_numpy(dtype='datetime64[D]'),
+                   df[NUM_COLS].to_numpy(),
+                   df[STAR_COLS].to_numpy())
+
+    @classmethod
+    def from_csv(cls, filename):
+        """
+        Crea el almacén leyendo directamente el CSV de sorteos, sin pandas.
+
+        Sigue las mismas reglas que DataLoader: se descartan las filas con
+        campos vacíos o no numéricos y se ordena por fecha. Es la vía rápida de
+        los comandos que solo necesitan consultas numéricas. Admite archivos
+        comprimidos con gzip o zstd (ver draw_parser).
+        """
+        parsed = read_draws(filename)
+        dates, values = parsed.dates, parsed.values
+        if parsed.irregular:
+            extra_dates, extra_values = _parse_irregular(parsed.irregular)
+            dates = np.concatenate([dates, extra_dates])
+            values = np.concatenate([values, extra_values])
+
+        if not len(values):
+            raise ValueError(f"No hay sorteos válidos en {filename}")
+
+        numbers, stars = values[:, :5], values[:, 5:]
+        sort_draws(numbers, stars)
+        _check_draws(numbers, stars, dates)
+
+        # El CSV va del más reciente al más antiguo; solo se ordena si no lo está
+        if len(dates) > 1 and (dates[1:] > dates[:-1]).any():
+            order = np.argsort(dates, kind='stable')
+            return cls(dates[order], numbers[order], stars[order])
+        return cls(*(np.ascontiguousarray(a[::-1]) for a in (dates, numbers, stars)))
+
+    @classmethod
+    def load(cls, filename, mmap=True):
+        """Abre un histórico guardado con save() (por defecto como memory-map)."""
+        records = np.load(filename, mmap_mode='r' if mmap else None)
+        if records.dtype != BINARY_DTYPE:
+            raise ValueError(f"{filename} no tiene el formato binario del histórico")
+        return cls(records['fecha'], records['numeros'], records['estrellas'])
+
+    def save(self, filename):
+        """Guarda el histórico en el formato binario (.npy de registros)."""
+        records = np.lib.format.open_memmap(filename, mode='w+', dtype=BINARY_DTYPE,
+                                            shape=(len(self),))
+        records['fecha'] = self.dates
+        records['numeros'] = self.numbers
+        records['estrellas'] = self.stars
+        records.flush()
+        del records
+
+    def to_dataframe(self):
+        """DataFrame con el formato de DataLoader (el sorteo más reciente primero)."""
+        import pandas as pd
+        data = {'fecha': pd.to_datetime(self.dates[::-1])}
+        for i, col in enumerate(NUM_COLS):
+            data[col] = self.numbers[::-1, i]
+        for i, col in enumerate(STAR_COLS):
+            data[col] = self.stars[::-1, i]
+        return pd.DataFrame(data)
+
+    def append(self, dates, numbers, stars):
+        """
+        Retorna un DrawStore nuevo con los sorteos añadidos al final.
+
+        Los sorteos se validan como en la carga (rangos y duplicados) y no
+        pueden ser anteriores al último del histórico. Este almacén no cambia:
+        los dos comparten arrays con capacidad de reserva, y los índices
+        derivados ya construidos aquí se prolongan con las filas nuevas en vez
+        de recalcularse, así que el coste es proporcional a los sorteos
+        añadidos. La versión se encadena con la anterior, de modo que las
+        cachés indexadas por versión dejan de coincidir.
+        """
+        dates = np.asarray(dates, dtype='datetime64[D]').reshape(-1)
+        numbers = np.array(numbers, dtype=np.int64).reshape(-1, 5)
+        stars = np.array(stars, dtype=np.int64).reshape(-1, 2)
+        if not len(dates) == len(numbers) == len(stars):
+            raise ValueError("Debe haber una fecha, cinco números y dos estrellas por sorteo")
+        if not len(dates):
+            return self
+        if np.isnat(dates).any():
+            raise ValueError("Hay sorteos sin fecha válida")
+
+        order = np.argsort(dates, kind='stable')
+        dates, numbers, stars = dates[order], numbers[order], stars[order]
+        sort_draws(numbers, stars)
+        _check_draws(numbers, stars, dates)
+        if len(self) and dates[0] < self.dates[-1]:
+            raise ValueError(f"Los sorteos nuevos no pueden ser anteriores al último "
+                             f"del histórico ({self.dates[-1]})")
+        if len(self) and dates[0] == self.dates[-1]:
+            # Misma fecha que el último sorteo: solo se admite si no está ya
+            same_day = slice(np.searchsorted(self.dates, dates[0]), len(self))
+            existing = np.hstack([self.numbers[same_day], self.stars[same_day]])
+            new = np.hstack([numbers, stars])[dates == dates[0]]
+            if (existing[:, None, :] == new[None, :, :]).all(axis=2).any():
+                raise ValueError(f"El sorteo del {dates[0]} ya está en el histórico")
+        numbers, stars = numbers.astype(np.uint8), stars.astype(np.uint8)
+
+        updated = DrawStore.__new__(DrawStore)
+        updated.shared = None
+        updated._buffers = {}
+        updated._origin = None
+
+        def grow(field, current, rows):
+            buffer = self._buffers.get(field) or _AppendBuffer(current)
+            updated._buffers[field], view = buffer.extend(current, rows)
+            return view
+
+        updated.dates = grow('dates', self.dates, dates)
+        updated.numbers = grow('numbers', self.numbers, numbers)
+        updated.stars = grow('stars', self.stars, stars)
+
+        # Índices derivados: solo los que ya existen aquí; el resto se
+        # construirá cuando se pidan, como en cualquier almacén
+        built = self.__dict__
+        blocks = {'number_occurrence': self._occurrence(numbers, POOLS['numbers']),
+                  'star_occurrence': self._occurrence(stars, POOLS['stars'])}
+        for pool, occurrence in (('number', blocks['number_occurrence']),
+                                 ('star', blocks['star_occurrence'])):
+            if f'{pool}_prefix' in built:
+                last = built[f'{pool}_prefix'][-1]
+                blocks[f'{pool}_prefix'] = last + np.cumsum(occurrence, axis=0, dtype=np.int32)
+            if f'{pool}_ages' in built:
+                blocks[f'{pool}_ages'] = self._ages(occurrence, previous=built[f'{pool}_ages'][-1:])
+            if f'{pool}_streaks' in built:
+                updated.__dict__[f'{pool}_streaks'] = self._extend_streaks(built[f'{pool}_streaks'],
+                                                                           occurrence)
+        if 'features' in built:
+            blocks['features'] = self._features(numbers)
+        if 'masks' in built:
+            blocks['masks'] = self._masks(numbers, stars)
+        for field in ROW_INDEXES:
+            if field in built:
+                updated.__dict__[field] = grow(field, built[field], blocks[field])
+        for pool, occurrence in (('number', blocks['number_occurrence']),
+                                 ('star', blocks['star_occurrence'])):
+            if f'{pool}_positions' in built:
+                updated.__dict__[f'{pool}_positions'] = built[f'{pool}_positions'].extend(occurrence)
+        if 'number_pairs' in built:
+            updated.__dict__['number_pairs'] = built['number_pairs'] + self._pairs(blocks['number_occurrence'])
+
+        # La versión es la misma que daría recargar el histórico completo
+        hasher = self._hasher.copy()
+        _hash_rows(hasher, dates, numbers, stars)
+        updated.__dict__['_hasher'] = hasher
+        updated.__dict__['version'] = hasher.hexdigest()
+        return updated
+
+    def as_of(self, date):
+        """
+        Vista del histórico tal como estaba el día `date` (incluido).
+
+        No copia nada: fechas, sorteos, matrices de aparición, sumas acumuladas
+        y rasgos son cortes de los arrays de este almacén, y las rachas y
+        ausencias se obtienen de su índice invertido con una búsqueda binaria
+        por número. Los índices de este almacén se construyen una vez y los
+        comparten todas las vistas, así que cada consulta cuesta lo mismo que
+        sobre el histórico completo o menos.
+        """
+        count = int(np.searchsorted(self.dates, np.datetime64(date, 'D'), side='right'))
+        if count == len(self):
+            return self
+        root = self._origin[0] if self._origin is not None else self
+
+        view = DrawStore(root.dates[:count], root.numbers[:count], root.stars[:count])
+        view._origin = (root, count)
+        return view
+
+    def _from_origin(self, field):
+        """Índice `field` de una vista de as_of() como corte del almacén completo, o None."""
+        if self._origin is None:
+            return None
+        root, count = self._origin
+        index = getattr(root, field)
+        return index[:count + 1] if field.endswith('_prefix') else index[:count]
+
+    def __getstate__(self):
+        # Los buffers de append() (con su lock) y el estado del hash no viajan;
+        # una vista de as_of() viaja sin el almacén completo
+        state = self.__dict__.copy()
+        state['_buffers'] = {}
+        state['_origin'] = None
+        state.pop('_hasher', None)
+        return state
+
+    def __reduce_ex__(self, protocol):
+        # Publicado en memoria compartida, viaja como su descriptor y el
+        # proceso que lo recibe se adjunta al segmento sin copiar los arrays
+        if self.shared is not None:
+            from .shared_store import attach
+            return attach, (self.shared,)
+        return super().__reduce_ex__(protocol)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def pool(self, name):
+        """Retorna (matriz de sorteos, tamaño del bombo) para 'numbers' o 'stars'."""
+        if name not in POOLS:
+            raise ValueError(f"Bombo desconocido: {name}")
+        return (self.numbers if name == 'numbers' else self.stars), POOLS[name]
+
+    @cached_property
+    def number_occurrence(self):
+        """Matriz booleana (sorteos x 50): True si el número salió en el sorteo."""
+        view = self._from_origin('number_occurrence')
+        return self._occurrence(self.numbers, POOLS['numbers']) if view is None else view
+
+    @cached_property
+    def star_occurrence(self):
+        """Matriz booleana (sorteos x 12): True si la estrella salió en el sorteo."""
+        view = self._from_origin('star_occurrence')
+        return self._occurrence(self.stars, POOLS['stars']) if view is None else view
+
+    @cached_property
+    def number_prefix(self):
+        """Apariciones acumuladas de cada número: fila i = conteo en los i primeros sorteos."""
+        view = self._from_origin('number_prefix')
+        return self._prefix(self.number_occurrence) if view is None else view
+
+    @cached_property
+    def star_prefix(self):
+        """Apariciones acumuladas de cada estrella."""
+        view = self._from_origin('star_prefix')
+        return self._prefix(self.star_occurrence) if view is None else view
+
+    @cached_property
+    def number_streaks(self):
+        """Estado de rachas de cada número: matriz (STREAK_ROWS x 50)."""
+        if self._origin is not None:
+            return self._origin[0].number_positions.streaks(self._origin[1])
+        return self._streaks(self.number_occurrence)
+
+    @cached_property
+    def star_streaks(self):
+        """Estado de rachas de cada estrella: matriz (STREAK_ROWS x 12)."""
+        if self._origin is not None:
+            return self._origin[0].star_positions.streaks(self._origin[1])
+        return self._streaks(self.star_occurrence)
+
+    @cached_property
+    def number_ages(self):
+        """Edades (sorteos x 50, uint16): sorteos desde la última aparición de cada número."""
+        view = self._from_origin('number_ages')
+        return self._ages(self.number_occurrence) if view is None else view
+
+    @cached_property
+    def star_ages(self):
+        """Edades (sorteos x 12, uint16) de cada estrella."""
+        view = self._from_origin('star_ages')
+        return self._ages(self.star_occurrence) if view is None else view
+
+    @cached_property
+    def number_pairs(self):
+        """Co-apariciones: matriz 50x50 con los sorteos en que salieron juntos cada par de números."""
+        return self._pairs(self.number_occurrence)
+
+    @cached_property
+    def features(self):
+        """Rasgos de cada sorteo (FEATURE_COLUMNS), en orden cronológico."""
+        view = self._from_origin('features')
+        return self._features(self.numbers) if view is None else view
+
+    @cached_property
+    def masks(self):
+        """
+        Cada sorteo como máscara de bits uint64: el número n es el bit n - 1 y
+        la estrella e, el bit STAR_SHIFT + e - 1.
+        """
+        view = self._from_origin('masks')
+        return self._masks(self.numbers, self.stars) if view is None else view
+
+    @cached_property
+    def number_positions(self):
+        """Índice invertido de los números (sorteos en que salió cada uno)."""
+        return _PositionIndex(self.number_occurrence)
+
+    @cached_property
+    def star_positions(self):
+        """Índice invertido de las estrellas."""
+        return _PositionIndex(self.star_occurrence)
+
+    @cached_property
+    def version(self):
+        """Hash del contenido; cambia si cambia cualquier sorteo."""
+        return self._hasher.hexdigest()
+
+    @cached_property
+    def _hasher(self):
+        # Se conserva el estado del hash para que append() lo continúe
+        hasher = hashlib.blake2b(digest_size=16)
+        _hash_rows(hasher, self.dates, self.numbers, self.stars)
+        return hasher
+
+    def occurrence(self, pool):
+        return self.number_occurrence if pool == 'numbers' else self.star_occurrence
+
+    def prefix(self, pool):
+        return self.number_prefix if pool == 'numbers' else self.star_prefix
+
+    def streaks(self, pool):
+        return self.number_streaks if pool == 'numbers' else self.star_streaks
+
+    def ages(self, pool):
+        return self.number_ages if pool == 'numbers' else self.star_ages
+
+    def frequencies(self, pool='numbers', last=None):
+        """
+        Apariciones de cada número (o estrella) en los últimos `last` sorteos.
+
+        Con `last=None` se cuenta todo el histórico. El resultado es un array
+        indexado desde 0 (posición 0 = número 1).
+        """
+        prefix = self.prefix(pool)
+        total = len(self)
+        last = total if last is None else min(last, total)
+        return prefix[total] - prefix[total - last]
+
+    @staticmethod
+    def _occurrence(draws, size):
+        occurrence = np.zeros((len(draws), size), dtype=bool)
+        rows = np.repeat(np.arange(len(draws)), draws.shape[1])
+        occurrence[rows, draws.ravel().astype(np.intp) - 1] = True
+        return occurrence
+
+    @staticmethod
+    def _prefix(occurrence):
+        prefix = np.zeros((len(occurrence) + 1, occurrence.shape[1]), dtype=np.int32)
+        np.cumsum(occurrence, axis=0, out=prefix[1:])
+        return prefix
+
+    @staticmethod
+    def _ages(occurrence, previous=None, chunk_size=1 << 14):
+        """
+        Sorteos transcurridos desde la última aparición, en cada sorteo.
+
+        La fila i vale 0 para los valores que salieron en el sorteo i y, para
+        los que aún no han salido, i + 1 (los sorteos desde el comienzo). Se
+        calcula en una pasada hacia delante por bloques, arrastrando la última
+        fila; `previous` es la fila anterior al primer sorteo cuando se
+        prolonga un histórico. Los valores se saturan en MAX_AGE.
+        """
+        ages = np.empty(occurrence.shape, dtype=np.uint16)
+        carry = np.zeros(occurrence.shape[1], dtype=np.int64)
+        if previous is not None and len(previous):
+            carry = np.asarray(previous, dtype=np.int64).reshape(-1)
+        for start in range(0, len(occurrence), chunk_size):
+            block = occurrence[start:start + chunk_size]
+            steps = np.arange(1, len(block) + 1, dtype=np.int64)[:, None]
+            # Paso (1..len) de la última aparición dentro del bloque; 0 si no salió
+            last = np.maximum.accumulate(np.where(block, steps, 0), axis=0)
+            age = np.where(last > 0, steps - last, carry + steps)
+            np.minimum(age, MAX_AGE, out=age)
+            ages[start:start + len(block)] = age
+            carry = age[-1]
+        return ages
+
+    @staticmethod
+    def _streaks(occurrence):
+        max_streak, current_streak = runs(occurrence)
+        max_absence, current_absence = runs(~occurrence)
+        return np.stack([max_streak, current_streak, max_absence, current_absence])
+
+    @staticmethod
+    def _extend_streaks(state, occurrence):
+        max_streak, current_streak = _extend_runs(state[0], state[1], occurrence)
+        max_absence, current_absence = _extend_runs(state[2], state[3], ~occurrence)
+        return np.stack([max_streak, current_streak, max_absence, current_absence])
+
+    @staticmethod
+    def _pairs(occurrence, chunk_size=1 << 20):
+        # Producto matricial en float32 por bloques: cada bloque cuenta como
+        # mucho 2^20 sorteos, muy por debajo de la precisión exacta (2^24)
+        pairs = np.zeros((occurrence.shape[1], occurrence.shape[1]), dtype=np.int64)
+        for start in range(0, len(occurrence), chunk_size):
+            block = occurrence[start:start + chunk_size].astype(np.float32)
+            pairs += np.rint(block.T @ block).astype(np.int64)
+        return pairs
+
+    @staticmethod
+    def _masks(numbers, stars):
+        one = np.uint64(1)
+        masks = np.zeros(len(numbers), dtype=np.uint64)
+        for values, shift in ((numbers, 0), (stars, STAR_SHIFT)):
+            for column in range(values.shape[1]):
+                masks |= one << (values[:, column].astype(np.uint64) + np.uint64(shift) - one)
+        return masks
+
+    @staticmethod
+    def _features(numbers):
+        ordered = np.sort(numbers.astype(np.int16), axis=1)
+        decades = (ordered - 1) // 10
+        return np.stack([
+            (ordered % 2 == 0).sum(axis=1),
+            1 + (np.diff(decades, axis=1) != 0).sum(axis=1),
+            ordered.sum(axis=1),
+            (np.diff(ordered, axis=1) == 1).sum(axis=1)
+        ], axis=1).astype(np.int16)
+
+
+def _append_binary(filename, store, count):
+    """Añade los `count` últimos sorteos de `store` al final de un .npy de registros."""
+    records = np.empty(count, dtype=BINARY_DTYPE)
+    records['fecha'] = store.dates[-count:]
+    records['numeros'] = store.numbers[-count:]
+    records['estrellas'] = store.stars[-count:]
+
+    fmt = np.lib.format
+    with open(filename, 'r+b') as f:
+        version = fmt.read_magic(f)
+        read_header, write_header = ((fmt.read_array_header_1_0, fmt.write_array_header_1_0)
+                                     if version == (1, 0) else
+                                     (fmt.read_array_header_2_0, fmt.write_array_header_2_0))
+        shape, fortran, dtype = read_header(f)
+        data_offset = f.tell()
+        header = io.BytesIO()
+        write_header(header, {'descr': fmt.dtype_to_descr(dtype), 'fortran_order': fortran,
+                              'shape': (shape[0] + count,)})
+        # La cabecera se rellena hasta un múltiplo de 64 bytes, así que cambiar
+        # el número de filas casi nunca cambia su longitud
+        if fmt.MAGIC_LEN + len(header.getvalue()) == data_offset:
+            f.seek(0, os.SEEK_END)
+            f.write(records.tobytes())
+            f.seek(fmt.MAGIC_LEN)
+            f.write(header.getvalue())
+            return
+
+    # La cabecera creció: se reescribe el archivo entero
+    store.save(filename + '.tmp')
+    os.replace(filename + '.tmp', filename)
+
+
+def _append_csv(filename, dates, numbers, stars):
+    """Reescribe el CSV con los sorteos nuevos encima (el más reciente primero)."""
+    with open(filename, 'rb') as f:
+        if f.read(4).startswith((GZIP_MAGIC, ZSTD_MAGIC)):
+            raise ValueError("No se puede añadir a un CSV comprimido; descomprímelo antes")
+        f.seek(0)
+        header = f.readline()
+        rows = encode_rows(dates[::-1], numbers[::-1], stars[::-1])
+        temporary = filename + '.tmp'
+        with open(temporary, 'wb') as out:
+            out.write(header if header.endswith(b'\n') else header + b'\r\n')
+            out.write(rows.tobytes())
+            shutil.copyfileobj(f, out)
+    os.replace(temporary, filename)
+
+
+def append_draws(filename, dates, numbers, stars, store=None):
+    """
+    Añade sorteos al histórico guardado en `filename` (CSV o .npy).
+
+    Con `store` (el almacén ya cargado de ese archivo) no se vuelve a leer
+    nada: los sorteos se validan con DrawStore.append y se escriben solo los
+    nuevos. En un .npy se añaden al final y se actualiza la cabecera; en el
+    CSV, que va del más reciente al más antiguo, se escriben encima del
+    contenido anterior. Retorna el DrawStore actualizado.
+    """
+    if store is None:
+        binary = filename.lower().endswith('.npy')
+        store = DrawStore.load(filename) if binary else DrawStore.from_csv(filename)
+    updated = store.append(dates, numbers, stars)
+    count = len(updated) - len(store)
+    if not count:
+        return updated
+
+    if filename.lower().endswith('.npy'):
+        _append_binary(filename, updated, count)
+    else:
+        _append_csv(filename, updated.dates[-count:], updated.numbers[-count:], updated.stars[-count:])
+    return updated
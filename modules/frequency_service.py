@@ -0,0 +1,124 @@
+"""
+Frecuencias de números y estrellas compartidas por los analizadores.
+
+Predictor, CombinationGenerator, Statistics y DataAnalyzer piden las mismas
+frecuencias (todo el histórico, los últimos N sorteos o un rango de fechas)
+muchas veces en una sesión. FrequencyService las calcula una vez y las guarda
+en una caché LRU limitada en memoria, indexada por (versión del histórico,
+bombo, ventana, rango de fechas). Como la versión cambia con el contenido, al
+recargar los datos las entradas antiguas dejan de pedirse y se expulsan solas;
+`invalidate` las libera de inmediato.
+
+    freq = frequency_service.get_service().counts(snapshot, 'numbers', window=20)
+
+El resultado es el mismo que daba `pd.Series(valores).value_counts()` al
+recorrer las columnas en orden (n1 entera, luego n2...): de más a menos
+frecuente y, en caso de empate, por orden de primera aparición. Se comparte
+entre llamadas, así que no debe modificarse.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+POOLS = {
+    'numbers': ['n1', 'n2', 'n3', 'n4', 'n5'],
+    'stars': ['e1', 'e2']
+}
+DEFAULT_MAX_BYTES = 8 * 1024 * 1024
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def _timestamp(value):
+    return None if value is None else pd.Timestamp(value)
+
+
+class FrequencyService:
+    """Caché LRU de frecuencias limitada por memoria."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def counts(self, snapshot, pool='numbers', window=None, start=None, end=None):
+        """
+        Apariciones de cada número (o estrella) en `snapshot`.
+
+        `window` limita a los últimos N sorteos y `start`/`end` a un rango de
+        fechas (ambos incluidos); se pueden combinar.
+        """
+        if pool not in POOLS:
+            raise ValueError(f"Bombo desconocido: {pool}")
+        if window is not None and window >= len(snapshot):
+            window = None
+        start, end = _timestamp(start), _timestamp(end)
+        key = (snapshot.store.version, pool, window, start, end)
+
+        with self._lock:
+            freq = self.entries.get(key)
+            if freq is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return freq
+            self.misses += 1
+
+        freq = self._count(snapshot.df, POOLS[pool], window, start, end)
+        self._put(key, freq)
+        return freq
+
+    @staticmethod
+    def _count(df, columns, window, start, end):
+        if window is not None:
+            df = df.head(window)
+        if start is not None or end is not None:
+            mask = np.ones(len(df), dtype=bool)
+            if start is not None:
+                mask &= (df['fecha'] >= start).to_numpy()
+            if end is not None:
+                mask &= (df['fecha'] <= end).to_numpy()
+            df = df[mask]
+        # Columna a columna, como al concatenar df['n1'], df['n2']...
+        values = df[columns].to_numpy(dtype=np.int64).T.ravel()
+        return pd.Series(values).value_counts()
+
+    def _put(self, key, freq):
+        size = int(freq.memory_usage(deep=True))
+        with self._lock:
+            if key in self.entries:
+                return
+            self.entries[key] = freq
+            self.size += size
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _, old = self.entries.popitem(last=False)
+                self.size -= int(old.memory_usage(deep=True))
+
+    def invalidate(self, version=None):
+        """Descarta las entradas de `version` (o todas)."""
+        with self._lock:
+            for key in [k for k in self.entries if version is None or k[0] == version]:
+                self.size -= int(self.entries.pop(key).memory_usage(deep=True))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entradas': len(self.entries),
+            'aciertos': self.hits,
+            'fallos': self.misses,
+            'tasa_aciertos': round(self.hits / total * 100, 2) if total else 0.0
+        }
+
+
+def get_service():
+    """Servicio de frecuencias del proceso."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = FrequencyService()
+        return _service
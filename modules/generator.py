@@ -1,12 +1,17 @@
-import pandas as pd
 import numpy as np
 from tabulate import tabulate
 import random
 from datetime import datetime
+from .combinatorics import sample_combinations
+from .frequency_service import get_service
+from .snapshot import DrawSnapshot
 
 class CombinationGenerator:
     def __init__(self, df):
-        self.df = df
+        # Instantánea de solo lectura: acepta un DataFrame o una DrawSnapshot compartida
+        self.snapshot = DrawSnapshot.of(df)
+        self.df = self.snapshot.df
+        self.frequencies = get_service()
         self.numeros_posibles = list(range(1, 51))
         self.estrellas_posibles = list(range(1, 13))
 
@@ -15,10 +20,7 @@ class CombinationGenerator:
         print("\n📊 GENERANDO COMBINACIÓN ESTADÍSTICA")
         
         # Calcular frecuencias
-        numeros = []
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            numeros.extend(self.df[col].tolist())
-        freq = pd.Series(numeros).value_counts()
+        freq = self.frequencies.counts(self.snapshot, 'numbers')
         
         # Normalizar frecuencias como pesos
         weights = [freq.get(n, 0) + 1 for n in self.numeros_posibles]  # +1 para evitar peso 0
@@ -37,10 +39,7 @@ class CombinationGenerator:
                     pesos.pop(idx)
             
             # Generar estrellas
-            estrellas = []
-            for col in ['e1', 'e2']:
-                estrellas.extend(self.df[col].tolist())
-            freq_estrellas = pd.Series(estrellas).value_counts()
+            freq_estrellas = self.frequencies.counts(self.snapshot, 'stars')
             pesos_estrellas = [freq_estrellas.get(n, 0) + 1 for n in self.estrellas_posibles]
             
             estrellas_seleccionadas = random.choices(self.estrellas_posibles, 
@@ -61,36 +60,16 @@ class CombinationGenerator:
         """Genera combinaciones equilibradas basadas en patrones."""
         print("\n⚖️ GENERANDO COMBINACIÓN EQUILIBRADA")
         
-        def is_balanced(numbers):
-            # Verificar paridad
-            pares = sum(1 for n in numbers if n % 2 == 0)
-            if not 2 <= pares <= 3:
-                return False
-            
-            # Verificar distribución por decenas
-            decenas = [(n-1)//10 for n in numbers]
-            if len(set(decenas)) < 3:
-                return False
-            
-            # Verificar suma total
-            suma = sum(numbers)
-            if not 100 <= suma <= 150:
-                return False
-            
-            # Verificar distancia entre números
-            numbers = sorted(numbers)
-            for i in range(len(numbers)-1):
-                if numbers[i+1] - numbers[i] <= 1:  # Evitar consecutivos
-                    return False
-            
-            return True
+        # Se sortean rangos de combinación y se filtran por bloques con las
+        # reglas de equilibrio vectorizadas, en lugar de probar de una en una.
+        # La semilla sale de `random`, así que random.seed() también fija estas
+        rng = np.random.default_rng(random.getrandbits(64))
+        muestras = sample_combinations(self.numeros_posibles, 5, num_combinations,
+                                       predicate=self._balanced_mask, rng=rng)
 
         combinaciones = []
-        for _ in range(num_combinations):
-            while True:
-                numeros = sorted(random.sample(self.numeros_posibles, 5))
-                if is_balanced(numeros):
-                    break
+        for muestra in muestras:
+            numeros = [int(n) for n in muestra]
             
             # Generar estrellas (una par y una impar)
             estrellas = []
@@ -116,6 +95,18 @@ class CombinationGenerator:
         
         return combinaciones
 
+    @staticmethod
+    def _balanced_mask(combos):
+        """Reglas de equilibrio aplicadas a un bloque de combinaciones ordenadas."""
+        pares = (combos % 2 == 0).sum(axis=1)
+        decenas = (combos - 1) // 10
+        decenas_distintas = 1 + (np.diff(decenas, axis=1) != 0).sum(axis=1)
+        suma = combos.sum(axis=1)
+        # Evitar consecutivos
+        separados = (np.diff(combos, axis=1) > 1).all(axis=1)
+        return ((pares >= 2) & (pares <= 3) & (decenas_distintas >= 3) &
+                (suma >= 100) & (suma <= 150) & separados)
+
     def generate_custom(self, forced_numbers=None, forbidden_numbers=None, num_combinations=1):
         """Genera combinaciones con restricciones personalizadas."""
         print("\n🎯 GENERANDO COMBINACIÓN PERSONALIZADA")
@@ -156,17 +147,10 @@ class CombinationGenerator:
         print("\n🧠 GENERANDO COMBINACIÓN INTELIGENTE")
         
         # Obtener números calientes (frecuentes recientemente)
-        ultimos_sorteos = self.df.head(20)
-        numeros_recientes = []
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            numeros_recientes.extend(ultimos_sorteos[col].tolist())
-        freq_reciente = pd.Series(numeros_recientes).value_counts()
+        freq_reciente = self.frequencies.counts(self.snapshot, 'numbers', window=20)
         
         # Obtener números históricos
-        numeros_historicos = []
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            numeros_historicos.extend(self.df[col].tolist())
-        freq_historica = pd.Series(numeros_historicos).value_counts()
+        freq_historica = self.frequencies.counts(self.snapshot, 'numbers')
         
         combinaciones = []
         for i in range(num_combinations):
@@ -192,10 +176,7 @@ class CombinationGenerator:
                     numeros.append(nuevo)
             
             # Generar estrellas inteligentemente
-            estrellas_hist = []
-            for col in ['e1', 'e2']:
-                estrellas_hist.extend(self.df[col].tolist())
-            freq_estrellas = pd.Series(estrellas_hist).value_counts()
+            freq_estrellas = self.frequencies.counts(self.snapshot, 'stars')
             
             # Una estrella frecuente, una menos frecuente
             estrellas = [
@@ -234,10 +215,7 @@ class CombinationGenerator:
             score = 0
             
             # Factor de frecuencia histórica
-            numeros_hist = []
-            for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-                numeros_hist.extend(self.df[col].tolist())
-            freq_hist = pd.Series(numeros_hist).value_counts()
+            freq_hist = self.frequencies.counts(self.snapshot, 'numbers')
             
             freq_score = sum(freq_hist.get(n, 0)/len(self.df)*20 for n in comb['numeros'])
             score += freq_score
@@ -2,16 +2,20 @@ import os
 import sys
 import json
 from datetime import datetime, timedelta
-import pandas as pd
 import numpy as np
 from tabulate import tabulate
 import random
+from .combinatorics import iter_combination_chunks
 
 class Helpers:
     @staticmethod
     def clear_screen():
         """Limpia la pantalla de la consola."""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        if os.name == 'nt':
+            os.system('cls')
+        else:
+            # Secuencia ANSI: evita lanzar un proceso 'clear' en cada menú
+            print('\033[2J\033[H', end='', flush=True)
 
     @staticmethod
     def format_number(number, decimals=2):
@@ -190,25 +194,18 @@ class Helpers:
     @staticmethod
     def get_combinations(numbers, r):
         """Genera todas las combinaciones posibles de r elementos."""
-        def combinations_helper(arr, r):
-            if r == 0:
-                return [[]]
-            if len(arr) < r:
-                return []
-            
-            result = []
-            # Incluir el primer elemento
-            first = arr[0]
-            rest = arr[1:]
-            com_with_first = combinations_helper(rest, r-1)
-            for com in com_with_first:
-                result.append([first] + com)
-            
-            # No incluir el primer elemento
-            result.extend(combinations_helper(rest, r))
-            return result
-        
-        return combinations_helper(sorted(numbers), r)
+        return [combo for _, chunk in Helpers.iter_combinations(numbers, r)
+                for combo in chunk.tolist()]
+
+    @staticmethod
+    def iter_combinations(numbers, r, chunk_size=100000, start=0, stop=None, predicate=None):
+        """
+        Recorre las combinaciones de r elementos por bloques NumPy.
+
+        Genera tuplas (rangos, combinaciones); ver combinatorics.iter_combination_chunks.
+        """
+        return iter_combination_chunks(sorted(numbers), r, chunk_size=chunk_size,
+                                       start=start, stop=stop, predicate=predicate)
 
     @staticmethod
     def analyze_sequence(numbers):
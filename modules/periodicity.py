@@ -0,0 +1,196 @@
+"""
+Búsqueda de periodicidades en la aparición de números y estrellas.
+
+Cada valor es una serie temporal: 1 en los sorteos en que sale y 0 en los
+demás, menos la probabilidad de salir en ese sorteo (5/50 para los números y
+2/n para las estrellas, con n el bombo de cada etapa, ver star_eras). Las 50 +
+12 series se analizan a la vez, como columnas de una sola matriz:
+
+- el periodograma (np.fft.rfft sobre todas las columnas) da la potencia de
+  cada periodo, normalizada por la varianza de la serie (1 de media en una
+  serie sin estructura); el periodo dominante es el de más potencia entre
+  MIN_PERIOD y `max_period` sorteos;
+- la autocorrelación sale del mismo espectro (teorema de Wiener-Khinchin).
+
+La significación se mide contra una hipótesis nula de permutaciones: si el
+orden de los sorteos no importa, barajarlos no cambia nada. En cada réplica se
+barajan los sorteos (los mismos para todas las columnas) y se guarda la
+potencia máxima de cada columna en la banda, así que el p-valor ya tiene en
+cuenta que se busca el máximo entre cientos de periodos. Las permutaciones se
+generan en lotes vectorizados (una matriz réplicas x sorteos) y los bloques de
+réplicas se reparten entre varios procesos, que leen el histórico de memoria
+compartida (shared_store); las semillas salen de SeedSequence.spawn, así que
+el resultado no depende del número de procesos. Como se prueban 62 series, el
+p-valor se ajusta además por Benjamini-Hochberg.
+
+    tablas = scan(store, permutations=1000, seed=0)
+    tablas['numbers'][0]   # el número con la periodicidad más marcada
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import star_eras
+from .shared_store import SharedDrawStore
+from .survival import POOL_LABELS
+
+DEFAULT_PERMUTATIONS = 1000
+# Réplicas por tarea: el reparto entre procesos no cambia los números aleatorios
+PERMUTATION_CHUNK = 100
+# Celdas (réplicas x sorteos x series) por lote de FFT: unos 32 MB en float64
+BATCH_CELLS = 1 << 22
+MIN_PERIOD = 2
+ALPHA = 0.05
+
+
+def residual_series(store, eras=None):
+    """
+    Matriz (sorteos x 62) de apariciones menos su probabilidad en cada sorteo.
+
+    Las 50 primeras columnas son los números y las 12 siguientes las
+    estrellas; en las etapas en que una estrella no estaba en el bombo su
+    columna vale 0.
+    """
+    numbers = store.number_occurrence.astype(np.float64) - 5 / store.number_occurrence.shape[1]
+    stars = store.star_occurrence.astype(np.float64)
+    values = np.arange(1, stars.shape[1] + 1)
+    for era in star_eras.resolve_eras(store, eras):
+        in_pool = values <= era.size
+        stars[era.start:era.end] -= in_pool * (star_eras.STARS_PER_DRAW / era.size)
+    return np.hstack([numbers, stars])
+
+
+def band(draws, max_period=None):
+    """Frecuencias (índices de rfft) de los periodos entre MIN_PERIOD y `max_period` sorteos."""
+    max_period = max_period or draws // 4
+    first = max(1, int(np.ceil(draws / max_period)))
+    last = draws // MIN_PERIOD
+    if first > last:
+        raise ValueError(f"No hay periodos entre {MIN_PERIOD} y {max_period} sorteos en {draws} sorteos")
+    return first, last
+
+
+def _power(series, first, last, axis=0):
+    """Potencia de las frecuencias [first, last] relativa a la varianza de cada serie."""
+    draws = series.shape[axis]
+    spectrum = np.fft.rfft(series, axis=axis)
+    spectrum = np.take(spectrum, np.arange(first, last + 1), axis=axis)
+    variance = series.var(axis=axis, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.abs(spectrum) ** 2 / (draws * variance)
+
+
+def autocorrelation(series, max_lag):
+    """Autocorrelación de cada columna hasta `max_lag`, por FFT."""
+    draws = len(series)
+    centered = series - series.mean(axis=0)
+    size = 1 << int(np.ceil(np.log2(2 * draws)))
+    spectrum = np.fft.rfft(centered, size, axis=0)
+    covariance = np.fft.irfft(np.abs(spectrum) ** 2, size, axis=0)[:max_lag + 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return covariance / covariance[0]
+
+
+def _null_maxima(store, eras, seed, replicas, first, last):
+    """Potencia máxima de cada serie en la banda para `replicas` permutaciones de los sorteos."""
+    series = residual_series(store, eras)
+    draws, columns = series.shape
+    rng = np.random.default_rng(seed)
+    batch = max(1, BATCH_CELLS // (draws * columns))
+    maxima = []
+    for start in range(0, replicas, batch):
+        size = min(batch, replicas - start)
+        order = rng.permuted(np.broadcast_to(np.arange(draws), (size, draws)), axis=1)
+        maxima.append(_power(series[order], first, last, axis=1).max(axis=1))
+    return np.concatenate(maxima)
+
+
+def null_maxima(store, eras, permutations=DEFAULT_PERMUTATIONS, seed=0, max_period=None, workers=None):
+    """Matriz (réplicas x 62) de potencias máximas bajo la hipótesis nula de permutaciones."""
+    first, last = band(len(store), max_period)
+    chunks = [min(PERMUTATION_CHUNK, permutations - start)
+              for start in range(0, permutations, PERMUTATION_CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers <= 1:
+        parts = [_null_maxima(store, eras, s, replicas, first, last) for s, replicas in zip(seeds, chunks)]
+    else:
+        with SharedDrawStore(store) as shared, ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_null_maxima, shared.store, eras, s, replicas, first, last)
+                       for s, replicas in zip(seeds, chunks)]
+            parts = [future.result() for future in futures]
+    columns = store.number_occurrence.shape[1] + store.star_occurrence.shape[1]
+    return np.concatenate(parts) if parts else np.empty((0, columns))
+
+
+def _adjusted(p_values):
+    """P-valores ajustados por Benjamini-Hochberg."""
+    order = np.argsort(p_values)
+    scaled = p_values[order] * len(p_values) / np.arange(1, len(p_values) + 1)
+    adjusted = np.empty_like(p_values)
+    adjusted[order] = np.minimum(np.minimum.accumulate(scaled[::-1])[::-1], 1)
+    return adjusted
+
+
+def _round(value, digits=4):
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def scan(store, permutations=DEFAULT_PERMUTATIONS, seed=0, max_period=None, workers=None, eras=None):
+    """
+    Periodo dominante de cada número y estrella y su significación.
+
+    Retorna {'numbers': filas, 'stars': filas}, de la periodicidad más a la
+    menos marcada (menor p-valor y, a igualdad, mayor potencia). Cada fila
+    tiene el periodo dominante en sorteos y en días (con el ritmo medio de
+    sorteos del histórico), su potencia relativa, el umbral del 95 % de la
+    nula, los p-valores (sin ajustar y ajustado), la autocorrelación en ese
+    retardo y el retardo de autocorrelación más fuerte.
+    """
+    draws = len(store)
+    first, last = band(draws, max_period)
+    max_period = max_period or draws // 4
+    resolved = star_eras.resolve_eras(store, eras)
+    eras = [(era.date, era.size) for era in resolved]
+
+    series = residual_series(store, eras)
+    power = _power(series, first, last)
+    peak = power.argmax(axis=0)
+    observed = power.max(axis=0)
+    periods = draws / (first + peak)
+
+    nulls = null_maxima(store, eras, permutations, seed, max_period, workers)
+    p_values = (1 + (nulls >= observed).sum(axis=0)) / (len(nulls) + 1)
+    # Series constantes (sin varianza): nada que detectar
+    p_values[~np.isfinite(observed)] = 1
+    adjusted = _adjusted(p_values)
+    threshold = np.quantile(nulls, 0.95, axis=0) if len(nulls) else np.full(len(observed), np.nan)
+
+    max_lag = min(int(max_period), draws - 1)
+    acf = autocorrelation(series, max_lag)
+    strongest = np.abs(acf[1:]).argmax(axis=0) + 1
+    days = (store.dates[-1] - store.dates[0]).astype('timedelta64[D]').astype(np.int64) / max(draws - 1, 1)
+
+    tables = {}
+    size = store.number_occurrence.shape[1]
+    for pool, columns in (('numbers', range(size)), ('stars', range(size, series.shape[1]))):
+        rows = []
+        for value, c in enumerate(columns, 1):
+            lag = int(round(periods[c]))
+            rows.append({
+                POOL_LABELS[pool]: value,
+                'periodo': _round(periods[c], 2),
+                'periodo_dias': _round(periods[c] * days, 1),
+                'potencia': _round(observed[c], 2),
+                'umbral': _round(threshold[c], 2),
+                'p_valor': _round(p_values[c]),
+                'p_ajustado': _round(adjusted[c]),
+                'significativo': bool(adjusted[c] < ALPHA),
+                'autocorrelacion': _round(acf[lag, c]) if lag <= max_lag else None,
+                'retardo_max': int(strongest[c]),
+                'autocorrelacion_max': _round(acf[strongest[c], c])
+            })
+        rows.sort(key=lambda r: (r['p_valor'], -(r['potencia'] or 0)))
+        tables[pool] = rows
+    return tables
@@ -3,9 +3,15 @@ import numpy as np
 from tabulate import tabulate
 from datetime import datetime, timedelta
 
+from .frequency_service import get_service
+from .snapshot import DrawSnapshot
+
 class Predictor:
     def __init__(self, df):
-        self.df = df
+        # Instantánea de solo lectura: acepta un DataFrame o una DrawSnapshot compartida
+        self.snapshot = DrawSnapshot.of(df)
+        self.df = self.snapshot.df
+        self.frequencies = get_service()
 
     def get_hot_numbers(self):
         print("\n🔥 NÚMEROS CALIENTES")
@@ -16,19 +22,11 @@ class Predictor:
         for range_size, label in zip(ranges, labels):
             print(f"\n{label.capitalize()}:")
             
-            # Seleccionar el rango de sorteos
-            df_range = self.df.head(range_size)
-            
             # Contar frecuencias
-            numeros = []
-            for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-                numeros.extend(df_range[col].tolist())
-            
-            freq = pd.Series(numeros).value_counts()
-            total_apariciones = len(numeros)
+            freq = self.frequencies.counts(self.snapshot, 'numbers', window=range_size)
             
             # Calcular tendencias
-            freq_total = pd.Series(self.df[['n1', 'n2', 'n3', 'n4', 'n5']].values.ravel()).value_counts()
+            freq_total = self.frequencies.counts(self.snapshot, 'numbers')
             
             # Preparar resultados
             resultados = []
@@ -53,25 +51,20 @@ class Predictor:
         """Analiza números que llevan mucho tiempo sin salir."""
         print("\n❄️ NÚMEROS FRÍOS")
         
+        # Sorteos desde la última aparición de cada número (última fila de las edades)
+        sin_salir = self.snapshot.store.number_ages[-1]
+        
         ranges = [20, 50, 100, len(self.df)]
         labels = ["últimos 20 sorteos", "últimos 50 sorteos", "últimos 100 sorteos", "toda la serie histórica"]
         
         for range_size, label in zip(ranges, labels):
             print(f"\n{label.capitalize()}:")
             
-            # Seleccionar el rango de sorteos
-            df_range = self.df.head(range_size)
-            
             # Contar frecuencias
-            numeros = []
-            for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-                numeros.extend(df_range[col].tolist())
-            
-            freq = pd.Series(numeros).value_counts()
-            total_apariciones = len(numeros)
+            freq = self.frequencies.counts(self.snapshot, 'numbers', window=range_size)
             
             # Calcular tendencias
-            freq_total = pd.Series(self.df[['n1', 'n2', 'n3', 'n4', 'n5']].values.ravel()).value_counts()
+            freq_total = self.frequencies.counts(self.snapshot, 'numbers')
             
             # Preparar resultados
             resultados = []
@@ -85,16 +78,18 @@ class Predictor:
                     num,
                     count,
                     f"{porcentaje:.1f}",
-                    f"{tendencia:+.2f}%"
+                    f"{tendencia:+.2f}%",
+                    int(sin_salir[num - 1])
                 ])
             
-            # Ordenar por frecuencia ascendente y tomar los 10 menos frecuentes
-            resultados.sort(key=lambda x: x[1])
+            # Ordenar por frecuencia ascendente (a igualdad, el que lleva más
+            # sorteos sin salir) y tomar los 10 menos frecuentes
+            resultados.sort(key=lambda x: (x[1], -x[4]))
             resultados = resultados[:10]
             
             # Mostrar tabla
             print(tabulate(resultados,
-                           headers=['Número', 'Apariciones', '% Sorteos', 'Tendencia'],
+                           headers=['Número', 'Apariciones', '% Sorteos', 'Tendencia', 'Sin salir'],
                            tablefmt='pretty'))
 
     def analyze_patterns(self):
@@ -160,7 +155,13 @@ class Predictor:
             print(" - ".join(map(str, estrellas_frecuentes)))
             
             print("\nAnálisis de la predicción:")
-            self._analizar_prediccion(numeros_predichos, estrellas_frecuentes)
+            analisis = self._analizar_prediccion(numeros_predichos, estrellas_frecuentes)
+            
+            return {
+                'numbers': numeros_predichos,
+                'stars': estrellas_frecuentes,
+                'analysis': analisis
+            }
         
         except Exception as e:
             print(f"Se produjo un error durante la predicción: {str(e)}")
@@ -168,12 +169,10 @@ class Predictor:
             traceback.print_exc()
 
     def _get_most_frequent_numbers(self, n):
-        numeros = self.df[['n1', 'n2', 'n3', 'n4', 'n5']].values.ravel()
-        return pd.Series(numeros).value_counts().head(n).index.tolist()
+        return self.frequencies.counts(self.snapshot, 'numbers').head(n).index.tolist()
 
     def _get_most_frequent_stars(self, n):
-        estrellas = self.df[['e1', 'e2']].values.ravel()
-        return pd.Series(estrellas).value_counts().head(n).index.tolist()
+        return self.frequencies.counts(self.snapshot, 'stars').head(n).index.tolist()
 
     def _adjust_parity(self, numbers):
         pares = sum(1 for n in numbers if n % 2 == 0)
@@ -254,38 +253,33 @@ class Predictor:
         return numbers
 
     def _get_next_odd_frequent(self, exclude):
-        numeros = self.df[['n1', 'n2', 'n3', 'n4', 'n5']].values.ravel()
-        freq = pd.Series(numeros).value_counts()
+        freq = self.frequencies.counts(self.snapshot, 'numbers')
         for n in freq.index:
             if n % 2 != 0 and n not in exclude:
                 return n
 
     def _get_next_even_frequent(self, exclude):
-        numeros = self.df[['n1', 'n2', 'n3', 'n4', 'n5']].values.ravel()
-        freq = pd.Series(numeros).value_counts()
+        freq = self.frequencies.counts(self.snapshot, 'numbers')
         for n in freq.index:
             if n % 2 == 0 and n not in exclude:
                 return n
 
     def _get_next_larger_frequent(self, exclude):
-        numeros = self.df[['n1', 'n2', 'n3', 'n4', 'n5']].values.ravel()
-        freq = pd.Series(numeros).value_counts()
+        freq = self.frequencies.counts(self.snapshot, 'numbers')
         for n in freq.index:
             if n > max(exclude) and n not in exclude:
                 return n
         return None  # Retorna None si no se encuentra un número más grande
 
     def _get_next_smaller_frequent(self, exclude):
-        numeros = self.df[['n1', 'n2', 'n3', 'n4', 'n5']].values.ravel()
-        freq = pd.Series(numeros).value_counts()
+        freq = self.frequencies.counts(self.snapshot, 'numbers')
         for n in reversed(freq.index):
             if n < min(exclude) and n not in exclude:
                 return n
         return None  # Retorna None si no se encuentra un número más pequeño
 
     def _get_number_from_underrepresented_decade(self, exclude):
-        numeros = self.df[['n1', 'n2', 'n3', 'n4', 'n5']].values.ravel()
-        freq = pd.Series(numeros).value_counts()
+        freq = self.frequencies.counts(self.snapshot, 'numbers')
         decenas_actuales = [(n-1)//10 for n in exclude]
         for n in freq.index:
             if (n-1)//10 not in decenas_actuales and n not in exclude:
@@ -310,6 +304,15 @@ class Predictor:
         
         # Analizar estrellas
         print(f"Suma de las estrellas: {sum(estrellas)}")
+        
+        analisis = {
+            'Paridad': f"{pares} pares, {impares} impares",
+            'Suma de los números': int(suma),
+            'Suma de las estrellas': int(sum(estrellas))
+        }
+        for dec in range(5):
+            analisis[f"Decena {dec}0-{dec}9"] = int(dec_dist.get(dec, 0))
+        return analisis
 
     def evaluate_combination(self, numbers, stars):
         """Evalúa una combinación específica."""
@@ -0,0 +1,241 @@
+"""
+Instrumentación de tiempos y memoria de los puntos de entrada del análisis.
+
+Se activa con la variable de entorno EUROMILLONES_PROFILE (menú interactivo
+y CLI) o con la opción --profile de la CLI:
+
+    EUROMILLONES_PROFILE=1 python main.py
+    EUROMILLONES_PROFILE=time python main.py      # sin medir memoria
+    python main.py --profile --profile-dir perfiles report
+    python main.py --profile --profile-no-memory report
+
+Al activarse, envuelve los métodos públicos de Statistics, DataAnalyzer,
+Predictor, CombinationGenerator, DataLoader, DrawStore y FrequencyService, y
+las funciones de queries. Registra llamadas, tiempo real (total y propio,
+descontando las llamadas instrumentadas anidadas), tiempo de CPU y pico de
+memoria reservada (tracemalloc). Al salir muestra un resumen por stderr, con
+los aciertos de las cachés de frecuencias y de resultados. Con un directorio de
+volcado, cada llamada de primer nivel guarda además un perfil cProfile que
+puede abrirse con `python -m pstats`.
+
+tracemalloc puede multiplicar por varios el tiempo de los métodos que crean
+muchos objetos pequeños (iterrows, por ejemplo); el modo 'time' lo desactiva
+para obtener tiempos representativos.
+
+Si no se activa no se envuelve nada, así que no añade ningún coste.
+"""
+import atexit
+import cProfile
+import functools
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+ENV_VAR = 'EUROMILLONES_PROFILE'
+ENV_DIR = 'EUROMILLONES_PROFILE_DIR'
+
+# (módulo, clase) a instrumentar; clase None = funciones públicas del módulo
+TARGETS = [
+    ('modules.statistics', 'Statistics'),
+    ('modules.analyzer', 'DataAnalyzer'),
+    ('modules.predictor', 'Predictor'),
+    ('modules.generator', 'CombinationGenerator'),
+    ('modules.data_loader', 'DataLoader'),
+    ('modules.draw_store', 'DrawStore'),
+    ('modules.queries', None),
+    ('modules.frequency_service', 'FrequencyService')
+]
+
+# Cachés cuyos aciertos se muestran en el resumen: (nombre, módulo, función
+# que retorna la caché activa). Solo se consultan si el módulo ya se cargó.
+CACHES = [
+    ('Frecuencias en memoria', 'modules.frequency_service', 'get_service'),
+    ('Resultados en disco', 'modules.result_cache', 'active')
+]
+
+_profiler = None
+
+
+class Profiler:
+    """Acumula las métricas de cada método instrumentado."""
+
+    def __init__(self, dump_dir=None, memory=True):
+        self.dump_dir = dump_dir
+        self.memory = memory
+        self.stats = {}
+        self.dumps = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def wrap(self, name, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return self.call(name, func, args, kwargs)
+        wrapper.__profiled__ = func
+        return wrapper
+
+    def call(self, name, func, args, kwargs):
+        stack = self._stack()
+        # Cada marco: [memoria al entrar, pico de los hijos, tiempo real de los hijos]
+        frame = [0, 0, 0.0]
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # El pico que llevaba el padre no debe perderse al reiniciarlo
+                stack[-1][1] = max(stack[-1][1], peak)
+            tracemalloc.reset_peak()
+            frame[0] = current
+
+        profile = None
+        if self.dump_dir and not stack:
+            profile = cProfile.Profile()
+
+        stack.append(frame)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            if profile is not None:
+                return profile.runcall(func, *args, **kwargs)
+            return func(*args, **kwargs)
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            stack.pop()
+
+            peak = 0
+            if self.memory:
+                peak_abs = max(tracemalloc.get_traced_memory()[1], frame[1])
+                peak = max(peak_abs - frame[0], 0)
+                if stack:
+                    stack[-1][1] = max(stack[-1][1], peak_abs)
+            if stack:
+                stack[-1][2] += wall
+
+            self._record(name, wall, wall - frame[2], cpu, peak)
+            if profile is not None:
+                self._dump(name, profile)
+
+    def _record(self, name, wall, own, cpu, peak):
+        with self._lock:
+            entry = self.stats.setdefault(name, {'calls': 0, 'wall': 0.0, 'own': 0.0,
+                                                 'cpu': 0.0, 'peak': 0})
+            entry['calls'] += 1
+            entry['wall'] += wall
+            entry['own'] += own
+            entry['cpu'] += cpu
+            entry['peak'] = max(entry['peak'], peak)
+
+    def _dump(self, name, profile):
+        os.makedirs(self.dump_dir, exist_ok=True)
+        with self._lock:
+            index = len(self.dumps) + 1
+            filename = os.path.join(self.dump_dir, f"{index:03d}-{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}.prof")
+            self.dumps.append(filename)
+        profile.dump_stats(filename)
+
+    def rows(self):
+        """Filas del resumen, de mayor a menor tiempo real."""
+        rows = []
+        for name, s in sorted(self.stats.items(), key=lambda x: x[1]['wall'], reverse=True):
+            rows.append([
+                name,
+                s['calls'],
+                f"{s['wall'] * 1000:.2f}",
+                f"{s['own'] * 1000:.2f}",
+                f"{s['cpu'] * 1000:.2f}",
+                f"{s['wall'] / s['calls'] * 1000:.2f}",
+                f"{s['peak'] / 1024 / 1024:.2f}" if self.memory else '-'
+            ])
+        return rows
+
+    @staticmethod
+    def cache_rows():
+        """Aciertos y fallos de las cachés cargadas en el proceso."""
+        rows = []
+        for label, module_name, getter in CACHES:
+            module = sys.modules.get(module_name)
+            cache = getattr(module, getter)() if module is not None else None
+            if cache is None:
+                continue
+            stats = cache.stats()
+            rows.append([label, stats['aciertos'], stats['fallos'], f"{stats['tasa_aciertos']:.2f}"])
+        return rows
+
+    def print_summary(self, file=None):
+        file = file or sys.stderr
+        if not self.stats:
+            return
+        from tabulate import tabulate
+        print("\n⏱️ PERFIL DE EJECUCIÓN", file=file)
+        print(tabulate(self.rows(),
+                       headers=['Método', 'Llamadas', 'Total (ms)', 'Propio (ms)',
+                                'CPU (ms)', 'Media (ms)', 'Pico memoria (MB)'],
+                       tablefmt='pretty'), file=file)
+        caches = self.cache_rows()
+        if caches:
+            print("\n📦 CACHÉS", file=file)
+            print(tabulate(caches, headers=['Caché', 'Aciertos', 'Fallos', 'Tasa de aciertos (%)'],
+                           tablefmt='pretty'), file=file)
+        if self.dumps:
+            print(f"\n📁 {len(self.dumps)} perfiles cProfile guardados en {self.dump_dir} "
+                  f"(python -m pstats <archivo>)", file=file)
+
+
+def _instrument_namespace(profiler, owner, prefix, only_functions=False):
+    for attr, value in list(vars(owner).items()):
+        if attr.startswith('_'):
+            continue
+        if isinstance(value, (staticmethod, classmethod)):
+            wrapped = type(value)(profiler.wrap(f"{prefix}{attr}", value.__func__))
+        elif callable(value) and not isinstance(value, type):
+            if only_functions and getattr(value, '__module__', None) != owner.__name__:
+                continue  # Funciones importadas desde otros módulos
+            if hasattr(value, '__profiled__'):
+                continue
+            wrapped = profiler.wrap(f"{prefix}{attr}", value)
+        else:
+            continue
+        setattr(owner, attr, wrapped)
+
+
+def enable(dump_dir=None, memory=True, targets=None):
+    """Activa la instrumentación (una sola vez por proceso) y retorna el Profiler."""
+    global _profiler
+    if _profiler is not None:
+        return _profiler
+
+    from importlib import import_module
+    profiler = Profiler(dump_dir, memory)
+    for module_name, class_name in targets or TARGETS:
+        module = import_module(module_name)
+        if class_name is None:
+            _instrument_namespace(profiler, module, f"{module_name.rsplit('.', 1)[-1]}.",
+                                  only_functions=True)
+        else:
+            _instrument_namespace(profiler, getattr(module, class_name), f"{class_name}.")
+
+    atexit.register(profiler.print_summary)
+    _profiler = profiler
+    return profiler
+
+
+def enable_from_env():
+    """Activa la instrumentación si EUROMILLONES_PROFILE está definida ('time' = sin memoria)."""
+    value = os.environ.get(ENV_VAR, '').strip().lower()
+    if value in ('', '0', 'false', 'no'):
+        return None
+    return enable(dump_dir=os.environ.get(ENV_DIR) or None, memory=value != 'time')
+
+
+def get_profiler():
+    """Retorna el Profiler activo o None."""
+    return _profiler
@@ -0,0 +1,261 @@
+"""
+Consultas de análisis sin salida por pantalla.
+
+Cada función recibe un DrawStore y retorna estructuras simples (listas y
+diccionarios de tipos nativos) listas para serializar a JSON o CSV. Las usan
+la interfaz de línea de comandos y cualquier integración no interactiva.
+"""
+import numpy as np
+
+POOL_LABELS = {
+    'numbers': 'numero',
+    'stars': 'estrella'
+}
+
+
+def _format_date(date):
+    return str(np.datetime_as_string(date, unit='D'))
+
+
+def validate_ticket(numbers, stars):
+    """Valida una combinación de números y estrellas."""
+    # Verificar longitud
+    if len(numbers) != 5:
+        return False, "Debe proporcionar 5 números"
+    if len(stars) != 2:
+        return False, "Debe proporcionar 2 estrellas"
+
+    # Verificar rangos
+    if not all(1 <= n <= 50 for n in numbers):
+        return False, "Los números deben estar entre 1 y 50"
+    if not all(1 <= s <= 12 for s in stars):
+        return False, "Las estrellas deben estar entre 1 y 12"
+
+    # Verificar duplicados
+    if len(set(numbers)) != 5:
+        return False, "No puede haber números duplicados"
+    if len(set(stars)) != 2:
+        return False, "No puede haber estrellas duplicadas"
+
+    return True, "Combinación válida"
+
+
+def summary(store):
+    """Estadísticas básicas del histórico."""
+    first, last = store.dates[0], store.dates[-1]
+    days = int((last - first).astype(int))
+    return {
+        'total_sorteos': len(store),
+        'primer_sorteo': _format_date(first),
+        'ultimo_sorteo': _format_date(last),
+        'años_analizados': round(days / 365, 2),
+        'sorteos_por_año': round(len(store) / (days / 365), 2) if days else None
+    }
+
+
+def last_draws(store, n=5):
+    """Últimos n sorteos, el más reciente primero."""
+    rows = []
+    for i in range(len(store) - 1, max(len(store) - n, 0) - 1, -1):
+        rows.append({
+            'fecha': _format_date(store.dates[i]),
+            'numeros': sorted(store.numbers[i].tolist()),
+            'estrellas': sorted(store.stars[i].tolist())
+        })
+    return rows
+
+
+def frequencies(store, pool='numbers', window=None, top=None):
+    """Frecuencia de cada número o estrella, ordenada de mayor a menor."""
+    counts = store.frequencies(pool, last=window)
+    draws = len(store) if window is None else min(window, len(store))
+    if pool == 'numbers':
+        expected = np.full(len(counts), draws * 5 / len(counts))
+    else:
+        # Según el bombo de cada etapa, como star_eras.star_scores
+        from . import star_eras
+        expected = star_eras.expected_counts(store, last=window)
+
+    order = np.argsort(-counts, kind='stable')
+    if top is not None:
+        order = order[:top]
+
+    label = POOL_LABELS[pool]
+    return [{
+        label: int(i + 1),
+        'apariciones': int(counts[i]),
+        'porcentaje_sorteos': round(float(counts[i]) / draws * 100, 2),
+        'desviacion': round((float(counts[i]) - expected[i]) / expected[i] * 100, 2) if expected[i] else None
+    } for i in order]
+
+
+def _window_trend(store, window):
+    window = min(window, len(store))
+    counts = store.frequencies('numbers', last=window)
+    total = store.frequencies('numbers')
+    expected = total / len(store) * window
+    with np.errstate(divide='ignore', invalid='ignore'):
+        trend = np.where(expected > 0, (counts - expected) / expected * 100, 0.0)
+    return window, counts, trend
+
+
+def hot_numbers(store, window=20, top=10):
+    """Números más frecuentes en los últimos sorteos frente a su media histórica."""
+    window, counts, trend = _window_trend(store, window)
+    order = np.argsort(-counts, kind='stable')[:top]
+    return [{
+        'numero': int(i + 1),
+        'apariciones': int(counts[i]),
+        'porcentaje_sorteos': round(float(counts[i]) / window * 100, 1),
+        'tendencia': round(float(trend[i]), 2)
+    } for i in order]
+
+
+def cold_numbers(store, window=20, top=10):
+    """
+    Números menos frecuentes en los últimos sorteos.
+
+    A igualdad de apariciones va primero el que lleva más sorteos sin salir.
+    """
+    window, counts, trend = _window_trend(store, window)
+    ages = store.number_ages[-1]
+    order = np.lexsort((np.arange(len(counts)), -ages.astype(np.int64), counts))[:top]
+    return [{
+        'numero': int(i + 1),
+        'apariciones': int(counts[i]),
+        'porcentaje_sorteos': round(float(counts[i]) / window * 100, 1),
+        'tendencia': round(float(trend[i]), 2),
+        'sin_salir': int(ages[i])
+    } for i in order]
+
+
+def streaks(store, pool='numbers', top=10):
+    """Rachas máximas de aparición y ausencia, y ausencia actual."""
+    max_streak, _, max_absence, current_absence = store.streaks(pool)
+
+    order = np.lexsort((np.arange(len(max_streak)), -max_streak))
+    if top is not None:
+        order = order[:top]
+
+    label = POOL_LABELS[pool]
+    return [{
+        label: int(i + 1),
+        'racha_maxima': int(max_streak[i]),
+        'ausencia_maxima': int(max_absence[i]),
+        'ausencia_actual': int(current_absence[i])
+    } for i in order]
+
+
+def check_ticket(store, numbers, stars):
+    """Compara una combinación con todos los sorteos del histórico."""
+    number_hits = store.number_occurrence[:, np.asarray(numbers) - 1].sum(axis=1)
+    star_hits = store.star_occurrence[:, np.asarray(stars) - 1].sum(axis=1)
+
+    best = int(number_hits.max()) if len(store) else 0
+    best_idx = np.nonzero(number_hits == best)[0]
+
+    # Distribución de aciertos (números + estrellas) con al menos 2 números
+    aciertos = []
+    for n in range(5, 1, -1):
+        for s in range(2, -1, -1):
+            count = int(((number_hits == n) & (star_hits == s)).sum())
+            if count:
+                aciertos.append({'numeros': n, 'estrellas': s, 'sorteos': count})
+
+    counts = store.frequencies('numbers')
+    star_counts = store.frequencies('stars')
+    return {
+        'numeros': sorted(int(n) for n in numbers),
+        'estrellas': sorted(int(s) for s in stars),
+        'maximas_coincidencias': best,
+        'fechas_maximas_coincidencias': [_format_date(store.dates[i]) for i in best_idx[::-1][:10]],
+        'sorteos_con_4_o_mas': int((number_hits >= 4).sum()),
+        'aciertos': aciertos,
+        'frecuencia_numeros': {int(n): int(counts[n - 1]) for n in numbers},
+        'frecuencia_estrellas': {int(s): int(star_counts[s - 1]) for s in stars}
+    }
+
+
+def similar_draws(store, numbers, stars, top=10, metric='weighted', star_weight=None):
+    """Sorteos del histórico más parecidos a una combinación, el más parecido primero."""
+    from . import similarity
+    if star_weight is None:
+        star_weight = similarity.DEFAULT_STAR_WEIGHT
+    index, scores = similarity.nearest(store, numbers, stars, k=top, metric=metric, star_weight=star_weight)
+    numbers, stars = set(int(n) for n in numbers), set(int(s) for s in stars)
+    return [{
+        'fecha': _format_date(store.dates[i]),
+        'numeros': sorted(store.numbers[i].tolist()),
+        'estrellas': sorted(store.stars[i].tolist()),
+        'aciertos_numeros': len(numbers & set(store.numbers[i].tolist())),
+        'aciertos_estrellas': len(stars & set(store.stars[i].tolist())),
+        'similitud': round(float(score), 4)
+    } for i, score in zip(index[0], scores[0])]
+
+
+def similar_pairs(store, top=10, metric='weighted', star_weight=None, workers=None):
+    """Parejas de sorteos del histórico más parecidas entre sí."""
+    from . import similarity
+    if star_weight is None:
+        star_weight = similarity.DEFAULT_STAR_WEIGHT
+    first, second, scores = similarity.similar_pairs(store, k=top, metric=metric,
+                                                     star_weight=star_weight, workers=workers)
+    rows = []
+    for i, j, score in zip(first, second, scores):
+        rows.append({
+            'fecha': _format_date(store.dates[i]),
+            'numeros': sorted(store.numbers[i].tolist()),
+            'estrellas': sorted(store.stars[i].tolist()),
+            'fecha_anterior': _format_date(store.dates[j]),
+            'numeros_anterior': sorted(store.numbers[j].tolist()),
+            'estrellas_anterior': sorted(store.stars[j].tolist()),
+            'numeros_comunes': sorted(set(store.numbers[i].tolist()) & set(store.numbers[j].tolist())),
+            'estrellas_comunes': sorted(set(store.stars[i].tolist()) & set(store.stars[j].tolist())),
+            'similitud': round(float(score), 4)
+        })
+    return rows
+
+
+def analog_periods(store, window=10, top=5, horizon=1):
+    """Periodos pasados cuya trayectoria de rasgos se parece a la de los últimos `window` sorteos."""
+    from . import analogs
+    rows, recent = analogs.find_analogs(store, window=window, top=top, horizon=horizon)
+    features = analogs.trajectory_features(store)
+
+    def means(index):
+        return {column: round(float(value), 2)
+                for column, value in zip(analogs.TRAJECTORY_COLUMNS, features[index].mean(axis=0))}
+
+    followers = np.concatenate([row['siguientes'] for row in rows]) if rows else np.empty(0, dtype=np.int64)
+    return {
+        'ventana': {
+            'desde': _format_date(store.dates[recent[0]]),
+            'hasta': _format_date(store.dates[recent[-1]]),
+            'rasgos': means(recent)
+        },
+        'analogos': [{
+            'desde': _format_date(store.dates[row['inicio']]),
+            'hasta': _format_date(store.dates[row['fin']]),
+            'distancia': round(row['distancia'], 4),
+            'siguientes': [{
+                'fecha': _format_date(store.dates[i]),
+                'numeros': sorted(store.numbers[i].tolist()),
+                'estrellas': sorted(store.stars[i].tolist())
+            } for i in row['siguientes']],
+            'rasgos_siguientes': means(row['siguientes'])
+        } for row in rows],
+        'media_siguientes': means(followers) if len(followers) else None,
+        'media_historica': means(slice(None))
+    }
+
+
+def report(store, top=10):
+    """Informe resumido con las consultas principales."""
+    return {
+        'resumen': summary(store),
+        'numeros_frecuentes': frequencies(store, 'numbers', top=top),
+        'estrellas': frequencies(store, 'stars'),
+        'numeros_calientes': hot_numbers(store, top=top),
+        'numeros_frios': cold_numbers(store, top=top),
+        'rachas': streaks(store, 'numbers', top=top)
+    }
@@ -0,0 +1,204 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+import pandas as pd
+import numpy as np
+from tabulate import tabulate
+
+from .draw_store import FEATURE_COLUMNS, DrawStore
+from .shared_store import SharedDrawStore
+from .snapshot import DrawSnapshot, calendar_frame
+
+NUM_COLS = ['n1', 'n2', 'n3', 'n4', 'n5']
+STAR_COLS = ['e1', 'e2']
+HOT_WINDOWS = [20, 50, 100]
+
+
+# Cálculos intermedios compartidos entre secciones. Son funciones de módulo
+# (y no lambdas) para que también puedan enviarse a un pool de procesos.
+# Parten del DrawStore (orden cronológico) y retornan los sorteos en el orden
+# del DataFrame, el más reciente primero.
+
+def _numeros(store):
+    return store.numbers[::-1]
+
+
+def _estrellas(store):
+    return store.stars[::-1]
+
+
+def _frecuencia_numeros(numeros):
+    counts = np.bincount(numeros.ravel().astype(np.int64), minlength=51)[1:]
+    return pd.Series(counts, index=range(1, 51))
+
+
+def _frecuencia_estrellas(estrellas):
+    counts = np.bincount(estrellas.ravel().astype(np.int64), minlength=13)[1:]
+    return pd.Series(counts, index=range(1, 13))
+
+
+def _ventanas_calientes(numeros):
+    """Frecuencias de números en los últimos 20/50/100 sorteos y en todo el histórico."""
+    ventanas = {}
+    for size in HOT_WINDOWS + [len(numeros)]:
+        counts = np.bincount(numeros[:size].ravel().astype(np.int64), minlength=51)[1:]
+        ventanas[size] = pd.Series(counts, index=range(1, 51))
+    return ventanas
+
+
+def _calendario(store):
+    return calendar_frame(store.dates[::-1])
+
+
+def _rasgos_patrones(store):
+    """Rasgos por sorteo: números pares, decenas distintas, suma y consecutivos."""
+    return pd.DataFrame(store.features[::-1], columns=FEATURE_COLUMNS)
+
+
+INTERMEDIATES = {
+    'numeros': (_numeros, ('store',)),
+    'estrellas': (_estrellas, ('store',)),
+    'frecuencia_numeros': (_frecuencia_numeros, ('numeros',)),
+    'frecuencia_estrellas': (_frecuencia_estrellas, ('estrellas',)),
+    'ventanas_calientes': (_ventanas_calientes, ('numeros',)),
+    'calendario': (_calendario, ('store',)),
+    'rasgos_patrones': (_rasgos_patrones, ('store',))
+}
+
+
+def _timed_call(func, kwargs):
+    """Ejecuta un nodo y mide su tiempo dentro del propio worker."""
+    start = time.perf_counter()
+    result = func(**kwargs)
+    return result, time.perf_counter() - start
+
+
+class ReportPlanner:
+    """
+    Planifica las secciones de un informe como un grafo de dependencias.
+
+    Cada sección declara los cálculos intermedios que necesita; el planificador
+    los deduplica, ejecuta en paralelo los nodos independientes y memoiza sus
+    resultados para que cada intermedio se calcule una sola vez.
+
+    Las secciones que escriben en pantalla se marcan como `serial`: se
+    ejecutan en el hilo principal cuando el resto del grafo ha terminado, para
+    que su salida no se mezcle con la de otros nodos.
+
+    Los nodos raíz son 'df' (el DataFrame) y 'store' (su DrawStore). Con una
+    DrawSnapshot se reutiliza el DrawStore que ya tenga. Con el
+    ejecutor de procesos, el DrawStore se publica en memoria compartida y los
+    workers se adjuntan a él en lugar de recibir una copia serializada.
+    """
+
+    def __init__(self, df, max_workers=None, executor='thread', intermediates=None):
+        if executor not in ('thread', 'process'):
+            raise ValueError("El ejecutor debe ser 'thread' o 'process'")
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.executor = executor
+        self.intermediates = intermediates if intermediates is not None else INTERMEDIATES
+        self.nodes = {}
+        self.sections = []
+        self.serial = set()
+        if isinstance(df, DrawSnapshot):
+            # La instantánea ya tiene (o reutiliza) su DrawStore
+            self.results = {'df': df.df, 'store': df.store}
+        else:
+            self.results = {'df': df, 'store': DrawStore.from_dataframe(df)}
+        self.errors = {}
+        self.timings = {}
+
+    def add_section(self, name, func, requires=(), serial=False):
+        """Registra una sección del informe y los intermedios que necesita."""
+        if name in self.nodes or name in self.intermediates:
+            raise ValueError(f"Ya existe un nodo llamado '{name}'")
+        for dep in requires:
+            self._require(dep)
+        self.nodes[name] = (func, tuple(requires))
+        self.sections.append(name)
+        if serial:
+            self.serial.add(name)
+
+    def _require(self, name):
+        """Añade un intermedio (y sus dependencias) al plan una sola vez."""
+        if name in self.nodes or name in self.results:
+            return
+        if name not in self.intermediates:
+            raise ValueError(f"Cálculo intermedio desconocido: '{name}'")
+        func, requires = self.intermediates[name]
+        for dep in requires:
+            self._require(dep)
+        self.nodes[name] = (func, tuple(requires))
+
+    def run(self):
+        """Ejecuta el grafo y retorna los resultados de las secciones."""
+        if self.executor == 'thread':
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                self._execute(pool)
+        else:
+            store = self.results['store']
+            with SharedDrawStore(store) as shared, \
+                    ProcessPoolExecutor(max_workers=self.max_workers) as pool:
+                self.results['store'] = shared.store
+                try:
+                    self._execute(pool)
+                finally:
+                    self.results['store'] = store
+        self._run_serial()
+
+        return {name: self.results.get(name) for name in self.sections}
+
+    def _execute(self, pool):
+        pending = {name for name in self.nodes if name not in self.results and name not in self.serial}
+        running = {}
+        while pending or running:
+            for name in sorted(pending):
+                func, requires = self.nodes[name]
+                failed = [dep for dep in requires if dep in self.errors]
+                if failed:
+                    self.errors[name] = f"Dependencia fallida: {', '.join(failed)}"
+                    pending.discard(name)
+                elif all(dep in self.results for dep in requires):
+                    kwargs = {dep: self.results[dep] for dep in requires}
+                    running[pool.submit(_timed_call, func, kwargs)] = name
+                    pending.discard(name)
+
+            if not running:
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    self.results[name], self.timings[name] = future.result()
+                except Exception as e:
+                    self.errors[name] = str(e)
+
+    def _run_serial(self):
+        """Ejecuta en orden, en este hilo, las secciones marcadas como `serial`."""
+        for name in self.sections:
+            if name not in self.serial:
+                continue
+            func, requires = self.nodes[name]
+            failed = [dep for dep in requires if dep in self.errors]
+            if failed:
+                self.errors[name] = f"Dependencia fallida: {', '.join(failed)}"
+                continue
+            try:
+                self.results[name], self.timings[name] = _timed_call(
+                    func, {dep: self.results[dep] for dep in requires})
+            except Exception as e:
+                self.errors[name] = str(e)
+
+    def print_timings(self):
+        """Muestra el tiempo empleado por cada nodo del grafo."""
+        rows = []
+        for name in self.nodes:
+            tipo = 'Sección' if name in self.sections else 'Intermedio'
+            if name in self.timings:
+                rows.append([name, tipo, f"{self.timings[name] * 1000:.2f} ms"])
+            else:
+                rows.append([name, tipo, f"Error: {self.errors.get(name, '-')}"])
+
+        print("\n⏱️ Tiempos por nodo:")
+        print(tabulate(rows, headers=['Nodo', 'Tipo', 'Tiempo'], tablefmt='pretty'))
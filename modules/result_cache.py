@@ -0,0 +1,303 @@
+"""
+Caché en disco de resultados de análisis.
+
+Guarda cada resultado en un archivo .npz bajo un directorio de caché. La clave
+combina la versión del histórico (hash de su contenido), el nombre del
+análisis, sus parámetros y la versión del código (hash de los fuentes del
+paquete), así que un cambio en los datos o en el código invalida los
+resultados antiguos sin tener que borrarlos. Las tablas (listas de
+diccionarios con las mismas claves) se guardan por columnas como arrays
+tipados (int64, float64, bool o texto); el resto de la estructura, como JSON.
+
+    cache = result_cache.active()
+    key = cache.key(store.version, 'queries.streaks', {'pool': 'numbers', 'top': 10})
+    result = cache.get(key)
+
+Cuando el directorio supera `max_bytes` se eliminan los resultados usados
+hace más tiempo (cada lectura actualiza la fecha de modificación del
+archivo). Para no tener que leer el histórico en cada ejecución, la versión
+de un archivo de datos se recuerda por su firma (ruta, inodo, tamaño y fecha
+de modificación).
+
+Por defecto se usa `~/.cache/euromillones` (o $XDG_CACHE_HOME/euromillones).
+EUROMILLONES_CACHE_DIR cambia el directorio, EUROMILLONES_CACHE=0 desactiva
+la caché y la CLI admite `--no-cache` y `--cache-dir`.
+"""
+import hashlib
+import json
+import os
+import threading
+import zipfile
+
+import numpy as np
+
+ENV_VAR = 'EUROMILLONES_CACHE'
+ENV_DIR = 'EUROMILLONES_CACHE_DIR'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+SUFFIX = '.npz'
+# Versiones de los archivos de datos, indexadas por su firma
+VERSION_SUFFIX = '.version'
+# Entrada del .npz con la estructura del resultado (JSON en UTF-8)
+_STRUCTURE = '__estructura__'
+
+_cache = None
+_disabled = False
+_code_version = None
+
+
+def default_directory():
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.environ.get(ENV_DIR) or os.path.join(base, 'euromillones')
+
+
+def code_version():
+    """Hash de los fuentes del paquete: cambia con cualquier modificación del código."""
+    global _code_version
+    if _code_version is None:
+        hasher = hashlib.blake2b(digest_size=8)
+        package = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(package)):
+            if name.endswith('.py'):
+                hasher.update(name.encode())
+                with open(os.path.join(package, name), 'rb') as f:
+                    hasher.update(f.read())
+        _code_version = hasher.hexdigest()
+    return _code_version
+
+
+def _column(values):
+    """Array tipado con los valores de una columna, o None si son de tipos mezclados."""
+    types = {type(v) for v in values}
+    if types == {bool}:
+        return np.array(values, dtype=bool)
+    if types == {int}:
+        try:
+            return np.array(values, dtype=np.int64)
+        except OverflowError:
+            return None
+    if types == {float}:
+        return np.array(values, dtype=np.float64)
+    if types == {str}:
+        return np.array(values, dtype=str)
+    return None
+
+
+class _Packer:
+    """Separa un resultado en estructura JSON y arrays."""
+
+    def __init__(self):
+        self.arrays = {}
+
+    def _array(self, values):
+        name = f"a{len(self.arrays)}"
+        self.arrays[name] = values
+        return {'array': name}
+
+    def encode(self, value):
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, np.ndarray):
+            if value.dtype.hasobject:
+                raise TypeError("No se pueden guardar arrays de objetos")
+            return self._array(value)
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, dict):
+            return {'dict': [[self.encode(k), self.encode(v)] for k, v in value.items()]}
+        if isinstance(value, (list, tuple)):
+            kind = 'tuple' if isinstance(value, tuple) else 'list'
+            if kind == 'list' and value and all(isinstance(row, dict) for row in value):
+                columns = list(value[0])
+                if all(isinstance(c, str) for c in columns) and all(list(row) == columns for row in value):
+                    return self._table(value, columns)
+            return {kind: [self.encode(v) for v in value]}
+        raise TypeError(f"Tipo no admitido en la caché: {type(value).__name__}")
+
+    def _table(self, rows, columns):
+        specs = []
+        for column in columns:
+            values = [row[column] for row in rows]
+            array = _column(values)
+            specs.append(self._array(array) if array is not None
+                         else {'values': [self.encode(v) for v in values]})
+        return {'table': columns, 'rows': len(rows), 'columns': specs}
+
+
+def _decode(node, arrays):
+    if not isinstance(node, dict):
+        return node
+    if 'array' in node:
+        return arrays[node['array']]
+    if 'dict' in node:
+        return {_decode(k, arrays): _decode(v, arrays) for k, v in node['dict']}
+    if 'list' in node:
+        return [_decode(v, arrays) for v in node['list']]
+    if 'tuple' in node:
+        return tuple(_decode(v, arrays) for v in node['tuple'])
+    columns = []
+    for spec in node['columns']:
+        if 'array' in spec:
+            columns.append(arrays[spec['array']].tolist())
+        else:
+            columns.append([_decode(v, arrays) for v in spec['values']])
+    return [dict(zip(node['table'], values)) for values in zip(*columns)] if columns \
+        else [{} for _ in range(node['rows'])]
+
+
+class ResultCache:
+    """Resultados de análisis en disco con expulsión LRU por tamaño."""
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_directory()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, version, name, params=None):
+        """Clave de un resultado: versión de los datos y del código, análisis y parámetros."""
+        text = json.dumps([version, code_version(), name, sorted((params or {}).items())],
+                          default=str, ensure_ascii=False)
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + SUFFIX)
+
+    def get(self, key):
+        """Resultado guardado con `key`, o None si no está (o no se puede leer)."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            structure = json.loads(arrays.pop(_STRUCTURE).tobytes().decode('utf-8'))
+            result = _decode(structure, arrays)
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, EOFError, ValueError, KeyError, TypeError, zipfile.BadZipFile):
+            # Archivo truncado o de un formato anterior: se descarta
+            self.misses += 1
+            self._remove(path)
+            return None
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """Guarda `result` (tipos JSON, tuplas y arrays NumPy) y aplica el límite de tamaño."""
+        packer = _Packer()
+        structure = packer.encode(result)
+        arrays = dict(packer.arrays)
+        arrays[_STRUCTURE] = np.frombuffer(json.dumps(structure, ensure_ascii=False).encode('utf-8'),
+                                           dtype=np.uint8)
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        temp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(temp, path)
+        self.evict()
+
+    def cached(self, version, name, params, compute):
+        """Retorna el resultado guardado o lo calcula con `compute()` y lo guarda."""
+        key = self.key(version, name, params)
+        result = self.get(key)
+        if result is None:
+            result = compute()
+            try:
+                self.put(key, result)
+            except OSError:
+                pass  # Sin permisos o sin espacio: el resultado sigue siendo válido
+        return result
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith((SUFFIX, VERSION_SUFFIX)) and entry.is_file():
+                    st = entry.stat()
+                    entries.append((st.st_mtime_ns, st.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Elimina los resultados usados hace más tiempo hasta quedar por debajo de `max_bytes`."""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+
+    def dataset_version(self, filename, compute):
+        """
+        Versión del contenido de `filename`.
+
+        Se recuerda por la firma del archivo; si cambió, se calcula con
+        `compute()` (que normalmente carga el histórico).
+        """
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return compute()
+        signature = json.dumps([os.path.abspath(filename), st.st_dev, st.st_ino,
+                                st.st_size, st.st_mtime_ns, code_version()])
+        key = 'datos-' + hashlib.blake2b(signature.encode('utf-8'), digest_size=16).hexdigest()
+        path = os.path.join(self.directory, key + VERSION_SUFFIX)
+        try:
+            with open(path, encoding='ascii') as f:
+                return f.read().strip()
+        except (OSError, ValueError):
+            pass
+        version = compute()
+        os.makedirs(self.directory, exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, 'w', encoding='ascii') as f:
+            f.write(version)
+        os.replace(temp, path)
+        return version
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'directorio': self.directory,
+            'aciertos': self.hits,
+            'fallos': self.misses,
+            'tasa_aciertos': round(self.hits / total * 100, 2) if total else 0.0
+        }
+
+
+def disable():
+    """Desactiva la caché en este proceso (opción --no-cache)."""
+    global _disabled
+    _disabled = True
+
+
+def configure(directory=None, max_bytes=DEFAULT_MAX_BYTES):
+    """Fija el directorio y el tamaño máximo de la caché del proceso."""
+    global _cache
+    _cache = ResultCache(directory, max_bytes)
+    return _cache
+
+
+def active():
+    """La caché del proceso, o None si está desactivada."""
+    global _cache
+    if _disabled or os.environ.get(ENV_VAR, '').strip().lower() in ('0', 'false', 'no', 'off'):
+        return None
+    if _cache is None:
+        _cache = ResultCache()
+    return _cache
@@ -0,0 +1,549 @@
+"""
+Servidor HTTP/JSON de análisis.
+
+Carga el histórico una sola vez y expone las consultas como endpoints JSON
+para paneles y otras integraciones:
+
+    python main.py serve --port 8080
+    curl 'http://127.0.0.1:8080/freq?pool=stars&top=5'
+
+Usa solo asyncio y la biblioteca estándar. El bucle de eventos únicamente
+lee peticiones y sirve respuestas de la caché; los cálculos se ejecutan en un
+pool de hilos o de procesos. Las respuestas se guardan ya serializadas bajo la
+versión del histórico, así que una petición repetida no vuelve a calcular nada.
+
+Con `--watch` el servidor vigila el archivo y, cuando cambia, sustituye el
+histórico por uno nuevo (ver watcher.py). Cada petición recibe el histórico
+vigente al llegar, así que las que están en curso terminan con los datos con
+los que empezaron.
+"""
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from . import queries
+
+MAX_REQUEST_LINE = 8192
+MAX_HEADERS = 100
+STATUS_TEXT = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    500: 'Internal Server Error'
+}
+
+# Estado de cada proceso: histórico vigente y la DrawSnapshot (perezosa) de
+# la última versión pedida, como (versión, instantánea)
+_STATE = {}
+# Los métodos de Predictor, Statistics y CombinationGenerator informan por
+# pantalla; en modo hilos se silencian de uno en uno porque stdout es global.
+_QUIET_LOCK = threading.Lock()
+
+
+def _warm(store):
+    # Se construyen ya los índices para que la primera petición no los pague
+    store.number_prefix
+    store.star_prefix
+    return store
+
+
+def _load_state(filename, frame=True):
+    from .data_loader import DataLoader
+    from .draw_store import DrawStore
+    store = _warm(DrawStore.from_csv(filename))
+    _STATE['store'] = store
+    if frame:
+        from .snapshot import DrawSnapshot
+        df = DataLoader(filename).load_data(verbose=False)
+        _STATE['frame'] = (store.version, DrawSnapshot(df, store=store))
+    return store
+
+
+def _init_process_worker(descriptor):
+    """
+    Inicializador de los procesos de trabajo.
+
+    Se adjuntan al histórico que publicó el proceso principal en memoria
+    compartida; el DataFrame solo se reconstruye si algún endpoint lo pide.
+    """
+    from .shared_store import attach
+    sys.stdout = open(os.devnull, 'w')
+    _STATE['quiet'] = True
+    _STATE['store'] = attach(descriptor)
+
+
+def _frame(store):
+    """Instantánea de solo lectura del histórico, compartida por las peticiones."""
+    from .snapshot import DrawSnapshot
+    version, snapshot = _STATE.get('frame', (None, None))
+    if version != store.version:
+        snapshot = DrawSnapshot.from_store(store)
+        _STATE['frame'] = (store.version, snapshot)
+    return snapshot
+
+
+def _quiet(func, *args, **kwargs):
+    if _STATE.get('quiet'):
+        return func(*args, **kwargs)
+    with _QUIET_LOCK, contextlib.redirect_stdout(io.StringIO()):
+        return func(*args, **kwargs)
+
+
+def _int_param(params, name, default=None, minimum=1):
+    if name not in params:
+        return default
+    try:
+        value = int(params[name])
+    except ValueError:
+        raise ValueError(f"El parámetro '{name}' debe ser un entero")
+    if value < minimum:
+        raise ValueError(f"El parámetro '{name}' debe ser mayor o igual que {minimum}")
+    return value
+
+
+def _int_list(params, name):
+    try:
+        return [int(v) for v in params.get(name, '').split(',') if v]
+    except ValueError:
+        raise ValueError(f"El parámetro '{name}' debe ser una lista de enteros separados por comas")
+
+
+def _pool_param(params):
+    pool = params.get('pool', 'numbers')
+    if pool not in queries.POOL_LABELS:
+        raise ValueError("El parámetro 'pool' debe ser 'numbers' o 'stars'")
+    return pool
+
+
+# Tareas: reciben los parámetros de la URL y retornan datos serializables
+
+def _task_summary(store, params):
+    return queries.summary(store)
+
+
+def _task_last(store, params):
+    return queries.last_draws(store, _int_param(params, 'n', 5))
+
+
+def _task_freq(store, params):
+    return queries.frequencies(store, _pool_param(params),
+                               window=_int_param(params, 'window'),
+                               top=_int_param(params, 'top'))
+
+
+def _task_hot(store, params):
+    return queries.hot_numbers(store, window=_int_param(params, 'window', 20),
+                               top=_int_param(params, 'top', 10))
+
+
+def _task_cold(store, params):
+    return queries.cold_numbers(store, window=_int_param(params, 'window', 20),
+                                top=_int_param(params, 'top', 10))
+
+
+def _task_streaks(store, params):
+    return queries.streaks(store, _pool_param(params), top=_int_param(params, 'top', 10))
+
+
+def _task_check(store, params):
+    numbers, stars = _int_list(params, 'numbers'), _int_list(params, 'stars')
+    valid, message = queries.validate_ticket(numbers, stars)
+    if not valid:
+        raise ValueError(message)
+    return queries.check_ticket(store, numbers, stars)
+
+
+def _task_report(store, params):
+    return queries.report(store, top=_int_param(params, 'top', 10))
+
+
+def _task_basic(store, params):
+    from .statistics import Statistics
+    return dict(Statistics(_frame(store)).show_basic_stats())
+
+
+def _task_predict(store, params):
+    from .predictor import Predictor
+    prediccion = _quiet(Predictor(_frame(store)).predict_next_draw)
+    if prediccion is None:
+        raise RuntimeError("No se pudo calcular la predicción")
+    return {
+        'numeros': [int(n) for n in prediccion['numbers']],
+        'estrellas': [int(e) for e in prediccion['stars']],
+        'analisis': prediccion['analysis']
+    }
+
+
+def _task_generate(store, params):
+    from .generator import CombinationGenerator
+    methods = {
+        'statistical': 'generate_statistical',
+        'balanced': 'generate_balanced',
+        'smart': 'generate_smart'
+    }
+    method = params.get('method', 'statistical')
+    if method not in methods:
+        raise ValueError(f"Método desconocido: {method}")
+    n = _int_param(params, 'n', 1)
+    if n > 100:
+        raise ValueError("Se pueden generar como máximo 100 combinaciones por petición")
+
+    generator = CombinationGenerator(_frame(store))
+    combinaciones = _quiet(getattr(generator, methods[method]), num_combinations=n)
+    return [{'numeros': [int(x) for x in c['numeros']],
+             'estrellas': [int(x) for x in c['estrellas']]} for c in combinaciones]
+
+
+def _noop():
+    return None
+
+
+def _run_task(name, store, params):
+    """
+    Punto de entrada común en los workers (debe poder serializarse con pickle).
+
+    En el pool de procesos `store` viaja como descriptor de memoria compartida.
+    """
+    return ROUTES[name][0](store, params)
+
+
+# Ruta -> (tarea, cacheable). Las generaciones son aleatorias y no se cachean.
+ROUTES = {
+    '/summary': (_task_summary, True),
+    '/last': (_task_last, True),
+    '/freq': (_task_freq, True),
+    '/hot': (_task_hot, True),
+    '/cold': (_task_cold, True),
+    '/streaks': (_task_streaks, True),
+    '/check': (_task_check, True),
+    '/report': (_task_report, True),
+    '/basic': (_task_basic, True),
+    '/predict': (_task_predict, True),
+    '/generate': (_task_generate, False)
+}
+
+
+class ResponseCache:
+    """Caché LRU de respuestas serializadas, indexada por versión del histórico."""
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(version, path, params):
+        return (version, path, tuple(sorted(params.items())))
+
+    def get(self, key):
+        body = self.entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key, body):
+        self.entries[key] = body
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'entradas': len(self.entries),
+            'aciertos': self.hits,
+            'fallos': self.misses,
+            'tasa_aciertos': round(self.hits / total * 100, 2) if total else 0.0
+        }
+
+
+class AnalysisServer:
+    """
+    Servidor HTTP/1.1 mínimo (GET, keep-alive) sobre asyncio.
+
+    `executor` puede ser 'thread' (por defecto; NumPy libera el GIL en las
+    operaciones pesadas) o 'process' para aislar los cálculos en procesos.
+    """
+
+    def __init__(self, filename=None, host='127.0.0.1', port=8080, workers=None,
+                 executor='thread', cache_size=1024, watch=None):
+        from . import get_data_file
+        if executor not in ('thread', 'process'):
+            raise ValueError("executor debe ser 'thread' o 'process'")
+        self.filename = filename or get_data_file()
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.executor_kind = executor
+        self.cache = ResponseCache(cache_size)
+        self.executor = None
+        self.shared = None
+        self.server = None
+        self.started = None
+        self.requests = 0
+        self._connections = {}
+        # Vigilancia del archivo: segundos entre comprobaciones (None = desactivada)
+        self.watch = watch
+        self.watcher = None
+        self.reloads = 0
+        self._watch_task = None
+        # Histórico propio del proceso principal; append() prolonga sus índices
+        self.store = None
+        # Peticiones en curso por histórico publicado y segmentos ya sustituidos
+        self._inflight = {}
+        self._retired = {}
+
+    @property
+    def version(self):
+        return _STATE['store'].version
+
+    def _publish(self, store):
+        """Pone `store` como histórico vigente para las peticiones nuevas."""
+        previous = self.shared
+        if self.executor_kind == 'process':
+            from .shared_store import SharedDrawStore
+            self.shared = SharedDrawStore(store)
+            _STATE['store'] = self.shared.store
+        else:
+            _STATE['store'] = store
+        if previous is not None:
+            # Su segmento se elimina cuando terminen las peticiones que lo usan
+            self._retired[previous.store] = previous
+            self._release(previous.store)
+
+    def _release(self, store):
+        shared = self._retired.get(store)
+        if shared is not None and not self._inflight.get(store):
+            del self._retired[store]
+            shared.close()
+
+    def _create_executor(self):
+        if self.executor_kind == 'process':
+            # Con fork, los procesos (que el pool crea al llegar las primeras
+            # tareas, ya con conexiones abiertas) heredarían los sockets de
+            # los clientes y del servidor: la conexión no llegaría a cerrarse
+            # mientras vivan. forkserver/spawn parten de un proceso limpio.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            return ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                       initializer=_init_process_worker,
+                                       initargs=(self.shared.descriptor,))
+        return ThreadPoolExecutor(max_workers=self.workers)
+
+    def _start_workers(self):
+        """Arranca todos los workers antes de aceptar conexiones (una tarea vacía por worker)."""
+        futures = [self.executor.submit(_noop) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    async def _watch_loop(self):
+        from .watcher import FileWatcher, reload_store
+        loop = asyncio.get_running_loop()
+        self.watcher = FileWatcher(self.filename, interval=self.watch)
+        while True:
+            await asyncio.sleep(self.watch)
+            if not self.watcher.poll():
+                continue
+            # La lectura y los índices se calculan fuera del bucle de eventos
+            try:
+                result = await loop.run_in_executor(
+                    None, lambda: reload_store(self.store, self.filename))
+                store = await loop.run_in_executor(None, _warm, result.store)
+            except (ValueError, OSError) as e:
+                print(f"⚠️ No se pudo recargar {self.filename}: {str(e)}", file=sys.stderr)
+                continue
+            if store is self.store:
+                continue
+            self.store = store
+            self._publish(store)
+            self.reloads += 1
+            modo = 'recarga completa' if result.full else 'incremental'
+            print(f"🔄 Histórico actualizado ({modo}): {result.added} sorteos nuevos, "
+                  f"{len(store)} en total", file=sys.stderr)
+
+    async def start(self):
+        # El proceso principal carga el histórico una vez: da la versión para
+        # la caché y lo comparten los workers (hilos directamente, procesos a
+        # través de memoria compartida)
+        self.store = _load_state(self.filename, frame=self.executor_kind == 'thread')
+        self._publish(self.store)
+        self.executor = self._create_executor()
+        if self.executor_kind == 'process':
+            await asyncio.get_running_loop().run_in_executor(None, self._start_workers)
+        if self.watch:
+            self._watch_task = asyncio.create_task(self._watch_loop())
+        self.server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.started = time.time()
+        return self
+
+    async def close(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._watch_task
+        if self.server is not None:
+            self.server.close()
+            # Las conexiones keep-alive inactivas se cierran para que sus
+            # manejadores terminen leyendo EOF en lugar de ser cancelados
+            for writer in list(self._connections.values()):
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self.server.wait_closed()
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+        for shared in list(self._retired.values()) + [self.shared]:
+            if shared is not None:
+                shared.close()
+        self._retired.clear()
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"🚀 Servidor escuchando en http://{self.host}:{self.port} "
+              f"({self.workers} workers, {self.executor_kind})", file=sys.stderr)
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+
+    def _health(self):
+        return {
+            'estado': 'ok',
+            'version_datos': self.version,
+            'sorteos': len(_STATE['store']),
+            'peticiones': self.requests,
+            'segundos_activo': round(time.time() - self.started, 1),
+            'cache': self.cache.stats(),
+            'recargas': self.reloads if self.watch else None,
+            'endpoints': sorted(ROUTES)
+        }
+
+    async def dispatch(self, method, target):
+        """Resuelve una petición y retorna (estado, cuerpo JSON en bytes)."""
+        if method != 'GET':
+            return 405, _encode({'error': 'Solo se admite GET'})
+
+        url = urlsplit(target)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if url.path in ('/', '/health'):
+            return 200, _encode(self._health())
+        if url.path not in ROUTES:
+            return 404, _encode({'error': f"Endpoint desconocido: {url.path}"})
+
+        # La petición usa de principio a fin el histórico vigente al llegar
+        store = _STATE['store']
+        version = store.version
+        cacheable = ROUTES[url.path][1]
+        key = ResponseCache.key(version, url.path, params)
+        if cacheable:
+            body = self.cache.get(key)
+            if body is not None:
+                return 200, body
+
+        loop = asyncio.get_running_loop()
+        self._inflight[store] = self._inflight.get(store, 0) + 1
+        try:
+            result = await loop.run_in_executor(self.executor, _run_task, url.path, store, params)
+        except ValueError as e:
+            return 400, _encode({'error': str(e)})
+        except Exception as e:
+            return 500, _encode({'error': f"{type(e).__name__}: {e}"})
+        finally:
+            self._inflight[store] -= 1
+            if not self._inflight[store]:
+                del self._inflight[store]
+                self._release(store)
+
+        body = _encode(result)
+        if cacheable:
+            self.cache.put(key, body)
+        return 200, body
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, target, version, headers = request
+                self.requests += 1
+
+                status, body = await self.dispatch(method, target)
+                keep_alive = (headers.get('connection', '').lower() != 'close'
+                              and version == 'HTTP/1.1')
+                writer.write(_response(status, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+
+def _encode(data):
+    return json.dumps(data, ensure_ascii=False, default=str).encode('utf-8')
+
+
+async def _read_request(reader):
+    """Lee la línea de petición y las cabeceras. Retorna None al cerrar la conexión."""
+    line = await reader.readline()
+    if not line:
+        return None
+    if len(line) > MAX_REQUEST_LINE:
+        raise ValueError("Línea de petición demasiado larga")
+    parts = line.decode('latin-1').split()
+    if len(parts) != 3:
+        raise ValueError("Petición mal formada")
+    method, target, version = parts
+
+    headers = {}
+    for _ in range(MAX_HEADERS):
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    # No se esperan cuerpos, pero se descartan para no desincronizar keep-alive
+    length = int(headers.get('content-length', 0) or 0)
+    if length:
+        await reader.readexactly(length)
+    return method, target, version, headers
+
+
+def _response(status, body, keep_alive):
+    head = (f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+    return head.encode('latin-1') + body
+
+
+def run_server(filename=None, host='127.0.0.1', port=8080, workers=None, executor='thread',
+               watch=None):
+    """Arranca el servidor y bloquea hasta Ctrl+C."""
+    server = AnalysisServer(filename, host, port, workers, executor, watch=watch)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\n👋 Servidor detenido", file=sys.stderr)
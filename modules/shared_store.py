@@ -0,0 +1,154 @@
+"""
+Publicación del histórico en memoria compartida.
+
+Un pool de procesos que recibe el DataFrame lo serializa una vez por tarea y
+cada worker acaba con su propia copia. Aquí los arrays de DrawStore (sorteos,
+fechas, matrices de aparición y sumas acumuladas) se copian una sola vez a un
+segmento de `multiprocessing.shared_memory`; los workers reciben solo un
+descriptor pequeño (nombre del segmento y posición de cada array) y se
+adjuntan sin copiar nada, de modo que la memoria no crece con el número de
+workers.
+
+    with SharedDrawStore(store) as shared:
+        pool.submit(tarea, shared.store)   # viaja como descriptor
+
+El proceso que publica es el propietario del segmento y lo elimina al cerrar
+(o al salir del intérprete si no se cerró antes).
+"""
+import atexit
+import contextlib
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from .draw_store import DrawStore
+
+ALIGNMENT = 64
+
+# Arrays que se publican. Los índices derivados van incluidos para que ningún
+# worker tenga que reconstruirlos.
+FIELDS = ['dates', 'numbers', 'stars',
+          'number_occurrence', 'star_occurrence',
+          'number_prefix', 'star_prefix', 'features', 'masks']
+
+# Segmentos adjuntados en este proceso: nombre -> (segmento, DrawStore)
+_ATTACHED = {}
+
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def _open_segment(name):
+    """Abre un segmento existente sin registrarlo para su borrado automático."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)  # Python 3.13+
+    except TypeError:
+        pass
+    # En versiones anteriores, adjuntarse registra el segmento en el
+    # resource_tracker, que lo borraría al terminar el worker aunque el
+    # propietario siga usándolo.
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def _build_store(segment, descriptor):
+    """Crea un DrawStore cuyos arrays son vistas de solo lectura sobre el segmento."""
+    views = {}
+    for field, offset, shape, dtype in descriptor['layout']:
+        array = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=segment.buf, offset=offset)
+        array.flags.writeable = False
+        views[field] = array
+
+    store = DrawStore(views['dates'], views['numbers'], views['stars'])
+    # Se rellenan las cached_property para que apunten al segmento
+    for field in FIELDS[3:]:
+        store.__dict__[field] = views[field]
+    store.__dict__['version'] = descriptor['version']
+    store.shared = descriptor
+    return store
+
+
+def attach(descriptor):
+    """
+    Adjunta un histórico publicado a partir de su descriptor.
+
+    Dentro de un mismo proceso el segmento se abre una sola vez; las llamadas
+    siguientes retornan el mismo DrawStore. Un worker trabaja con un único
+    histórico a la vez: al adjuntar uno nuevo (el servidor lo sustituyó) se
+    sueltan los anteriores.
+    """
+    name = descriptor['name']
+    if name not in _ATTACHED:
+        for previous in list(_ATTACHED):
+            segment, _ = _ATTACHED.pop(previous)
+            # Si quedan vistas vivas, el mapeo se libera cuando desaparezcan
+            with contextlib.suppress(BufferError):
+                segment.close()
+        segment = _open_segment(name)
+        _ATTACHED[name] = (segment, _build_store(segment, descriptor))
+    return _ATTACHED[name][1]
+
+
+class SharedDrawStore:
+    """Propietario de un DrawStore publicado en memoria compartida."""
+
+    def __init__(self, store):
+        layout = []
+        arrays = []
+        size = 0
+        for field in FIELDS:
+            array = np.ascontiguousarray(getattr(store, field))
+            size = _align(size)
+            layout.append((field, size, array.shape, array.dtype.str))
+            arrays.append(array)
+            size += array.nbytes
+
+        self._segment = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        for (field, offset, shape, dtype), array in zip(layout, arrays):
+            target = np.ndarray(shape, dtype=array.dtype, buffer=self._segment.buf, offset=offset)
+            target[...] = array
+            del target
+
+        self.descriptor = {
+            'name': self._segment.name,
+            'size': size,
+            'version': store.version,
+            'layout': layout
+        }
+        self.store = _build_store(self._segment, self.descriptor)
+        self.closed = False
+        atexit.register(self.close)
+
+    @property
+    def name(self):
+        return self.descriptor['name']
+
+    @property
+    def nbytes(self):
+        return self.descriptor['size']
+
+    def close(self):
+        """Elimina el segmento. Los workers que sigan adjuntos conservan su mapeo."""
+        if self.closed:
+            return
+        self.closed = True
+        atexit.unregister(self.close)
+        self.store = None
+        with contextlib.suppress(FileNotFoundError):
+            self._segment.unlink()
+        # Si aún quedan vistas vivas en este proceso, la memoria se libera
+        # cuando desaparezcan; el nombre ya no existe para nuevos procesos
+        with contextlib.suppress(BufferError):
+            self._segment.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
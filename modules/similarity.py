@@ -0,0 +1,192 @@
+"""
+Búsqueda de los sorteos más parecidos a una combinación.
+
+Cada sorteo es una máscara de bits de 64 (DrawStore.masks: 50 bits de números
+y 12 de estrellas), así que los aciertos entre una combinación y todo el
+histórico son un AND y un recuento de bits por sorteo, sin recorrer filas.
+Hay dos medidas de similitud:
+
+- 'weighted': aciertos de números + star_weight x aciertos de estrellas;
+- 'jaccard': elementos comunes / elementos distintos entre los dos sorteos.
+
+`nearest` admite miles de combinaciones a la vez (una matriz de consultas x
+sorteos por bloques, con argpartition para quedarse con las k mejores) y
+`similar_pairs` busca las parejas de sorteos del histórico más parecidas
+entre sí. Esta última compara todos con todos (N²/2 parejas), así que se
+reparte en bloques de filas entre varios hilos; los recuentos de bits de NumPy
+liberan el GIL.
+
+    indices, puntuaciones = nearest(store, [[4, 17, 20, 25, 45]], [[8, 9]], k=5)
+"""
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .draw_store import STAR_SHIFT, DrawStore
+
+METRICS = ['weighted', 'jaccard']
+DEFAULT_STAR_WEIGHT = 0.5
+# Celdas (consultas x sorteos) por bloque: unos 32 MB de claves int64
+BLOCK_CELLS = 1 << 22
+
+NUMBER_BITS = np.uint64((1 << STAR_SHIFT) - 1)
+_BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def popcount(values):
+    """Bits a 1 de cada entero uint64 (np.bitwise_count con NumPy >= 2)."""
+    values = np.asarray(values, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values)
+    counts = _BYTE_COUNTS[values.reshape(values.shape + (1,)).view(np.uint8)]
+    return counts.sum(axis=-1, dtype=np.uint8)
+
+
+def ticket_masks(numbers, stars):
+    """Máscaras de una o varias combinaciones (filas de 5 números y 2 estrellas)."""
+    numbers = np.asarray(numbers, dtype=np.int64).reshape(-1, 5)
+    stars = np.asarray(stars, dtype=np.int64).reshape(-1, 2)
+    if len(numbers) != len(stars):
+        raise ValueError("Debe haber dos estrellas por cada combinación de cinco números")
+    return DrawStore._masks(numbers, stars)
+
+
+def score_table(metric='weighted', star_weight=DEFAULT_STAR_WEIGHT):
+    """
+    Similitud según los aciertos: tabla (6 x 3) indexada por [números, estrellas].
+
+    Las dos medidas dependen solo de los aciertos (todas las combinaciones
+    tienen 5 + 2 elementos), así que basta con esta tabla.
+    """
+    if metric not in METRICS:
+        raise ValueError(f"Medida de similitud desconocida: {metric}")
+    numbers, stars = np.meshgrid(np.arange(6), np.arange(3), indexing='ij')
+    if metric == 'jaccard':
+        common = numbers + stars
+        return common / (14 - common)
+    return numbers + star_weight * stars
+
+
+def _split(common):
+    """Aciertos de números y de estrellas a partir de la máscara de elementos comunes."""
+    return popcount(common & NUMBER_BITS), popcount(common >> np.uint64(STAR_SHIFT))
+
+
+def hits(queries, masks):
+    """Aciertos de números y de estrellas (dos matrices consultas x sorteos)."""
+    return _split(queries[:, None] & masks[None, :])
+
+
+def _ranks(table):
+    """Rango denso de cada celda de la tabla: misma similitud, mismo rango."""
+    return np.unique(table, return_inverse=True)[1].reshape(table.shape).astype(np.int64)
+
+
+def _top(keys, k):
+    """Posiciones de las k claves mayores de cada fila, de mayor a menor."""
+    k = min(k, keys.shape[1])
+    if k < keys.shape[1]:
+        keys_part = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+    else:
+        keys_part = np.broadcast_to(np.arange(keys.shape[1]), keys.shape)
+    order = np.argsort(-np.take_along_axis(keys, keys_part, axis=1), axis=1)
+    return np.take_along_axis(keys_part, order, axis=1)
+
+
+def nearest(store, numbers, stars, k=10, metric='weighted', star_weight=DEFAULT_STAR_WEIGHT):
+    """
+    Los `k` sorteos más parecidos a cada combinación.
+
+    `numbers` y `stars` son una combinación o una matriz de ellas. Retorna
+    (índices, puntuaciones), dos matrices (combinaciones x k) con las filas de
+    `store` ordenadas de más a menos parecida; a igual puntuación, la más
+    reciente primero.
+
+    Cada celda se reduce a una clave entera (rango de la similitud x N +
+    fila), única y que ya incluye el desempate, así que argpartition da
+    exactamente los k mejores de cada bloque y los bloques se fusionan sin
+    ambigüedad.
+    """
+    queries = ticket_masks(numbers, stars)
+    masks = store.masks
+    table = score_table(metric, star_weight)
+    ranks = _ranks(table)
+    n = len(masks)
+    block = max(BLOCK_CELLS // max(len(queries), 1), 1)
+
+    best = np.zeros((len(queries), 0), dtype=np.int64)
+    for start in range(0, n, block):
+        number_hits, star_hits = hits(queries, masks[start:start + block])
+        keys = ranks[number_hits, star_hits] * n + np.arange(start, start + number_hits.shape[1])
+        keys = np.hstack([best, keys])
+        best = np.take_along_axis(keys, _top(keys, k), axis=1)
+
+    index = best % n if n else best
+    number_hits, star_hits = _split(queries[:, None] & masks[index])
+    return index, table[number_hits, star_hits]
+
+
+def _pair_block(masks, levels, start, stop, k):
+    """
+    Claves de las k mejores parejas (i, j) con start <= i < stop y j < i.
+
+    En lugar de ordenar todas las parejas del bloque se cuentan las de cada
+    nivel de similitud (uint8, 0 = pareja no válida) y solo se extraen las
+    de los niveles que entran en las k mejores; del último nivel, las de
+    filas y columnas mayores (las más recientes), que son las últimas.
+    """
+    n = len(masks)
+    number_hits, star_hits = hits(masks[start:stop], masks[:stop])
+    level = np.take(levels, number_hits * np.uint8(3) + star_hits)
+    level[:, start:][np.triu_indices(stop - start)] = 0
+
+    at_least = np.cumsum(np.bincount(level.ravel(), minlength=len(levels) + 1)[::-1])[::-1]
+    threshold = max(1, int(np.flatnonzero(at_least >= k)[-1]) if at_least[1] >= k else 1)
+    rows, cols = np.nonzero(level > threshold)
+    need = k - len(rows)
+    if need > 0:
+        # Solo las filas finales que hacen falta para completar k
+        per_row = (level == threshold).sum(axis=1)
+        from_end = np.cumsum(per_row[::-1])
+        first = len(per_row) - 1 - int(np.searchsorted(from_end, need))
+        tail_rows, tail_cols = np.nonzero(level[max(first, 0):] == threshold)
+        tail_rows, tail_cols = tail_rows[-need:] + max(first, 0), tail_cols[-need:]
+        rows, cols = np.concatenate([rows, tail_rows]), np.concatenate([cols, tail_cols])
+    return (level[rows, cols].astype(np.int64) * n + start + rows) * n + cols
+
+
+def similar_pairs(store, k=10, metric='weighted', star_weight=DEFAULT_STAR_WEIGHT, workers=None):
+    """
+    Las `k` parejas de sorteos más parecidas entre sí.
+
+    Retorna (i, j, puntuaciones) con j < i, de más a menos parecida (a igual
+    puntuación, las más recientes primero). Las filas se reparten en bloques
+    de unas BLOCK_CELLS comparaciones entre `workers` hilos (por defecto, uno
+    por CPU); cada bloque conserva sus k mejores parejas.
+    """
+    masks = store.masks
+    n = len(masks)
+    table = score_table(metric, star_weight)
+    # Nivel de similitud (1 = el menor) de cada número de aciertos números * 3 + estrellas
+    levels = (_ranks(table) + 1).astype(np.uint8).ravel()
+
+    # Bloques de coste parecido: las filas [start, stop) se comparan con las
+    # stop primeras, así que rows * (start + rows) <= BLOCK_CELLS
+    bounds = [0]
+    side = math.isqrt(BLOCK_CELLS)
+    while bounds[-1] < n:
+        start = bounds[-1]
+        bounds.append(min(n, start + max(1, BLOCK_CELLS // (start + side))))
+    blocks = list(zip(bounds[:-1], bounds[1:]))
+
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(blocks) or 1))) as pool:
+        parts = list(pool.map(lambda b: _pair_block(masks, levels, b[0], b[1], k), blocks))
+
+    keys = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+    keys = np.sort(keys)[::-1][:k]
+    first, second = np.divmod(keys % (n * n), n)
+    number_hits, star_hits = _split(masks[first] & masks[second])
+    return first, second, table[number_hits, star_hits]
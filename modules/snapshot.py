@@ -0,0 +1,91 @@
+"""
+Instantáneas inmutables del histórico.
+
+DataAnalyzer, Statistics, Predictor y CombinationGenerator trabajan sobre el
+mismo histórico. DrawSnapshot lo fija: las columnas de su DataFrame son
+arrays NumPy de solo lectura y las columnas de calendario (año, mes, día de
+la semana y estación) se calculan una sola vez, en una tabla aparte, en lugar
+de añadirse al DataFrame compartido. Varios análisis pueden leer la misma
+instantánea a la vez sin bloqueos ni copias:
+
+    snapshot = DrawSnapshot(DataLoader().load_data())
+    statistics = Statistics(snapshot)
+    predictor = Predictor(snapshot)
+    snapshot.df[snapshot.calendar['mes'] == 3]    # sorteos de marzo
+
+Con pandas < 3 el constructor del DataFrame copia los arrays a bloques
+propios y la protección de solo lectura se pierde; la instantánea sigue
+evitando que los analizadores añadan columnas.
+"""
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from . import SEASONS
+from .draw_store import DrawStore
+
+CALENDAR_COLUMNS = ['año', 'mes', 'dia_semana', 'estacion']
+# Orden alfabético: es el que daba agrupar por la antigua columna de texto
+SEASON_CATEGORIES = sorted(set(SEASONS.values()))
+# Código de la estación de cada mes (posición 0 sin usar)
+_SEASON_CODES = np.array([0] + [SEASON_CATEGORIES.index(SEASONS[m]) for m in range(1, 13)], dtype=np.int8)
+
+
+def _read_only(values):
+    values = np.array(values, copy=True)
+    values.flags.writeable = False
+    return values
+
+
+def calendar_frame(dates, index=None):
+    """Año (uint16), mes y día de la semana (uint8) y estación (categórica) de cada fecha."""
+    fechas = pd.DatetimeIndex(dates)
+    meses = fechas.month.to_numpy().astype(np.uint8)
+    return pd.DataFrame({
+        'año': _read_only(fechas.year.to_numpy().astype(np.uint16)),
+        'mes': _read_only(meses),
+        'dia_semana': _read_only(fechas.dayofweek.to_numpy().astype(np.uint8)),
+        'estacion': pd.Categorical.from_codes(_SEASON_CODES[meses], SEASON_CATEGORIES)
+    }, index=index, copy=False)
+
+
+class DrawSnapshot:
+    """
+    Histórico de solo lectura compartido por los analizadores.
+
+    `df` tiene las columnas de DataLoader (el sorteo más reciente primero);
+    `calendar` y `store` se construyen la primera vez que se piden.
+    """
+
+    def __init__(self, df, store=None):
+        columns = {col: _read_only(df[col].to_numpy()) for col in df.columns}
+        self.df = pd.DataFrame(columns, index=df.index, copy=False)
+        if store is not None:
+            self.__dict__['store'] = store
+
+    @classmethod
+    def of(cls, data):
+        """Retorna `data` si ya es una instantánea; si es un DataFrame, la crea."""
+        return data if isinstance(data, cls) else cls(data)
+
+    @classmethod
+    def from_store(cls, store):
+        return cls(store.to_dataframe(), store=store)
+
+    def __len__(self):
+        return len(self.df)
+
+    def as_of(self, date):
+        """Instantánea con los sorteos hasta `date` (incluido), para analizar el pasado."""
+        return DrawSnapshot.from_store(self.store.as_of(date))
+
+    @cached_property
+    def calendar(self):
+        """Columnas de calendario, alineadas con el índice de `df`."""
+        return calendar_frame(self.df['fecha'], index=self.df.index)
+
+    @cached_property
+    def store(self):
+        """DrawStore con los mismos sorteos (orden cronológico)."""
+        return DrawStore.from_dataframe(self.df)
@@ -0,0 +1,186 @@
+"""
+Análisis de estrellas por etapas del bombo.
+
+El bombo de estrellas ha cambiado de tamaño (9 estrellas desde 2004, 11 desde
+2011 y 12 desde 2016), así que comparar las apariciones de cada estrella con
+1/12 de todo el histórico penaliza a las estrellas 10 a 12, que no existían al
+principio. Aquí la frecuencia esperada de cada estrella se suma etapa por
+etapa: en una etapa de `sorteos` sorteos con un bombo de `n` estrellas, cada
+estrella disponible sale en un sorteo con probabilidad 2/n.
+
+Las etapas se toman de PACKAGE_CONFIG['star_eras'] (fecha desde la que rige y
+tamaño del bombo). Si no están configuradas, o si el histórico no encaja con
+ellas (sale una estrella mayor que el bombo de su etapa, como en un histórico
+de otras reglas), se detectan de los datos: empieza una etapa nueva con el
+primer sorteo en que sale una estrella mayor que todas las anteriores. La
+fecha detectada puede ir algún sorteo por detrás del cambio real de reglas.
+
+Las apariciones de cada etapa salen del índice de sumas acumuladas del
+histórico (DrawStore.star_prefix), con dos restas por etapa:
+
+    filas = star_scores(store)    # apariciones, esperadas y puntuación z
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from . import PACKAGE_CONFIG
+
+# Puntuación z a partir de la que una estrella se considera caliente (o fría)
+HOT_COLD_Z = 1.96
+STARS_PER_DRAW = 2
+
+Era = namedtuple('Era', ['start', 'end', 'date', 'size'])
+Era.__doc__ = "Etapa del bombo: filas [start, end) del histórico, fecha de inicio y estrellas."
+
+
+def configured_eras():
+    """Etapas de PACKAGE_CONFIG como [(fecha, estrellas)], ordenadas por fecha."""
+    eras = PACKAGE_CONFIG.get('star_eras') or []
+    return sorted((np.datetime64(date, 'D'), int(size)) for date, size in eras)
+
+
+def detect_eras(store):
+    """Etapas deducidas de los datos: cada vez que sale una estrella nunca vista por encima del máximo."""
+    if not len(store):
+        return []
+    largest = np.maximum.accumulate(store.stars.max(axis=1))
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(largest)) + 1])
+    return [(store.dates[i].astype('datetime64[D]'), int(largest[i])) for i in starts]
+
+
+def _rows(store, eras):
+    """Convierte [(fecha, estrellas)] en etapas con filas del histórico, sin las vacías."""
+    if not eras:
+        return []
+    dates = np.array([date for date, _ in eras], dtype='datetime64[D]')
+    bounds = np.searchsorted(store.dates, dates, side='left')
+    # Los sorteos anteriores a la primera fecha cuentan como de la primera etapa
+    bounds[0] = 0
+    ends = np.append(bounds[1:], len(store))
+    return [Era(int(start), int(end), date, size)
+            for start, end, (date, size) in zip(bounds, ends, eras) if end > start]
+
+
+def _fits(store, eras):
+    return bool(eras) and all(
+        era.size <= PACKAGE_CONFIG['max_stars'] and
+        (store.stars[era.start:era.end] <= era.size).all()
+        for era in eras)
+
+
+def resolve_eras(store, eras=None):
+    """
+    Etapas del bombo aplicables a `store`.
+
+    `eras` ([(fecha, estrellas)]) tiene prioridad; si no se indica se usan las
+    configuradas y, si no encajan con los datos, las detectadas.
+    """
+    if eras is not None:
+        resolved = _rows(store, sorted((np.datetime64(d, 'D'), int(s)) for d, s in eras))
+        if not _fits(store, resolved):
+            raise ValueError("Las etapas indicadas no encajan con las estrellas del histórico")
+        return resolved
+    resolved = _rows(store, configured_eras())
+    return resolved if _fits(store, resolved) else _rows(store, detect_eras(store))
+
+
+def _expected(eras, start, end, size):
+    """Apariciones esperadas y varianza de cada estrella en las filas [start, end)."""
+    stars = np.arange(1, size + 1)
+    expected = np.zeros(size)
+    variance = np.zeros(size)
+    available = np.zeros(size)
+    for era in eras:
+        draws = max(0, min(era.end, end) - max(era.start, start))
+        p = STARS_PER_DRAW / era.size
+        in_pool = stars <= era.size
+        expected += in_pool * draws * p
+        variance += in_pool * draws * p * (1 - p)
+        available += in_pool * draws
+    return expected, variance, available
+
+
+def _counts(store, resolved):
+    size = PACKAGE_CONFIG['max_stars']
+    prefix = store.star_prefix
+    by_era = [{
+        'era': era,
+        'apariciones': (prefix[era.end] - prefix[era.start]).astype(np.int64),
+        'esperadas': _expected([era], era.start, era.end, size)[0]
+    } for era in resolved]
+    expected, variance, available = _expected(resolved, 0, len(store), size)
+    total = {
+        'apariciones': prefix[len(store)].astype(np.int64),
+        'esperadas': expected,
+        'varianza': variance,
+        'disponibles': available
+    }
+    return by_era, total
+
+
+def era_counts(store, eras=None):
+    """
+    Apariciones de cada estrella por etapa y en total, con lo esperado.
+
+    Retorna (etapas, total): cada etapa es un dict con 'era', 'apariciones'
+    y 'esperadas'; `total` tiene arrays de 12 valores 'apariciones',
+    'esperadas', 'varianza' y 'disponibles' (sorteos en que la estrella
+    estaba en el bombo).
+    """
+    return _counts(store, resolve_eras(store, eras))
+
+
+def expected_counts(store, last=None, eras=None):
+    """Apariciones esperadas de cada estrella en todo el histórico o en sus últimos `last` sorteos."""
+    start = 0 if last is None else max(len(store) - last, 0)
+    return _expected(resolve_eras(store, eras), start, len(store), PACKAGE_CONFIG['max_stars'])[0]
+
+
+def _status(score):
+    if score >= HOT_COLD_Z:
+        return 'caliente'
+    if score <= -HOT_COLD_Z:
+        return 'fría'
+    return 'normal'
+
+
+def _round(value, digits):
+    return round(float(value), digits) if np.isfinite(value) else None
+
+
+def star_scores(store, eras=None, window=20):
+    """
+    Frecuencia de cada estrella normalizada por etapas.
+
+    Por estrella: apariciones y esperadas según el bombo de cada etapa,
+    desviación (%), puntuación z frente a la binomial de cada etapa, tasa por
+    sorteo disponible y, en los últimos `window` sorteos, apariciones,
+    esperadas y puntuación z con el bombo de esos sorteos.
+    """
+    resolved = resolve_eras(store, eras)
+    _, total = _counts(store, resolved)
+    size = len(total['apariciones'])
+    start = max(len(store) - window, 0)
+    recent = (store.star_prefix[len(store)] - store.star_prefix[start]).astype(np.int64)
+    recent_expected, recent_variance, _ = _expected(resolved, start, len(store), size)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deviation = (total['apariciones'] - total['esperadas']) / total['esperadas'] * 100
+        score = (total['apariciones'] - total['esperadas']) / np.sqrt(total['varianza'])
+        rate = total['apariciones'] / total['disponibles']
+        recent_score = (recent - recent_expected) / np.sqrt(recent_variance)
+
+    return [{
+        'estrella': i + 1,
+        'apariciones': int(total['apariciones'][i]),
+        'esperadas': _round(total['esperadas'][i], 2),
+        'desviacion': _round(deviation[i], 2),
+        'puntuacion': _round(score[i], 2),
+        'estado': _status(score[i]) if np.isfinite(score[i]) else 'normal',
+        'sorteos_disponibles': int(total['disponibles'][i]),
+        'tasa': _round(rate[i], 4),
+        'recientes': int(recent[i]),
+        'recientes_esperadas': _round(recent_expected[i], 2),
+        'puntuacion_reciente': _round(recent_score[i], 2)
+    } for i in range(size)]
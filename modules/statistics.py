@@ -3,11 +3,18 @@ import numpy as np
 from tabulate import tabulate
 from datetime import datetime, timedelta
 import calendar
-from itertools import combinations, product
+from .report_planner import ReportPlanner
+from .combination_exporter import CombinationExporter
+from .frequency_service import get_service
+from .snapshot import DrawSnapshot
+from . import analogs, periodicity, queries, result_cache, star_eras, survival
 
 class Statistics:
     def __init__(self, df):
-        self.df = df
+        # Instantánea de solo lectura: acepta un DataFrame o una DrawSnapshot compartida
+        self.snapshot = DrawSnapshot.of(df)
+        self.df = self.snapshot.df
+        self.frequencies = get_service()
 
     def show_basic_stats(self):
         total_sorteos = len(self.df)
@@ -28,12 +35,8 @@ class Statistics:
         print("\n📈 ANÁLISIS DE FRECUENCIA DE NÚMEROS")
         
         # Frecuencia de números
-        numeros = []
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            numeros.extend(self.df[col].tolist())
-        
-        freq = pd.Series(numeros).value_counts()
-        total_apariciones = len(numeros)
+        freq = self.frequencies.counts(self.snapshot, 'numbers')
+        total_apariciones = len(self.df) * 5
         
         # Preparar resultados
         resultados = []
@@ -67,46 +70,59 @@ class Statistics:
         """Análisis detallado de frecuencia de estrellas."""
         print("\n⭐ ANÁLISIS DE FRECUENCIA DE ESTRELLAS")
         
-        # Frecuencia de estrellas
-        estrellas = []
-        for col in ['e1', 'e2']:
-            estrellas.extend(self.df[col].tolist())
-        
-        freq = pd.Series(estrellas).value_counts()
-        total_apariciones = len(estrellas)
+        # Frecuencia esperada según el tamaño del bombo en cada etapa
+        # (las estrellas 10 a 12 no existían al principio)
+        store = self.snapshot.store
+        por_etapa, _ = star_eras.era_counts(store)
+        puntuaciones = star_eras.star_scores(store)
         
         resultados = []
-        for num in range(1, 13):
-            frecuencia = freq.get(num, 0)
-            porcentaje = round(frecuencia/len(self.df)*100, 2)
-            esperado = total_apariciones/12
-            desviacion = round(((frecuencia - esperado)/esperado)*100, 2)
-            
+        for fila in puntuaciones:
+            desviacion = fila['desviacion']
             resultados.append([
-                num,
-                frecuencia,
-                porcentaje,
-                f"{'+' if desviacion > 0 else ''}{desviacion}%"
+                fila['estrella'],
+                fila['apariciones'],
+                round(fila['apariciones']/len(self.df)*100, 2),
+                fila['esperadas'],
+                '-' if desviacion is None else f"{'+' if desviacion > 0 else ''}{desviacion}%",
+                '-' if fila['puntuacion'] is None else fila['puntuacion'],
+                fila['estado']
             ])
         
-        print("\nFrecuencia de todas las estrellas:")
+        print("\nFrecuencia de todas las estrellas (esperada según el bombo de cada etapa):")
         print(tabulate(resultados,
-                      headers=['Estrella', 'Frecuencia', '% Sorteos', 'Desviación'],
+                      headers=['Estrella', 'Frecuencia', '% Sorteos', 'Esperada', 'Desviación',
+                               'Puntuación z', 'Estado'],
+                      tablefmt='pretty'))
+        
+        print("\nEtapas del bombo de estrellas:")
+        print(tabulate([[
+            pd.Timestamp(etapa['era'].date).strftime('%d-%m-%Y'),
+            etapa['era'].size,
+            etapa['era'].end - etapa['era'].start,
+            int(etapa['apariciones'].argmax()) + 1,
+            int(etapa['apariciones'][:etapa['era'].size].argmin()) + 1
+        ] for etapa in por_etapa],
+                      headers=['Desde', 'Estrellas', 'Sorteos', 'Más frecuente', 'Menos frecuente'],
                       tablefmt='pretty'))
+        
+        calientes = [str(f['estrella']) for f in puntuaciones if f['estado'] == 'caliente']
+        frias = [str(f['estrella']) for f in puntuaciones if f['estado'] == 'fría']
+        print(f"\nCalientes (z >= {star_eras.HOT_COLD_Z}): {', '.join(calientes) or 'ninguna'}")
+        print(f"Frías (z <= -{star_eras.HOT_COLD_Z}): {', '.join(frias) or 'ninguna'}")
 
     def temporal_analysis(self):
         """Análisis temporal detallado."""
         print("\n📅 ANÁLISIS TEMPORAL")
         
         # Análisis por día de la semana
-        self.df['dia_semana'] = self.df['fecha'].dt.day_name()
-        freq_dias = self.df['dia_semana'].value_counts()
+        freq_dias = self.snapshot.calendar['dia_semana'].value_counts()
         
         dias_semana = []
-        for dia in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']:
+        for dia in range(7):
             if dia in freq_dias:
                 dias_semana.append([
-                    calendar.day_name[calendar.day_name.index(dia)],
+                    calendar.day_name[dia],
                     freq_dias[dia],
                     round(freq_dias[dia]/len(self.df)*100, 2)
                 ])
@@ -117,8 +133,7 @@ class Statistics:
                       tablefmt='pretty'))
         
         # Análisis por mes
-        self.df['mes'] = self.df['fecha'].dt.month
-        freq_meses = self.df['mes'].value_counts()
+        freq_meses = self.snapshot.calendar['mes'].value_counts()
         
         meses = []
         for mes in range(1, 13):
@@ -296,82 +311,94 @@ class Statistics:
         print("\nRecuerda: Aunque estos patrones son interesantes, cada sorteo es independiente y aleatorio.")
         print("No hay garantía de que los patrones pasados se repitan en el futuro.")
 
+    def _cached(self, name, compute, **params):
+        """Resultado de `compute()` a través de la caché en disco (si está activa)."""
+        cache = result_cache.active()
+        if cache is None:
+            return compute()
+        return cache.cached(self.snapshot.store.version, f"Statistics.{name}", params, compute)
+
+    def _streak_tables(self):
+        """Rachas máximas de aparición y de ausencia de cada número."""
+        rachas, _, ausencias, _ = self.snapshot.store.streaks('numbers')
+        # Orden estable: a igualdad de racha, el número menor primero
+        return {
+            'rachas': [{'numero': int(i) + 1, 'racha': int(rachas[i])}
+                       for i in np.argsort(-rachas, kind='stable')],
+            'ausencias': [{'numero': int(i) + 1, 'ausencia': int(ausencias[i])}
+                          for i in np.argsort(-ausencias, kind='stable')]
+        }
+
     def streak_analysis(self):
         """Análisis de rachas y tendencias."""
         print("\n📈 ANÁLISIS DE RACHAS")
-        
+        tablas = self._cached('streak_analysis', self._streak_tables)
+
         # Rachas de aparición
         print("\n1. Rachas más largas de aparición consecutiva:")
-        rachas = {}
-        for num in range(1, 51):
-            racha_actual = 0
-            racha_maxima = 0
-            for _, row in self.df.iterrows():
-                if num in [row['n1'], row['n2'], row['n3'], row['n4'], row['n5']]:
-                    racha_actual += 1
-                    racha_maxima = max(racha_maxima, racha_actual)
-                else:
-                    racha_actual = 0
-            rachas[num] = racha_maxima
-        
-        rachas_sorted = sorted(rachas.items(), key=lambda x: x[1], reverse=True)
-        
-        print(tabulate([[num, racha] for num, racha in rachas_sorted[:10]],
+        print(tabulate([[r['numero'], r['racha']] for r in tablas['rachas'][:10]],
                       headers=['Número', 'Racha máxima'],
                       tablefmt='pretty'))
         
         # Rachas de ausencia
         print("\n2. Rachas más largas de ausencia:")
-        ausencias = {}
-        for num in range(1, 51):
-            ausencia_actual = 0
-            ausencia_maxima = 0
-            for _, row in self.df.iterrows():
-                if num not in [row['n1'], row['n2'], row['n3'], row['n4'], row['n5']]:
-                    ausencia_actual += 1
-                    ausencia_maxima = max(ausencia_maxima, ausencia_actual)
-                else:
-                    ausencia_actual = 0
-            ausencias[num] = ausencia_maxima
-        
-        ausencias_sorted = sorted(ausencias.items(), key=lambda x: x[1], reverse=True)
-        
-        print(tabulate([[num, ausencia] for num, ausencia in ausencias_sorted[:10]],
+        print(tabulate([[r['numero'], r['ausencia']] for r in tablas['ausencias'][:10]],
                       headers=['Número', 'Ausencia máxima'],
                       tablefmt='pretty'))
 
-    def get_complete_report(self):
+    def get_complete_report(self, max_workers=None):
         """Genera un informe estadístico completo."""
         print("\n📑 INFORME ESTADÍSTICO COMPLETO")
         
+        # Cada sección declara los cálculos intermedios que necesita; el
+        # planificador los calcula una sola vez y paraleliza los independientes
+        planner = ReportPlanner(self.snapshot, max_workers=max_workers)
+        planner.add_section('seccion_basicas', self.show_basic_stats)
+        planner.add_section('seccion_numeros', self._number_frequency_data,
+                            requires=['frecuencia_numeros'])
+        planner.add_section('seccion_estrellas', self._star_frequency_data,
+                            requires=['frecuencia_estrellas'])
+        planner.add_section('seccion_temporal', self._temporal_data,
+                            requires=['calendario'])
+        secciones = planner.run()
+        
         # Estadísticas básicas
-        self.show_basic_stats()
+        if secciones['seccion_basicas'] is not None:
+            print("\n📊 ESTADÍSTICAS BÁSICAS")
+            print(tabulate(secciones['seccion_basicas'], tablefmt='pretty'))
         
         # Análisis de frecuencia de números
-        self._analyze_number_frequency()
+        if secciones['seccion_numeros'] is not None:
+            self._analyze_number_frequency(secciones['seccion_numeros'])
         
         # Análisis de frecuencia de estrellas
-        self._analyze_star_frequency()
+        if secciones['seccion_estrellas'] is not None:
+            self._analyze_star_frequency(secciones['seccion_estrellas'])
         
         # Análisis temporal
-        self._analyze_temporal_patterns()
-
-    def _analyze_number_frequency(self):
-        print("\n📈 ANÁLISIS DE FRECUENCIA DE NÚMEROS")
+        if secciones['seccion_temporal'] is not None:
+            self._analyze_temporal_patterns(secciones['seccion_temporal'])
         
-        numeros = []
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            numeros.extend(self.df[col].tolist())
+        for name, error in planner.errors.items():
+            print(f"\n❌ Error en {name}: {error}")
         
-        freq = pd.Series(numeros).value_counts().sort_index()
+        planner.print_timings()
+
+    def _number_frequency_data(self, frecuencia_numeros):
         total_sorteos = len(self.df)
         expected_freq = total_sorteos * 5 / 50  # Frecuencia esperada si fuera uniforme
         
         freq_data = []
-        for num, count in freq.items():
+        for num, count in frecuencia_numeros.items():
+            if count == 0:
+                continue
             percentage = (count / total_sorteos) * 100
             deviation = ((count - expected_freq) / expected_freq) * 100
             freq_data.append([num, count, f"{percentage:.2f}", f"{deviation:+.2f}%"])
+        return freq_data
+
+    def _analyze_number_frequency(self, freq_data):
+        print("\n📈 ANÁLISIS DE FRECUENCIA DE NÚMEROS")
         
         print("\nTop 10 números más frecuentes:")
         print(tabulate(sorted(freq_data, key=lambda x: x[1], reverse=True)[:10],
@@ -383,65 +410,53 @@ class Statistics:
                        headers=['Número', 'Frecuencia', '% Sorteos', 'Desviación'],
                        tablefmt='pretty'))
 
-    def _analyze_star_frequency(self):
-        print("\n⭐ ANÁLISIS DE FRECUENCIA DE ESTRELLAS")
-        
-        estrellas = []
-        for col in ['e1', 'e2']:
-            estrellas.extend(self.df[col].tolist())
-        
-        freq = pd.Series(estrellas).value_counts().sort_index()
+    def _star_frequency_data(self, frecuencia_estrellas):
         total_sorteos = len(self.df)
-        expected_freq = total_sorteos * 2 / 12  # Frecuencia esperada si fuera uniforme
+        # Frecuencia esperada según el bombo de cada etapa
+        esperadas = star_eras.expected_counts(self.snapshot.store)
         
         freq_data = []
-        for star, count in freq.items():
+        for star, count in frecuencia_estrellas.items():
+            if count == 0:
+                continue
             percentage = (count / total_sorteos) * 100
-            deviation = ((count - expected_freq) / expected_freq) * 100
+            deviation = ((count - esperadas[star - 1]) / esperadas[star - 1]) * 100
             freq_data.append([star, count, f"{percentage:.2f}", f"{deviation:+.2f}%"])
+        return freq_data
+
+    def _analyze_star_frequency(self, freq_data):
+        print("\n⭐ ANÁLISIS DE FRECUENCIA DE ESTRELLAS")
         
         print("\nFrecuencia de todas las estrellas:")
         print(tabulate(freq_data,
                        headers=['Estrella', 'Frecuencia', '% Sorteos', 'Desviación'],
                        tablefmt='pretty'))
 
-    def _analyze_temporal_patterns(self):
-        print("\n📅 ANÁLISIS TEMPORAL")
+    def _temporal_data(self, calendario):
+        total_sorteos = len(self.df)
         
-        # Análisis por día de la semana
-        day_counts = self.df['fecha'].dt.dayofweek.value_counts().sort_index()
-        day_percentages = (day_counts / len(self.df) * 100).round(2)
+        def distribucion(serie, nombre):
+            counts = serie.value_counts().sort_index()
+            percentages = (counts / total_sorteos * 100).round(2)
+            return [[nombre(valor), count, f"{percentages[valor]}%"] for valor, count in counts.items()]
         
-        print("\nDistribución por día de la semana:")
-        day_data = []
-        for day, count in day_counts.items():
-            day_name = calendar.day_name[day]
-            percentage = day_percentages[day]
-            day_data.append([day_name, count, f"{percentage}%"])
-        print(tabulate(day_data, headers=['Día', 'Conteo', 'Porcentaje'], tablefmt='pretty'))
+        return {
+            'dias': distribucion(calendario['dia_semana'], lambda d: calendar.day_name[d]),
+            'meses': distribucion(calendario['mes'], lambda m: calendar.month_name[m]),
+            'años': distribucion(calendario['año'], lambda a: a)
+        }
+
+    def _analyze_temporal_patterns(self, temporal_data):
+        print("\n📅 ANÁLISIS TEMPORAL")
         
-        # Análisis por mes
-        month_counts = self.df['fecha'].dt.month.value_counts().sort_index()
-        month_percentages = (month_counts / len(self.df) * 100).round(2)
+        print("\nDistribución por día de la semana:")
+        print(tabulate(temporal_data['dias'], headers=['Día', 'Conteo', 'Porcentaje'], tablefmt='pretty'))
         
         print("\nDistribución por mes:")
-        month_data = []
-        for month, count in month_counts.items():
-            month_name = calendar.month_name[month]
-            percentage = month_percentages[month]
-            month_data.append([month_name, count, f"{percentage}%"])
-        print(tabulate(month_data, headers=['Mes', 'Conteo', 'Porcentaje'], tablefmt='pretty'))
-        
-        # Análisis por año
-        year_counts = self.df['fecha'].dt.year.value_counts().sort_index()
-        year_percentages = (year_counts / len(self.df) * 100).round(2)
+        print(tabulate(temporal_data['meses'], headers=['Mes', 'Conteo', 'Porcentaje'], tablefmt='pretty'))
         
         print("\nDistribución por año:")
-        year_data = []
-        for year, count in year_counts.items():
-            percentage = year_percentages[year]
-            year_data.append([year, count, f"{percentage}%"])
-        print(tabulate(year_data, headers=['Año', 'Conteo', 'Porcentaje'], tablefmt='pretty'))
+        print(tabulate(temporal_data['años'], headers=['Año', 'Conteo', 'Porcentaje'], tablefmt='pretty'))
 
     def quick_stats(self):
         """Genera un informe rápido con estadísticas básicas y datos adicionales."""
@@ -465,10 +480,7 @@ class Statistics:
         print(tabulate(stats, tablefmt='pretty'))
 
         # Top 3 números más frecuentes
-        numeros = []
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            numeros.extend(self.df[col].tolist())
-        freq_numeros = pd.Series(numeros).value_counts()
+        freq_numeros = self.frequencies.counts(self.snapshot, 'numbers')
         
         print("\nTop 3 números más frecuentes:")
         for num, count in freq_numeros.head(3).items():
@@ -476,10 +488,7 @@ class Statistics:
             print(f"Número {num}: {count} veces ({percentage:.2f}%)")
 
         # Top 2 estrellas más frecuentes
-        estrellas = []
-        for col in ['e1', 'e2']:
-            estrellas.extend(self.df[col].tolist())
-        freq_estrellas = pd.Series(estrellas).value_counts()
+        freq_estrellas = self.frequencies.counts(self.snapshot, 'stars')
         
         print("\nTop 2 estrellas más frecuentes:")
         for star, count in freq_estrellas.head(2).items():
@@ -519,18 +528,10 @@ class Statistics:
         ultimos = self.df.head(n_sorteos)
         
         # Números que están apareciendo más
-        numeros_recientes = []
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            numeros_recientes.extend(ultimos[col].tolist())
-        
-        freq_reciente = pd.Series(numeros_recientes).value_counts()
+        freq_reciente = self.frequencies.counts(self.snapshot, 'numbers', window=n_sorteos)
         
         # Comparar con frecuencia histórica
-        numeros_historicos = []
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            numeros_historicos.extend(self.df[col].tolist())
-        
-        freq_historica = pd.Series(numeros_historicos).value_counts()
+        freq_historica = self.frequencies.counts(self.snapshot, 'numbers')
         
         # Calcular tendencias
         tendencias = []
@@ -572,6 +573,42 @@ class Statistics:
         suma_promedio = sum(sumas_recientes)/len(sumas_recientes)
         print(f"Suma total promedio: {round(suma_promedio, 2)}")
 
+        self._print_analog_periods(n_sorteos)
+
+    def _print_analog_periods(self, n_sorteos, top=5):
+        """Periodos pasados con una trayectoria de rasgos parecida a la reciente y lo que vino después."""
+        try:
+            resultado = queries.analog_periods(self.snapshot.store, window=n_sorteos, top=top)
+        except ValueError as e:
+            print(f"\nPeriodos análogos: {e}")
+            return
+
+        columnas = analogs.TRAJECTORY_COLUMNS
+        print(f"\nPeriodos análogos a los últimos {n_sorteos} sorteos "
+              f"(trayectoria de {', '.join(columnas)}):")
+        tabla = []
+        for fila in resultado['analogos']:
+            siguiente = ' / '.join(
+                f"{'-'.join(map(str, s['numeros']))} + {'-'.join(map(str, s['estrellas']))}"
+                for s in fila['siguientes'])
+            tabla.append([f"{fila['desde']} a {fila['hasta']}", fila['distancia'], siguiente] +
+                         [fila['rasgos_siguientes'][c] for c in columnas])
+        print(tabulate(tabla,
+                      headers=['Periodo', 'Distancia', 'Sorteo siguiente', 'Suma', 'Pares',
+                               'Decenas', 'Repetidos'],
+                      tablefmt='pretty'))
+
+        if resultado['media_siguientes']:
+            comparacion = [
+                ['Últimos sorteos'] + [resultado['ventana']['rasgos'][c] for c in columnas],
+                ['Tras los análogos'] + [resultado['media_siguientes'][c] for c in columnas],
+                ['Histórico'] + [resultado['media_historica'][c] for c in columnas]
+            ]
+            print("\nRasgos medios:")
+            print(tabulate(comparacion,
+                          headers=['', 'Suma', 'Pares', 'Decenas', 'Repetidos'],
+                          tablefmt='pretty'))
+
     def get_star_patterns(self):
         """Análisis específico de patrones en las estrellas."""
         print("\n⭐ PATRONES DE ESTRELLAS")
@@ -622,20 +659,17 @@ class Statistics:
         """Análisis de huecos entre apariciones de números."""
         print("\n📊 ANÁLISIS DE HUECOS ENTRE APARICIONES")
         
+        numeros, huecos = survival.gap_lengths(self.snapshot.store, 'numbers')
+
         resultados = []
         for numero in range(1, 51):
-            apariciones = []
-            for idx, row in self.df.iterrows():
-                if numero in [row['n1'], row['n2'], row['n3'], row['n4'], row['n5']]:
-                    apariciones.append(idx)
-            
-            if len(apariciones) >= 2:
-                huecos = [apariciones[i] - apariciones[i+1] for i in range(len(apariciones)-1)]
+            huecos_numero = huecos[numeros == numero - 1]
+            if len(huecos_numero) >= 1:
                 resultados.append([
                     numero,
-                    round(sum(huecos)/len(huecos), 2),
-                    min(huecos),
-                    max(huecos)
+                    round(float(huecos_numero.sum()) / len(huecos_numero), 2),
+                    int(huecos_numero.min()),
+                    int(huecos_numero.max())
                 ])
         
         resultados.sort(key=lambda x: x[1])  # Ordenar por hueco promedio
@@ -645,6 +679,33 @@ class Statistics:
                       headers=['Número', 'Hueco Promedio', 'Mínimo', 'Máximo'],
                       tablefmt='pretty'))
 
+    def get_survival_analysis(self, top=10, bootstrap=survival.DEFAULT_BOOTSTRAP, seed=0):
+        """Números y estrellas más atrasados según su curva de supervivencia."""
+        print("\n📊 ANÁLISIS DE SUPERVIVENCIA")
+        print("Supervivencia: fracción de huecos históricos tan largos como la ausencia actual.")
+        print("Riesgo: probabilidad histórica de salir en el próximo sorteo tras esa ausencia.")
+
+        for pool, valor, titulo in (('numbers', 'Número', 'Números más atrasados'),
+                                    ('stars', 'Estrella', 'Estrellas más atrasadas')):
+            filas = self._cached('get_survival_analysis',
+                                 lambda: survival.overdue_table(self.snapshot.store, pool, bootstrap, seed),
+                                 pool=pool, bootstrap=bootstrap, seed=seed)
+            tabla = [[
+                fila[survival.POOL_LABELS[pool]],
+                fila['sin_salir'],
+                fila['hueco_medio'],
+                f"{fila['supervivencia']} [{fila['supervivencia_min']}-{fila['supervivencia_max']}]",
+                fila['supervivencia_geometrica'],
+                f"{fila['riesgo']} [{fila['riesgo_min']}-{fila['riesgo_max']}]",
+                fila['riesgo_geometrico'],
+                fila['sorteos_esperados']
+            ] for fila in filas[:top]]
+            print(f"\n{titulo} respecto a lo esperado:")
+            print(tabulate(tabla,
+                          headers=[valor, 'Sin salir', 'Hueco medio', 'Supervivencia (IC 95%)',
+                                   'Geométrica', 'Riesgo (IC 95%)', 'Riesgo geom.', 'Sorteos esperados'],
+                          tablefmt='pretty'))
+
     def get_custom_range_analysis(self, start_date, end_date):
         """Análisis para un rango de fechas específico."""
         rango_df = self.df[
@@ -660,11 +721,7 @@ class Statistics:
         print(f"Sorteos analizados: {len(rango_df)}")
         
         # Números más frecuentes en el rango
-        numeros_rango = []
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            numeros_rango.extend(rango_df[col].tolist())
-        
-        freq_rango = pd.Series(numeros_rango).value_counts()
+        freq_rango = self.frequencies.counts(self.snapshot, 'numbers', start=start_date, end=end_date)
         
         print("\nNúmeros más frecuentes en el periodo:")
         for num, freq in freq_rango.head(10).items():
@@ -672,11 +729,7 @@ class Statistics:
         
         # Comparar con estadísticas globales
         print("\nComparación con estadísticas globales:")
-        numeros_global = []
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            numeros_global.extend(self.df[col].tolist())
-        
-        freq_global = pd.Series(numeros_global).value_counts()
+        freq_global = self.frequencies.counts(self.snapshot, 'numbers')
         
         comparacion = []
         for num in freq_rango.head(10).index:
@@ -747,13 +800,46 @@ class Statistics:
                 intervalos = apariciones.diff().dt.days.dropna()
                 print(f"Número {num}: Intervalo promedio = {intervalos.mean():.2f} días, Máximo = {intervalos.max()} días")
 
-    def get_probability_analysis(self):
-        """Análisis de probabilidades condicionales."""
-        print("\n🎲 ANÁLISIS DE PROBABILIDADES CONDICIONALES")
-
-        # 1. Probabilidad después de números específicos
-        print("\n1. Probabilidades después de números específicos:")
-        
+        self._print_periodicity()
+
+    def _print_periodicity(self, top=10, permutations=periodicity.DEFAULT_PERMUTATIONS, seed=0):
+        """Periodo dominante de cada número y estrella frente a permutaciones de los sorteos."""
+        tablas = self._cached('periodicity',
+                              lambda: periodicity.scan(self.snapshot.store, permutations, seed),
+                              permutations=permutations, seed=seed)
+        print("\nPeriodicidad (análisis espectral):")
+        print("Potencia: pico del periodograma (1 = lo esperado sin ciclos). "
+              f"Umbral: 95% del máximo en {permutations} permutaciones de los sorteos.")
+
+        for pool, valor, titulo, filas in (('numbers', 'Número', 'Números', top),
+                                           ('stars', 'Estrella', 'Estrellas', top // 2)):
+            tabla = [[
+                fila[survival.POOL_LABELS[pool]],
+                fila['periodo'],
+                fila['periodo_dias'],
+                fila['potencia'],
+                fila['umbral'],
+                fila['p_valor'],
+                fila['p_ajustado'],
+                fila['autocorrelacion']
+            ] for fila in tablas[pool][:filas]]
+            print(f"\n{titulo} con la periodicidad más marcada:")
+            print(tabulate(tabla,
+                          headers=[valor, 'Periodo (sorteos)', 'Periodo (días)', 'Potencia', 'Umbral',
+                                   'p-valor', 'p ajustado', 'Autocorrelación'],
+                          tablefmt='pretty'))
+
+        significativos = [str(fila[survival.POOL_LABELS[pool]]) for pool in ('numbers', 'stars')
+                          for fila in tablas[pool] if fila['significativo']]
+        if significativos:
+            print(f"\nPeriodicidad significativa (p ajustado < {periodicity.ALPHA}): {', '.join(significativos)}")
+        else:
+            print(f"\nNingún número ni estrella muestra una periodicidad significativa "
+                  f"(p ajustado < {periodicity.ALPHA}).")
+
+    def _probability_tables(self):
+        """Números más frecuentes tras cada número y repeticiones entre sorteos consecutivos."""
+        siguientes = []
         for num in range(1, 51):
             siguiente_sorteo = []
             numero_anterior = False
@@ -766,12 +852,10 @@ class Statistics:
             if siguiente_sorteo:
                 freq = pd.Series(siguiente_sorteo).value_counts()
                 if len(freq) >= 5:  # Solo mostrar si hay suficientes datos
-                    print(f"\nDespués del número {num}, los más probables son:")
                     for n, c in freq.head().items():
-                        print(f"Número {n}: {round(c/len(siguiente_sorteo)*100, 2)}%")
+                        siguientes.append({'numero': num, 'siguiente': int(n),
+                                           'porcentaje': float(round(c/len(siguiente_sorteo)*100, 2))})
 
-        # 2. Análisis de transiciones
-        print("\n2. Probabilidades de transición entre sorteos:")
         transiciones = []
         for i in range(len(self.df)-1):
             sorteo_actual = set([self.df.iloc[i][f'n{j}'] for j in range(1, 6)])
@@ -780,28 +864,44 @@ class Statistics:
             transiciones.append(numeros_repetidos)
 
         freq_transiciones = pd.Series(transiciones).value_counts().sort_index()
+        return {
+            'siguientes': siguientes,
+            'transiciones': [{'repetidos': int(nums), 'veces': int(freq),
+                              'porcentaje': float(round(freq/len(transiciones)*100, 2))}
+                             for nums, freq in freq_transiciones.items()]
+        }
+
+    def get_probability_analysis(self):
+        """Análisis de probabilidades condicionales."""
+        print("\n🎲 ANÁLISIS DE PROBABILIDADES CONDICIONALES")
+        tablas = self._cached('get_probability_analysis', self._probability_tables)
+
+        # 1. Probabilidad después de números específicos
+        print("\n1. Probabilidades después de números específicos:")
+        anterior = None
+        for fila in tablas['siguientes']:
+            if fila['numero'] != anterior:
+                print(f"\nDespués del número {fila['numero']}, los más probables son:")
+                anterior = fila['numero']
+            print(f"Número {fila['siguiente']}: {fila['porcentaje']}%")
+
+        # 2. Análisis de transiciones
+        print("\n2. Probabilidades de transición entre sorteos:")
         print("\nNúmeros que se repiten entre sorteos consecutivos:")
-        for nums, freq in freq_transiciones.items():
-            print(f"{nums} números: {freq} veces ({round(freq/len(transiciones)*100, 2)}%)")
+        for fila in tablas['transiciones']:
+            print(f"{fila['repetidos']} números: {fila['veces']} veces ({fila['porcentaje']}%)")
 
     def get_seasonal_analysis(self):
         """Análisis de patrones estacionales."""
         print("\n🌞 ANÁLISIS ESTACIONAL")
 
-        # Añadir información temporal
-        self.df['año'] = self.df['fecha'].dt.year
-        self.df['mes'] = self.df['fecha'].dt.month
-        self.df['estacion'] = self.df['fecha'].dt.month.map(
-            {12: 'Invierno', 1: 'Invierno', 2: 'Invierno',
-             3: 'Primavera', 4: 'Primavera', 5: 'Primavera',
-             6: 'Verano', 7: 'Verano', 8: 'Verano',
-             9: 'Otoño', 10: 'Otoño', 11: 'Otoño'}
-        )
+        # Información temporal precalculada en la instantánea
+        calendario = self.snapshot.calendar
 
         # Análisis por estación
         print("\n1. Números más frecuentes por estación:")
         for estacion in ['Primavera', 'Verano', 'Otoño', 'Invierno']:
-            sorteos_estacion = self.df[self.df['estacion'] == estacion]
+            sorteos_estacion = self.df[calendario['estacion'] == estacion]
             numeros = []
             for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
                 numeros.extend(sorteos_estacion[col].tolist())
@@ -815,7 +915,7 @@ class Statistics:
         print("\n2. Patrones mensuales:")
         patrones_mensuales = {}
         for mes in range(1, 13):
-            sorteos_mes = self.df[self.df['mes'] == mes]
+            sorteos_mes = self.df[calendario['mes'] == mes]
             numeros = []
             for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
                 numeros.extend(sorteos_mes[col].tolist())
@@ -836,8 +936,8 @@ class Statistics:
 
         # 3. Tendencias anuales
         print("\n3. Tendencias anuales:")
-        for año in sorted(self.df['año'].unique()):
-            sorteos_año = self.df[self.df['año'] == año]
+        for año in sorted(calendario['año'].unique()):
+            sorteos_año = self.df[calendario['año'] == año]
             numeros = []
             for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
                 numeros.extend(sorteos_año[col].tolist())
@@ -854,11 +954,7 @@ class Statistics:
         print(f"\n🔢 NÚMEROS MÁS FRECUENTES (Top {top_numbers})")
         
         # Contar frecuencias de números
-        todos_numeros = []
-        for col in ['n1', 'n2', 'n3', 'n4', 'n5']:
-            todos_numeros.extend(self.df[col].tolist())
-        
-        freq_numeros = pd.Series(todos_numeros).value_counts()
+        freq_numeros = self.frequencies.counts(self.snapshot, 'numbers')
         
         # Preparar resultados de números
         resultados_numeros = []
@@ -874,11 +970,7 @@ class Statistics:
                        tablefmt='pretty'))
         
         # Contar frecuencias de estrellas
-        todas_estrellas = []
-        for col in ['e1', 'e2']:
-            todas_estrellas.extend(self.df[col].tolist())
-        
-        freq_estrellas = pd.Series(todas_estrellas).value_counts()
+        freq_estrellas = self.frequencies.counts(self.snapshot, 'stars')
         
         # Preparar resultados de estrellas
         resultados_estrellas = []
@@ -899,38 +991,24 @@ class Statistics:
         respuesta = input("Ingrese 'S' para sí, cualquier otra tecla para no: ").strip().upper()
         
         if respuesta == 'S':
-            combinaciones_numeros = list(combinations(numeros_frecuentes, 5))
-            combinaciones_estrellas = list(combinations(estrellas_frecuentes, 2))
-            
-            todas_combinaciones = list(product(combinaciones_numeros, combinaciones_estrellas))
-            
-            df_combinaciones = pd.DataFrame([
-                (*nums, *stars) for nums, stars in todas_combinaciones
-            ], columns=['n1', 'n2', 'n3', 'n4', 'n5', 'e1', 'e2'])
+            # Las combinaciones se generan y escriben por bloques, sin
+            # materializar la lista completa en memoria
+            exporter = CombinationExporter(numeros_frecuentes, estrellas_frecuentes)
             
-            print(f"\nSe han generado {len(todas_combinaciones)} combinaciones.")
+            print(f"\nSe generarán {exporter.total_rows} combinaciones.")
             print("\n¿En qué formato desea exportar las combinaciones?")
-            print("1. Excel")
-            print("2. CSV")
-            print("3. JSON")
+            formatos = {'1': 'excel', '2': 'csv', '3': 'jsonl', '4': 'parquet'}
+            for opcion, formato in formatos.items():
+                tamaño = exporter.estimate_size(formato) / 1024 / 1024
+                aproximado = '' if formato in ('csv', 'jsonl') else '~'
+                print(f"{opcion}. {formato.upper()} ({aproximado}{tamaño:.1f} MB)")
             
-            opcion = input("Seleccione una opción (1-3): ").strip()
+            opcion = input("Seleccione una opción (1-4): ").strip()
+            if opcion not in formatos:
+                print("Opción no válida. No se ha realizado la exportación.")
+                return
             
             filename = input("Ingrese el nombre del archivo (sin extensión): ").strip()
-            
-            try:
-                if opcion == '1':
-                    df_combinaciones.to_excel(f"{filename}.xlsx", index=False)
-                    print(f"Combinaciones exportadas a {filename}.xlsx")
-                elif opcion == '2':
-                    df_combinaciones.to_csv(f"{filename}.csv", index=False)
-                    print(f"Combinaciones exportadas a {filename}.csv")
-                elif opcion == '3':
-                    df_combinaciones.to_json(f"{filename}.json", orient='records')
-                    print(f"Combinaciones exportadas a {filename}.json")
-                else:
-                    print("Opción no válida. No se ha realizado la exportación.")
-            except Exception as e:
-                print(f"Error al exportar: {str(e)}")
-
-
+            formato = formatos[opcion]
+            success, message = exporter.export(f"{filename}{exporter.FORMATS[formato]}", formato)
+            print(f"{'✅' if success else '❌'} {message}")
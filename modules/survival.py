@@ -0,0 +1,180 @@
+"""
+Análisis de supervivencia de la reaparición de números y estrellas.
+
+Cada aparición de un valor cierra un hueco: los sorteos transcurridos desde su
+aparición anterior. Con los huecos de todo el histórico se estima, para cada
+valor a la vez (una matriz valores x longitud de hueco):
+
+- la función de supervivencia empírica S(d) = P(hueco > d);
+- el riesgo (hazard) h(d) = P(hueco = d | hueco >= d), la probabilidad de
+  salir en el sorteo d-ésimo tras haber aguantado d - 1 sin salir;
+- una referencia geométrica común, h(d) = p y S(d) = (1 - p)^d, con p
+  estimada de todos los huecos del bombo (1 / hueco medio).
+
+La edad actual de cada valor (sorteos sin salir, DrawStore.ages) se compara
+con su propia supervivencia: S(edad) es la fracción de huecos históricos que
+llegaron a ser tan largos. Cuanto menor, más "atrasado" está el valor respecto
+a su historia. Las bandas de confianza salen de un bootstrap de los huecos de
+cada valor; como solo dependen de cuántos huecos quedan por debajo, en y por
+encima de la edad, cada réplica es una extracción multinomial y las réplicas se
+reparten en bloques entre varios hilos, con semillas derivadas de una sola
+(SeedSequence.spawn) para que el resultado no dependa del número de hilos.
+
+    filas = overdue_table(store, 'numbers', bootstrap=2000, seed=0)
+"""
+import os
+import warnings
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+POOL_LABELS = {
+    'numbers': 'numero',
+    'stars': 'estrella'
+}
+DEFAULT_BOOTSTRAP = 1000
+# Réplicas por bloque: el reparto entre hilos no cambia los números aleatorios
+BOOTSTRAP_CHUNK = 250
+CONFIDENCE = 0.95
+
+SurvivalFit = namedtuple('SurvivalFit', ['counts', 'totals', 'survival', 'hazard', 'p', 'ages'])
+SurvivalFit.__doc__ = """
+Ajuste de supervivencia de un bombo.
+
+counts: huecos de cada longitud (valores x longitud, la columna 0 sin usar).
+totals: huecos completos de cada valor. survival/hazard: S(d) y h(d) por
+valor. p: probabilidad de la referencia geométrica. ages: sorteos que lleva
+sin salir cada valor.
+"""
+
+
+def gap_lengths(store, pool='numbers'):
+    """
+    Huecos completos del histórico como (valores, longitudes), en orden cronológico.
+
+    El hueco de una aparición es la edad del valor en el sorteo anterior más
+    uno; las primeras apariciones no cierran ningún hueco y se omiten.
+    """
+    ages = store.ages(pool)
+    if len(ages) < 2:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64)
+    gaps = ages[:-1].astype(np.int64) + 1
+    closed = store.occurrence(pool)[1:] & (gaps <= np.arange(1, len(ages))[:, None])
+    rows, values = np.nonzero(closed)
+    return values, gaps[rows, values]
+
+
+def fit(store, pool='numbers'):
+    """Supervivencia y riesgo empíricos de cada valor y referencia geométrica común."""
+    size = store.ages(pool).shape[1]
+    values, lengths = gap_lengths(store, pool)
+    longest = int(lengths.max()) if len(lengths) else 0
+    counts = np.zeros((size, longest + 2), dtype=np.int64)
+    np.add.at(counts, (values, lengths), 1)
+    totals = counts.sum(axis=1)
+
+    # Huecos que llegan a d (>= d) y que lo superan (> d)
+    reaching = totals[:, None] - np.cumsum(counts, axis=1) + counts
+    with np.errstate(divide='ignore', invalid='ignore'):
+        survival = np.where(totals[:, None] > 0, (reaching - counts) / totals[:, None], np.nan)
+        hazard = np.where(reaching > 0, counts / reaching, np.nan)
+    p = 1 / lengths.mean() if len(lengths) else np.nan
+    ages = store.ages(pool)[-1].astype(np.int64) if len(store) else np.zeros(size, dtype=np.int64)
+    return SurvivalFit(counts, totals, survival, hazard, p, ages)
+
+
+def _outcomes(model):
+    """Huecos por debajo de, en, y por encima de la edad actual + 1, por valor."""
+    d = np.arange(model.counts.shape[1])
+    next_draw = model.ages[:, None] + 1
+    shorter = (model.counts * (d < next_draw)).sum(axis=1)
+    at = (model.counts * (d == next_draw)).sum(axis=1)
+    return np.stack([shorter, at, model.totals - shorter - at], axis=1)
+
+
+def _bootstrap_chunk(seed, replicas, totals, probabilities):
+    rng = np.random.default_rng(seed)
+    draws = rng.multinomial(totals, probabilities, size=(replicas, len(totals)))
+    survived = draws[..., 1] + draws[..., 2]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return survived / totals, draws[..., 1] / survived
+
+
+def bootstrap_bands(model, replicas=DEFAULT_BOOTSTRAP, seed=0, workers=None):
+    """
+    Intervalos bootstrap de S(edad) y h(edad + 1) de cada valor.
+
+    Retorna dos matrices (valores x 2) con los percentiles de CONFIDENCE.
+    """
+    outcomes = _outcomes(model)
+    totals = model.totals
+    with np.errstate(divide='ignore', invalid='ignore'):
+        probabilities = np.where(totals[:, None] > 0, outcomes / totals[:, None], [1.0, 0.0, 0.0])
+
+    chunks = [min(BOOTSTRAP_CHUNK, replicas - start) for start in range(0, replicas, BOOTSTRAP_CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunks))
+    workers = workers or min(len(chunks), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max(workers, 1)) as pool:
+        parts = list(pool.map(_bootstrap_chunk, seeds, chunks,
+                              [totals] * len(chunks), [probabilities] * len(chunks)))
+
+    tail = (1 - CONFIDENCE) / 2 * 100
+    bands = []
+    for index in range(2):
+        samples = np.concatenate([part[index] for part in parts])
+        with warnings.catch_warnings():
+            # Valores sin huecos: todas las réplicas son NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            bands.append(np.nanpercentile(samples, [tail, 100 - tail], axis=0).T)
+    return bands[0], bands[1]
+
+
+def _round(value, digits=4):
+    return None if value is None or np.isnan(value) else round(float(value), digits)
+
+
+def overdue_table(store, pool='numbers', bootstrap=DEFAULT_BOOTSTRAP, seed=0, workers=None, top=None):
+    """
+    Tabla de valores "atrasados" frente a lo esperado.
+
+    Ordena por la supervivencia empírica de la edad actual (de menor a mayor:
+    los que llevan más tiempo sin salir en relación con sus propios huecos) y
+    añade la referencia geométrica, el riesgo de salir en el próximo sorteo y
+    los sorteos que cabe esperar hasta la próxima aparición.
+    """
+    model = fit(store, pool)
+    survival_band, hazard_band = bootstrap_bands(model, bootstrap, seed, workers)
+    outcomes = _outcomes(model)
+    lengths = np.arange(model.counts.shape[1])
+
+    rows = []
+    for v in range(len(model.ages)):
+        age, total = int(model.ages[v]), int(model.totals[v])
+        _, at, longer = outcomes[v]
+        survived = at + longer
+        survival = survived / total if total else np.nan
+        hazard = at / survived if survived else np.nan
+        # Sorteos que faltan, de media, entre los huecos que superaron la edad actual
+        remaining = ((model.counts[v] * (lengths - age)) * (lengths > age)).sum() / survived \
+            if survived else np.nan
+        rows.append({
+            POOL_LABELS[pool]: v + 1,
+            'sin_salir': age,
+            'huecos': total,
+            'hueco_medio': _round((model.counts[v] * lengths).sum() / total if total else np.nan, 2),
+            'supervivencia': _round(survival),
+            'supervivencia_min': _round(survival_band[v, 0]),
+            'supervivencia_max': _round(survival_band[v, 1]),
+            'supervivencia_geometrica': _round((1 - model.p) ** age),
+            'riesgo': _round(hazard),
+            'riesgo_min': _round(hazard_band[v, 0]),
+            'riesgo_max': _round(hazard_band[v, 1]),
+            'riesgo_geometrico': _round(model.p),
+            'sorteos_esperados': _round(remaining, 2),
+            'sorteos_esperados_geometrica': _round(1 / model.p, 2)
+        })
+
+    # Sin huecos no hay supervivencia que comparar: al final
+    rows.sort(key=lambda r: (r['supervivencia'] is None, r['supervivencia'] or 0, -r['sin_salir']))
+    return rows[:top] if top is not None else rows
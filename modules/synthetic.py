@@ -0,0 +1,246 @@
+"""
+Generador de históricos sintéticos para pruebas de escala y de carga.
+
+Produce sorteos justos o sesgados que siguen el calendario real (viernes desde
+2004 y también martes desde mayo de 2011) y los cambios del bombo de
+estrellas (9, 11 y 12 estrellas). Escribe el CSV con el formato exacto que
+espera DataLoader o el formato binario de DrawStore:
+
+    python main.py synth historico.csv --draws 100000
+    python main.py synth historico.npy --draws 10000000 --seed 1
+    python main.py synth sesgado.csv --years 50 --hot-numbers 7 23 --bias 1.5
+
+Todo se genera por bloques y de forma vectorizada, así que la memoria no
+depende del número de sorteos.
+"""
+import os
+from math import comb
+
+import numpy as np
+
+from . import PACKAGE_CONFIG
+from .combinatorics import unrank_combinations
+from .draw_parser import CSV_HEADER, LINE_WIDTH, encode_rows
+from .draw_store import BINARY_DTYPE, DrawStore
+
+FORMATS = ['csv', 'npy']
+
+
+def _day(value):
+    return np.datetime64(value, 'D')
+
+
+def _draw_dates_from(first_day, count):
+    """Las `count` primeras fechas de sorteo a partir de `first_day` (incluido)."""
+    tuesday_since = _day(PACKAGE_CONFIG['tuesday_draws_since']).astype(np.int64)
+    days = np.datetime64(first_day, 'D').astype(np.int64)
+    # Lunes de la semana de first_day (el 1970-01-01 fue jueves)
+    monday = days - (days + 3) % 7
+    # Hay al menos un sorteo por semana: count + 1 semanas bastan
+    weeks = monday + 7 * np.arange(count + 1, dtype=np.int64)
+    candidates = np.stack([weeks + 1, weeks + 4], axis=1).ravel()  # Martes y viernes
+    valid = (candidates >= days) & (((candidates - monday) % 7 == 4) | (candidates >= tuesday_since))
+    return candidates[valid][:count].astype('datetime64[D]')
+
+
+def draw_dates(start, count, chunk_size=1000000, draws_per_date=1):
+    """
+    Genera por bloques las fechas de `count` sorteos desde `start`.
+
+    Con `draws_per_date` > 1 cada fecha del calendario se repite ese número de
+    veces, para que históricos muy largos quepan en el rango de fechas del CSV.
+    """
+    day = _day(start)
+    chunk_dates = max(chunk_size // draws_per_date, 1)
+    while count > 0:
+        needed = -(-min(chunk_size, count) // draws_per_date)
+        dates = _draw_dates_from(day, min(chunk_dates, needed))
+        day = dates[-1] + 1
+        if draws_per_date > 1:
+            dates = np.repeat(dates, draws_per_date)[:count]
+        yield dates
+        count -= len(dates)
+
+
+def add_years(start, years):
+    """Fecha `years` años después de `start` (el mismo día del mes)."""
+    first = _day(start)
+    months = first.astype('datetime64[M]')
+    return (months + 12 * years).astype('datetime64[D]') + (first - months.astype('datetime64[D]'))
+
+
+def on_schedule(days):
+    """Si cada fecha (días desde 1970 o datetime64) es día de sorteo: viernes, o martes desde 2011."""
+    days = np.asarray(days)
+    if days.dtype.kind == 'M':
+        days = days.astype('datetime64[D]').astype(np.int64)
+    weekday = (days + 3) % 7  # El 1970-01-01 fue jueves
+    tuesday_since = _day(PACKAGE_CONFIG['tuesday_draws_since']).astype(np.int64)
+    return (weekday == 4) | ((weekday == 1) & (days >= tuesday_since))
+
+
+def scheduled_dates(start, end):
+    """Fechas de sorteo del calendario real entre `start` (incluido) y `end` (excluido)."""
+    first, last = _day(start).astype(np.int64), _day(end).astype(np.int64)
+    # Martes y viernes de cada semana desde el lunes de la semana de `start`
+    weeks = np.arange(first - (first + 3) % 7, last, 7, dtype=np.int64)
+    candidates = np.stack([weeks + 1, weeks + 4], axis=1).ravel()
+    valid = (candidates >= first) & (candidates < last) & on_schedule(candidates)
+    return candidates[valid].astype('datetime64[D]')
+
+
+def count_draws(start, end, draws_per_date=1):
+    """Número de sorteos del calendario real entre `start` (incluido) y `end` (excluido)."""
+    return len(scheduled_dates(start, end)) * draws_per_date
+
+
+def last_draw_date(start, count, draws_per_date=1):
+    """Fecha del último de `count` sorteos desde `start`, sin generar los sorteos."""
+    last = None
+    for dates in draw_dates(start, count, draws_per_date=draws_per_date):
+        last = dates[-1]
+    return last
+
+
+def star_pool_sizes(dates):
+    """Tamaño del bombo de estrellas vigente en cada fecha."""
+    eras = PACKAGE_CONFIG['star_eras']
+    starts = np.array([_day(d) for d, _ in eras])
+    sizes = np.array([size for _, size in eras])
+    index = np.searchsorted(starts, dates, side='right') - 1
+    return sizes[np.maximum(index, 0)]
+
+
+def _weights(weights, size, name):
+    if weights is None:
+        return None
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.shape != (size,) or (weights < 0).any() or not (weights > 0).any():
+        raise ValueError(f"Los pesos de {name} deben ser {size} valores no negativos")
+    with np.errstate(divide='ignore'):
+        return np.log(weights).astype(np.float32)
+
+
+def biased_weights(size, favored, bias):
+    """Pesos uniformes salvo los valores `favored` (1..size), multiplicados por `bias`."""
+    weights = np.ones(size)
+    for value in favored:
+        if not 1 <= value <= size:
+            raise ValueError(f"Valor fuera de rango (1-{size}): {value}")
+        weights[value - 1] = bias
+    return weights
+
+
+class SyntheticHistory:
+    """
+    Generador de sorteos sintéticos.
+
+    Sin pesos, cada sorteo es una extracción uniforme sin reemplazo: se sortea
+    el rango de la combinación y se convierte con unrank_combinations, que ya
+    la da ordenada. Con pesos, se usa el truco de Gumbel top-k: se suma ruido
+    de Gumbel al logaritmo del peso de cada bola y se toman las k mayores, lo
+    que equivale a extraer bolas una a una con probabilidad proporcional a su
+    peso.
+    """
+
+    def __init__(self, start=None, seed=None, number_weights=None, star_weights=None,
+                 chunk_size=100000, draws_per_date=1):
+        if draws_per_date < 1:
+            raise ValueError("draws_per_date debe ser al menos 1")
+        self.start = _day(start or PACKAGE_CONFIG['first_draw'])
+        self.draws_per_date = draws_per_date
+        self.rng = np.random.default_rng(seed)
+        self.number_log_weights = _weights(number_weights, PACKAGE_CONFIG['max_numbers'], 'los números')
+        self.star_log_weights = _weights(star_weights, PACKAGE_CONFIG['max_stars'], 'las estrellas')
+        self.chunk_size = chunk_size
+
+    def _uniform(self, rows, pool, k, available=None):
+        if available is None:
+            ranks = self.rng.integers(0, comb(pool, k), size=rows)
+            return (unrank_combinations(ranks, pool, k) + 1).astype(np.uint8)
+
+        chosen = np.empty((rows, k), dtype=np.uint8)
+        for size in np.unique(available):
+            mask = available == size
+            ranks = self.rng.integers(0, comb(int(size), k), size=int(mask.sum()))
+            chosen[mask] = unrank_combinations(ranks, int(size), k) + 1
+        return chosen
+
+    def _select(self, rows, pool, k, log_weights, available=None):
+        if log_weights is None:
+            return self._uniform(rows, pool, k, available)
+
+        u = self.rng.random((rows, pool), dtype=np.float32)
+        # Gumbel: -log(-log(U))
+        with np.errstate(divide='ignore'):
+            keys = log_weights - np.log(-np.log(u))
+        if available is not None:
+            keys[np.arange(pool) >= available[:, None]] = -np.inf
+        chosen = np.argpartition(-keys, k - 1, axis=1)[:, :k]
+        return np.sort(chosen + 1, axis=1).astype(np.uint8)
+
+    def chunks(self, count):
+        """Genera bloques (fechas, números, estrellas) en orden cronológico."""
+        for dates in draw_dates(self.start, count, self.chunk_size, self.draws_per_date):
+            numbers = self._select(len(dates), PACKAGE_CONFIG['max_numbers'],
+                                   PACKAGE_CONFIG['combination_size'], self.number_log_weights)
+            stars = self._select(len(dates), PACKAGE_CONFIG['max_stars'],
+                                 PACKAGE_CONFIG['stars_size'], self.star_log_weights,
+                                 available=star_pool_sizes(dates))
+            yield dates, numbers, stars
+
+    def generate(self, count):
+        """Retorna un DrawStore en memoria con `count` sorteos."""
+        parts = list(self.chunks(count))
+        return DrawStore(np.concatenate([p[0] for p in parts]),
+                         np.concatenate([p[1] for p in parts]),
+                         np.concatenate([p[2] for p in parts]))
+
+    def write_csv(self, filename, count):
+        """
+        Escribe el histórico con el formato del CSV real: el sorteo más reciente
+        primero, números con dos cifras, columna vacía y fin de línea CRLF.
+
+        Las filas tienen ancho fijo, así que cada bloque (generado en orden
+        cronológico) se escribe invertido directamente en su posición final.
+        El formato dd/mm/yyyy no admite fechas posteriores al año 9999
+        (unos 830.000 sorteos desde 2004); para más, aumenta
+        `draws_per_date` o usa el formato binario.
+        """
+        if last_draw_date(self.start, count, self.draws_per_date) > _day('9999-12-31'):
+            raise ValueError("Las fechas superarían el año 9999; usa el formato binario (.npy) "
+                             "o varios sorteos por fecha")
+        with open(filename, 'wb') as f:
+            f.write(CSV_HEADER)
+            f.truncate(len(CSV_HEADER) + count * LINE_WIDTH)
+            written = 0
+            for dates, numbers, stars in self.chunks(count):
+                rows = encode_rows(dates[::-1], numbers[::-1], stars[::-1])
+                written += len(dates)
+                f.seek(len(CSV_HEADER) + (count - written) * LINE_WIDTH)
+                f.write(rows.tobytes())
+
+    def write_binary(self, filename, count):
+        """Escribe el histórico en el formato binario de DrawStore (orden cronológico)."""
+        records = np.lib.format.open_memmap(filename, mode='w+', dtype=BINARY_DTYPE, shape=(count,))
+        position = 0
+        for dates, numbers, stars in self.chunks(count):
+            block = records[position:position + len(dates)]
+            block['fecha'] = dates
+            block['numeros'] = numbers
+            block['estrellas'] = stars
+            position += len(dates)
+        records.flush()
+        del records
+
+    def write(self, filename, count, format=None):
+        """Escribe en CSV o en binario según `format` o la extensión del archivo."""
+        format = format or ('npy' if os.path.splitext(filename)[1].lower() == '.npy' else 'csv')
+        if format not in FORMATS:
+            raise ValueError(f"Formato desconocido: {format}")
+        if format == 'csv':
+            self.write_csv(filename, count)
+        else:
+            self.write_binary(filename, count)
+        return format
+
@@ -32,7 +32,11 @@ class Visualizer:
 
     def clear_screen(self):
         """Limpia la pantalla de la consola."""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        if os.name == 'nt':
+            os.system('cls')
+        else:
+            # Secuencia ANSI: evita lanzar un proceso 'clear' en cada menú
+            print('\033[2J\033[H', end='', flush=True)
 
     def show_title(self, text):
         """Muestra un título formateado."""
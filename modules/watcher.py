@@ -0,0 +1,159 @@
+"""
+Recarga en caliente del histórico.
+
+FileWatcher vigila el archivo de sorteos (inodo, fecha de modificación y
+tamaño) y avisa cuando ha cambiado y lleva un rato sin cambiar, para no leer
+un archivo a medio escribir. reload_store compara entonces el archivo con el
+histórico cargado fila a fila (un hash de fecha, números y estrellas) y, si
+solo hay sorteos nuevos al final, los añade con DrawStore.append, que prolonga
+los índices ya construidos en lugar de recalcularlos:
+
+    watcher = FileWatcher('historico.csv')
+    watcher.start(lambda: print(reload_store(store, 'historico.csv')))
+
+La vigilancia se activa con `serve --watch` y, en el modo interactivo, con la
+variable de entorno EUROMILLONES_WATCH (segundos entre comprobaciones).
+"""
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .draw_store import DrawStore
+
+ENV_VAR = 'EUROMILLONES_WATCH'
+DEFAULT_INTERVAL = 1.0
+DEFAULT_DEBOUNCE = 0.5
+# Constante de Fibonacci: dispersa los días antes de combinarlos con el contenido
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+Reload = namedtuple('Reload', ['store', 'added', 'full'])
+Reload.__doc__ = """
+Resultado de reload_store.
+
+store: histórico actualizado (el mismo objeto si no había cambios). added:
+sorteos nuevos. full: True si hubo que recargar el archivo entero porque
+cambiaron o desaparecieron sorteos ya cargados.
+"""
+
+
+def interval_from_env():
+    """Segundos entre comprobaciones según EUROMILLONES_WATCH, o None si está desactivada."""
+    value = os.environ.get(ENV_VAR, '').strip().lower()
+    if value in ('', '0', 'false', 'no'):
+        return None
+    try:
+        return max(float(value), 0.1)
+    except ValueError:
+        return DEFAULT_INTERVAL
+
+
+def row_keys(store):
+    """
+    Hash de 64 bits de cada sorteo.
+
+    Números y estrellas se codifican exactamente como máscara de bits (50 + 12
+    bits) y la fecha se mezcla encima con un producto por una constante impar.
+    """
+    content = store.masks
+    days = store.dates.astype(np.int64).astype(np.uint64)
+    return content ^ (days * _MIX)
+
+
+def load_store(filename):
+    """Carga el histórico de un CSV (opcionalmente comprimido) o de un .npy."""
+    if filename.lower().endswith('.npy'):
+        return DrawStore.load(filename)
+    return DrawStore.from_csv(filename)
+
+
+def reload_store(store, filename):
+    """
+    Actualiza `store` con el contenido actual de `filename`.
+
+    Los sorteos que no estaban se añaden con DrawStore.append si son
+    posteriores a los cargados; si alguno de los cargados cambió o
+    desapareció, o los nuevos son anteriores, se usa el archivo completo.
+    """
+    fresh = load_store(filename)
+    old_keys, new_keys = row_keys(store), row_keys(fresh)
+    added = ~np.isin(new_keys, old_keys)
+    count = int(added.sum())
+
+    kept = len(fresh) - count == len(store) and np.isin(old_keys, new_keys).all()
+    if kept and not count:
+        return Reload(store, 0, False)
+    if kept and (not len(store) or fresh.dates[added].min() >= store.dates[-1]):
+        try:
+            return Reload(store.append(fresh.dates[added], fresh.numbers[added], fresh.stars[added]),
+                          count, False)
+        except ValueError:
+            pass
+    return Reload(fresh, count, True)
+
+
+class FileWatcher:
+    """
+    Detecta cambios en un archivo por sondeo.
+
+    Un cambio de inodo (el archivo se reemplazó), de fecha de modificación o
+    de tamaño solo se notifica cuando la firma se mantiene igual durante
+    `debounce` segundos, así que una escritura larga produce un único aviso.
+    """
+
+    def __init__(self, filename, interval=DEFAULT_INTERVAL, debounce=DEFAULT_DEBOUNCE):
+        self.filename = filename
+        self.interval = interval
+        self.debounce = debounce
+        self._seen = self.signature()
+        self._pending = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def signature(self):
+        try:
+            st = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def poll(self):
+        """True si el archivo cambió y su firma lleva `debounce` segundos estable."""
+        signature = self.signature()
+        now = time.monotonic()
+        if signature is None or signature == self._seen:
+            self._pending = None
+            return False
+        if self._pending is None or self._pending[0] != signature:
+            self._pending = (signature, now)
+            return False
+        if now - self._pending[1] < self.debounce:
+            return False
+        self._seen = signature
+        self._pending = None
+        return True
+
+    def start(self, callback):
+        """Sondea en un hilo en segundo plano y llama a `callback()` en cada cambio."""
+        def loop():
+            while not self._stop.wait(self.interval):
+                if not self.poll():
+                    continue
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"⚠️ Error al recargar {self.filename}: {str(e)}", file=sys.stderr)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name='euromillones-watcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
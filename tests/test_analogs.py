@@ -0,0 +1,58 @@
+"""Perfil de distancias de analogs frente a ventanas normalizadas explícitas."""
+import numpy as np
+import pytest
+
+from modules import analogs
+from modules.synthetic import SyntheticHistory
+
+
+def _normalized(window):
+    flat = (window == window[0]).all(axis=0)
+    std = window.std(axis=0)
+    return (window - window.mean(axis=0)) / np.where(flat, 1, std), flat
+
+
+def _brute_profile(series, query):
+    m = len(query)
+    query, query_flat = _normalized(query)
+    profile = []
+    for start in range(len(series) - m + 1):
+        window, flat = _normalized(series[start:start + m])
+        distance = 0.0
+        for c in range(series.shape[1]):
+            if flat[c] or query_flat[c]:
+                # Correlación 1 si ambas son constantes y 0 si solo lo es una
+                distance += 0.0 if flat[c] and query_flat[c] else 2 * m
+            else:
+                distance += ((window[:, c] - query[:, c]) ** 2).sum()
+        profile.append(distance)
+    return np.array(profile)
+
+
+@pytest.mark.parametrize('window', [2, 5, 12])
+def test_distance_profile_matches_explicit_windows(window):
+    store = SyntheticHistory(seed=4).generate(400)
+    series = analogs.trajectory_features(store)
+    query = series[-window:]
+    np.testing.assert_allclose(analogs.distance_profile(series[:-window], query),
+                               _brute_profile(series[:-window], query), atol=1e-6)
+
+
+def test_distance_profile_with_constant_columns():
+    rng = np.random.default_rng(8)
+    series = rng.normal(100, 20, size=(300, 3))
+    series[50:70, 1] = 7.0      # Tramo constante en una columna
+    series[:, 2] = 3.0          # Columna constante entera
+    query = series[55:63].copy()
+    np.testing.assert_allclose(analogs.distance_profile(series, query),
+                               _brute_profile(series, query), atol=1e-6)
+
+
+def test_trajectory_features():
+    store = SyntheticHistory(seed=4).generate(300)
+    features = analogs.trajectory_features(store)
+    numbers = store.numbers.astype(int)
+    repeated = [0] + [len(set(numbers[i]) & set(numbers[i - 1])) for i in range(1, len(numbers))]
+    np.testing.assert_array_equal(features[:, 0], numbers.sum(axis=1))
+    np.testing.assert_array_equal(features[:, 1], (numbers % 2 == 0).sum(axis=1))
+    np.testing.assert_array_equal(features[:, 3], repeated)
@@ -0,0 +1,110 @@
+"""Informe de data_quality frente a comprobaciones fila a fila de un histórico estropeado."""
+import datetime
+
+import numpy as np
+import pytest
+
+from modules import PACKAGE_CONFIG
+from modules.data_quality import quality_report
+from modules.synthetic import SyntheticHistory
+
+TUESDAYS_SINCE = datetime.date.fromisoformat(PACKAGE_CONFIG['tuesday_draws_since'])
+STAR_ERAS = [(datetime.date.fromisoformat(date), size) for date, size in PACKAGE_CONFIG['star_eras']]
+
+
+def _corrupted(seed):
+    """Histórico sintético con fechas, sorteos y estrellas estropeados al azar."""
+    store = SyntheticHistory(start='2010-06-01', seed=seed).generate(500)
+    rng = np.random.default_rng(seed)
+    dates, numbers, stars = store.dates.copy(), store.numbers.copy(), store.stars.copy()
+    keep = np.ones(len(dates), dtype=bool)
+    keep[rng.choice(len(dates), 15, replace=False)] = False  # sorteos que faltan
+    dates, numbers, stars = dates[keep], numbers[keep], stars[keep]
+
+    def rows(count):
+        return rng.choice(np.arange(1, len(dates)), count, replace=False)
+
+    for row in rows(8):  # filas repetidas, a veces con otra combinación
+        dates[row] = dates[row - 1]
+        if rng.random() < 0.6:
+            numbers[row], stars[row] = numbers[row - 1], stars[row - 1]
+    dates[rows(5)] += np.timedelta64(1, 'D')  # fuera de calendario
+    swapped = rows(4)
+    dates[swapped], dates[swapped - 1] = dates[swapped - 1].copy(), dates[swapped].copy()
+    dates[rows(4)] = np.datetime64('NaT')
+    numbers[rows(4), 0] = 0
+    numbers[rows(4), 4] = 51
+    picked = rows(5)
+    numbers[picked, 1] = numbers[picked, 2]
+    stars[rows(3), 1] = 13
+    picked = rows(5)
+    stars[picked, 0] = stars[picked, 1]
+    stars[rows(6), 1] = 12  # fuera de etapa antes de 2016
+    return dates, numbers, stars
+
+
+def _on_schedule(day):
+    return day.weekday() == 4 or (day.weekday() == 1 and day >= TUESDAYS_SINCE)
+
+
+def _pool(day):
+    return STAR_ERAS[0][1] if day is None else [size for start, size in STAR_ERAS if start <= day][-1]
+
+
+def _brute_report(dates, numbers, stars, newest_first):
+    days = [None if np.isnat(d) else d.astype(datetime.date) for d in dates]
+    valid = [i for i, day in enumerate(days) if day is not None]
+    report = {
+        'registros_totales': len(days),
+        'fechas_invalidas': [i for i, day in enumerate(days) if day is None],
+        'fechas_desordenadas': [i for i in range(1, len(days)) if None not in (days[i], days[i - 1]) and
+                                (days[i] > days[i - 1] if newest_first else days[i] < days[i - 1])],
+        'fuera_de_calendario': [i for i in valid if not _on_schedule(days[i])],
+        'fechas_duplicadas': [i for i in valid if sum(days[j] == days[i] for j in valid) > 1]
+    }
+    present = {days[i] for i in valid}
+    first, last = min(present), max(present)
+    report['sorteos_faltantes'] = [first + datetime.timedelta(k) for k in range((last - first).days + 1)
+                                   if _on_schedule(first + datetime.timedelta(k)) and
+                                   first + datetime.timedelta(k) not in present]
+    seen, report['sorteos_duplicados'] = set(), []
+    for i in valid:
+        key = (days[i], tuple(numbers[i].tolist()), tuple(stars[i].tolist()))
+        if key in seen:
+            report['sorteos_duplicados'].append(i)
+        seen.add(key)
+
+    for values, size, out_of_range, repeated in ((numbers, 50, 'numeros_fuera_de_rango', 'numeros_repetidos'),
+                                                 (stars, 12, 'estrellas_fuera_de_rango', 'estrellas_repetidas')):
+        report[out_of_range] = [i for i, row in enumerate(values.tolist()) if min(row) < 1 or max(row) > size]
+        report[repeated] = [i for i, row in enumerate(values.tolist()) if len(set(row)) < len(row)]
+    # La estrella mayor decide; NaT cuenta con el bombo mayor
+    report['estrellas_fuera_de_etapa'] = [
+        i for i, row in enumerate(stars.tolist())
+        if max(row) <= 12 and max(row) > (12 if days[i] is None else _pool(days[i]))]
+    return report
+
+
+@pytest.mark.parametrize('seed', range(4))
+@pytest.mark.parametrize('newest_first', [False, True])
+def test_quality_report_matches_row_checks(seed, newest_first):
+    dates, numbers, stars = _corrupted(seed)
+    if newest_first:
+        dates, numbers, stars = dates[::-1], numbers[::-1], stars[::-1]
+    report = quality_report(dates, numbers, stars, newest_first=newest_first)
+    expected = _brute_report(dates, numbers, stars, newest_first)
+    assert report.keys() == expected.keys()
+    assert report['registros_totales'] == expected['registros_totales']
+    for key in expected:
+        if key != 'registros_totales':
+            assert list(report[key]) == [np.datetime64(v) if key == 'sorteos_faltantes' else v
+                                         for v in expected[key]], key
+            # Cada comprobación tiene algo que encontrar
+            assert expected[key], key
+
+
+def test_clean_history_has_no_findings():
+    store = SyntheticHistory(seed=1).generate(800)
+    report = quality_report(store.dates, store.numbers, store.stars)
+    assert report['registros_totales'] == 800
+    assert all(len(value) == 0 for key, value in report.items() if key != 'registros_totales')
@@ -0,0 +1,73 @@
+"""Lector de formato fijo frente a pandas.read_csv."""
+import gzip
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from modules.draw_parser import read_draws
+
+HEADER = 'FECHA,COMB. GANADORA,,,,,,ESTRELLAS,'
+# Columnas del CSV con los números y las estrellas (la 6 es la columna vacía)
+POSITIONS = [1, 2, 3, 4, 5, 7, 8]
+
+
+def _rows(count, seed=5):
+    """Filas aleatorias: fechas con y sin ceros iniciales y, algunas, números sin ellos."""
+    rng = np.random.default_rng(seed)
+    dates = np.datetime64('2004-02-13') + np.sort(rng.choice(7000, count, replace=False))
+    lines, irregular = [], []
+    for i, date in enumerate(dates.astype(object)):
+        numbers = rng.choice(50, 5, replace=False) + 1
+        stars = rng.choice(12, 2, replace=False) + 1
+        day, month = (f"{date.day:02d}", f"{date.month:02d}") if i % 3 else (str(date.day), str(date.month))
+        if i % 7 == 3:
+            values = [str(v) for v in (*numbers, '', *stars)]
+            # Sin ceros iniciales solo cambia la fila si algún valor es menor que 10
+            if min(*numbers, *stars) < 10:
+                irregular.append(i)
+        else:
+            values = [f"{v:02d}" for v in numbers] + [''] + [f"{v:02d}" for v in stars]
+        lines.append(f"{day}/{month}/{date.year}," + ','.join(values))
+    return lines, irregular
+
+
+@pytest.mark.parametrize('newline', ['\n', '\r\n'])
+@pytest.mark.parametrize('compressed', [False, True])
+@pytest.mark.parametrize('chunk_size', [64, 1 << 20])
+def test_read_draws_matches_pandas(tmp_path, newline, compressed, chunk_size):
+    lines, irregular = _rows(300)
+    text = newline.join([HEADER] + lines) + newline
+    path = tmp_path / ('draws.csv.gz' if compressed else 'draws.csv')
+    if compressed:
+        with gzip.open(path, 'wb') as f:
+            f.write(text.encode('utf-8'))
+    else:
+        path.write_bytes(text.encode('utf-8'))
+
+    parsed = read_draws(str(path), chunk_size=chunk_size)
+    expected = pd.read_csv(path, header=0, dtype=str, keep_default_na=False)
+
+    assert parsed.header == HEADER.split(',')
+    assert parsed.rows == len(expected)
+    assert [row for row, _ in parsed.irregular] == irregular
+    assert [line for _, line in parsed.irregular] == [lines[i] for i in irregular]
+
+    regular = expected.drop(index=irregular)
+    dates = pd.to_datetime(regular.iloc[:, 0], format='%d/%m/%Y').to_numpy().astype('datetime64[D]')
+    values = regular.iloc[:, POSITIONS].astype(int).to_numpy()
+    np.testing.assert_array_equal(parsed.dates, dates)
+    np.testing.assert_array_equal(parsed.values, values)
+    assert parsed.values.dtype == np.uint8
+
+
+def test_read_draws_bundled_history():
+    from modules import get_data_file
+    parsed = read_draws(get_data_file())
+    expected = pd.read_csv(get_data_file(), header=0, dtype=str, keep_default_na=False)
+    assert parsed.rows == len(expected)
+    regular = expected.drop(index=[row for row, _ in parsed.irregular])
+    np.testing.assert_array_equal(parsed.values, regular.iloc[:, POSITIONS].astype(int).to_numpy())
+    np.testing.assert_array_equal(
+        parsed.dates,
+        pd.to_datetime(regular.iloc[:, 0], format='%d/%m/%Y').to_numpy().astype('datetime64[D]'))
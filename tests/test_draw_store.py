@@ -0,0 +1,132 @@
+"""Índices de DrawStore prolongados con append frente a reconstruirlos desde cero."""
+import numpy as np
+import pytest
+
+from modules.draw_store import MAX_AGE, ROW_INDEXES, DrawStore
+from modules.synthetic import SyntheticHistory
+
+INDEXES = ROW_INDEXES + ['number_streaks', 'star_streaks', 'number_pairs']
+POSITION_FIELDS = ['indptr', 'keys', 'positions', 'run', 'run_max', 'gap_max']
+
+
+@pytest.fixture(scope='module')
+def history():
+    return SyntheticHistory(seed=21).generate(900)
+
+
+def _rows(store, start, stop):
+    return store.dates[start:stop], store.numbers[start:stop], store.stars[start:stop]
+
+
+def _built(store):
+    """Construye todos los índices derivados del almacén."""
+    for field in INDEXES + ['number_positions', 'star_positions', 'version']:
+        getattr(store, field)
+    return store
+
+
+def _assert_same(store, expected):
+    np.testing.assert_array_equal(store.dates, expected.dates)
+    np.testing.assert_array_equal(store.numbers, expected.numbers)
+    np.testing.assert_array_equal(store.stars, expected.stars)
+    for field in INDEXES:
+        # Prolongados por append, no reconstruidos
+        assert field in store.__dict__, field
+        np.testing.assert_array_equal(store.__dict__[field], getattr(expected, field), err_msg=field)
+    for pool in ('number', 'star'):
+        index, reference = store.__dict__[f'{pool}_positions'], getattr(expected, f'{pool}_positions')
+        assert index.rows == reference.rows
+        for field in POSITION_FIELDS:
+            np.testing.assert_array_equal(getattr(index, field), getattr(reference, field),
+                                          err_msg=f'{pool}_positions.{field}')
+    assert store.version == expected.version
+
+
+def test_append_matches_full_rebuild(history):
+    store = _built(DrawStore(*_rows(history, 0, 500)))
+    for start, stop in ((500, 501), (501, 700), (700, 900)):
+        store = store.append(*_rows(history, start, stop))
+        _assert_same(store, DrawStore(*_rows(history, 0, stop)))
+
+
+def test_append_to_older_snapshot_branches(history):
+    base = _built(DrawStore(*_rows(history, 0, 600)))
+    first = base.append(*_rows(history, 600, 750))
+    # Otra rama desde el mismo estado: mismas fechas, otras combinaciones
+    other = SyntheticHistory(seed=22).generate(900)
+    second = base.append(history.dates[600:700], other.numbers[600:700], other.stars[600:700])
+
+    _assert_same(first, DrawStore(*_rows(history, 0, 750)))
+    expected = DrawStore(np.concatenate([history.dates[:600], history.dates[600:700]]),
+                         np.concatenate([history.numbers[:600], other.numbers[600:700]]),
+                         np.concatenate([history.stars[:600], other.stars[600:700]]))
+    _assert_same(second, expected)
+    # Ni la base ni la primera rama cambian al crear la segunda
+    _assert_same(base, DrawStore(*_rows(history, 0, 600)))
+    _assert_same(first.append(*_rows(history, 750, 800)), DrawStore(*_rows(history, 0, 800)))
+    assert len({base.version, first.version, second.version}) == 3
+
+
+def test_append_rejects_earlier_dates(history):
+    store = DrawStore(*_rows(history, 0, 500))
+    with pytest.raises(ValueError):
+        store.append(*_rows(history, 100, 101))
+
+
+def _as_of_cases(history):
+    """Fechas antes del primer sorteo, en sorteos, entre sorteos y en el último."""
+    dates = history.dates
+    return [dates[0] - np.timedelta64(1, 'D'), dates[0], dates[1], dates[57] + np.timedelta64(1, 'D'),
+            dates[400], dates[-2], dates[-1], dates[-1] + np.timedelta64(30, 'D')]
+
+
+@pytest.mark.parametrize('case', range(8))
+def test_as_of_matches_truncated_store(history, case):
+    date = _as_of_cases(history)[case]
+    count = int((history.dates <= date).sum())
+    # Índices del almacén completo ya construidos: la vista los corta
+    store = _built(DrawStore(*_rows(history, 0, len(history))))
+    view, expected = store.as_of(date), DrawStore(*_rows(history, 0, count))
+
+    assert len(view) == count
+    for field in ('dates', 'numbers', 'stars') + tuple(INDEXES):
+        np.testing.assert_array_equal(getattr(view, field), getattr(expected, field), err_msg=field)
+    for pool in ('numbers', 'stars'):
+        for last in (None, 1, 10, 500):
+            np.testing.assert_array_equal(view.frequencies(pool, last), expected.frequencies(pool, last))
+    assert view.version == expected.version
+    if count > 5:
+        # Una vista de una vista corta el mismo almacén completo
+        nested = view.as_of(history.dates[count - 5])
+        np.testing.assert_array_equal(nested.number_streaks, DrawStore(*_rows(history, 0, count - 4)).number_streaks)
+
+
+def _brute_ages(draws, size):
+    last, ages = {}, []
+    for row, draw in enumerate(draws.tolist()):
+        for value in draw:
+            last[value] = row
+        ages.append([row - last[v] if v in last else row + 1 for v in range(1, size + 1)])
+    return np.array(ages)
+
+
+@pytest.mark.parametrize('pool', ['numbers', 'stars'])
+def test_ages_match_direct_count(history, pool):
+    store = DrawStore(*_rows(history, 0, 700))
+    draws, size = store.pool(pool)
+    expected = _brute_ages(draws, size)
+    assert store.ages(pool).dtype == np.uint16
+    np.testing.assert_array_equal(store.ages(pool), expected)
+    # Bloques que no dividen el histórico y prolongación desde la fila anterior
+    occurrence = store.occurrence(pool)
+    np.testing.assert_array_equal(DrawStore._ages(occurrence, chunk_size=37), expected)
+    np.testing.assert_array_equal(DrawStore._ages(occurrence[300:], previous=expected[299]), expected[300:])
+
+
+def test_ages_saturate():
+    occurrence = np.zeros((MAX_AGE + 10, 2), dtype=bool)
+    occurrence[5, 1] = True
+    ages = DrawStore._ages(occurrence, chunk_size=1 << 12)
+    expected = np.minimum(np.arange(1, len(occurrence) + 1), MAX_AGE)
+    np.testing.assert_array_equal(ages[:, 0], expected)
+    assert ages[5, 1] == 0 and ages[-1, 1] == MAX_AGE and ages[5 + MAX_AGE - 1, 1] == MAX_AGE - 1
@@ -0,0 +1,22 @@
+"""Reproducibilidad de CombinationGenerator con random.seed()."""
+import contextlib
+import io
+import random
+
+from modules.generator import CombinationGenerator
+from modules.synthetic import SyntheticHistory
+
+
+def _balanced(generator, seed):
+    random.seed(seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generator.generate_balanced(5)
+
+
+def test_balanced_follows_random_seed():
+    generator = CombinationGenerator(SyntheticHistory(seed=1).generate(100).to_dataframe())
+    first = _balanced(generator, 1)
+    assert _balanced(generator, 1) == first
+    assert _balanced(generator, 2) != first
+    for combinacion in first:
+        assert len(set(combinacion['numeros'])) == 5
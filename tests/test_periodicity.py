@@ -0,0 +1,78 @@
+"""Detección de periodicidades: una columna periódica plantada y el ajuste de Benjamini-Hochberg."""
+import numpy as np
+import pytest
+
+from modules import periodicity
+from modules.draw_store import DrawStore, sort_draws
+from modules.synthetic import SyntheticHistory
+
+PLANTED, PERIOD = 7, 10
+# Con 62 series, el p-valor mínimo 1 / (réplicas + 1) debe quedar bajo ALPHA tras el ajuste
+PERMUTATIONS = 1500
+
+
+def _planted(history):
+    """El número PLANTED sale exactamente en los sorteos múltiplos de PERIOD."""
+    numbers = history.numbers.copy()
+    for row, draw in enumerate(numbers):
+        if row % PERIOD == 0 and PLANTED not in draw:
+            draw[0] = PLANTED
+        elif row % PERIOD and PLANTED in draw:
+            draw[draw == PLANTED] = next(n for n in range(1, 51) if n != PLANTED and n not in draw)
+    stars = history.stars.copy()
+    sort_draws(numbers, stars)
+    return DrawStore(history.dates, numbers, stars)
+
+
+@pytest.fixture(scope='module')
+def history():
+    return SyntheticHistory(seed=9).generate(400)
+
+
+def _row(tables, number):
+    return next(r for r in tables['numbers'] if r['numero'] == number)
+
+
+def test_planted_period_is_detected(history):
+    store = _planted(history)
+    tables = periodicity.scan(store, permutations=PERMUTATIONS, seed=1, workers=1)
+    row = _row(tables, PLANTED)
+    assert tables['numbers'][0] is row
+    assert row['periodo'] == pytest.approx(PERIOD)
+    assert row['significativo']
+    # Autocorrelación sesgada: la covarianza del retardo se divide entre todos los sorteos
+    assert row['autocorrelacion'] == pytest.approx((len(store) - PERIOD) / len(store), abs=1e-4)
+
+
+def test_shuffled_period_is_not_detected(history):
+    store = _planted(history)
+    order = np.random.default_rng(2).permutation(len(store))
+    shuffled = DrawStore(store.dates, store.numbers[order], store.stars[order])
+    tables = periodicity.scan(shuffled, permutations=PERMUTATIONS, seed=1, workers=1)
+    assert not _row(tables, PLANTED)['significativo']
+
+
+def _brute_adjusted(p_values):
+    m = len(p_values)
+    ranks = np.empty(m, dtype=np.int64)
+    ranks[np.argsort(p_values, kind='stable')] = np.arange(1, m + 1)
+    return np.array([min(1, min(p_values[j] * m / ranks[j] for j in range(m) if ranks[j] >= ranks[i]))
+                     for i in range(m)])
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_adjusted_matches_benjamini_hochberg(seed):
+    rng = np.random.default_rng(seed)
+    p_values = rng.uniform(size=62) ** 3
+    # Empates y p-valores de 1, como los de las series constantes
+    p_values[:5] = p_values[5]
+    p_values[-3:] = 1
+    np.testing.assert_allclose(periodicity._adjusted(p_values), _brute_adjusted(p_values))
+
+
+def test_scan_does_not_depend_on_workers(history):
+    store = _planted(history)
+    # Réplicas que no llenan el último bloque
+    permutations = 2 * periodicity.PERMUTATION_CHUNK + 30
+    serial = periodicity.scan(store, permutations=permutations, seed=4, workers=1)
+    assert periodicity.scan(store, permutations=permutations, seed=4, workers=3) == serial
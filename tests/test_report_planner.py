@@ -0,0 +1,48 @@
+"""Secciones en serie de ReportPlanner."""
+import threading
+
+import pytest
+
+from modules.report_planner import ReportPlanner
+from modules.synthetic import SyntheticHistory
+
+
+@pytest.fixture(scope='module')
+def df():
+    return SyntheticHistory(seed=3).generate(200).to_dataframe()
+
+
+def test_serial_sections_run_alone_in_the_calling_thread(df):
+    events = []
+
+    def parallel(frecuencia_numeros):
+        events.append(('parallel', threading.current_thread()))
+        return int(frecuencia_numeros.sum())
+
+    def serial(frecuencia_numeros):
+        events.append(('serial', threading.current_thread()))
+        return int(frecuencia_numeros.sum())
+
+    planner = ReportPlanner(df, max_workers=4)
+    planner.add_section('serie', serial, requires=['frecuencia_numeros'], serial=True)
+    for index in range(4):
+        planner.add_section(f'paralela_{index}', parallel, requires=['frecuencia_numeros'])
+    results = planner.run()
+
+    assert set(results.values()) == {5 * len(df)}
+    assert [kind for kind, _ in events] == ['parallel'] * 4 + ['serial']
+    assert events[-1][1] is threading.current_thread()
+    assert 'serie' in planner.timings
+
+
+def test_serial_section_errors(df):
+    def failing():
+        raise RuntimeError('fallo')
+
+    planner = ReportPlanner(df, intermediates={'roto': (failing, ())})
+    planner.add_section('dependiente', lambda roto: roto, requires=['roto'], serial=True)
+    planner.add_section('falla', failing, serial=True)
+    planner.add_section('bien', lambda: 1, serial=True)
+    assert planner.run() == {'dependiente': None, 'falla': None, 'bien': 1}
+    assert planner.errors['dependiente'] == 'Dependencia fallida: roto'
+    assert planner.errors['falla'] == 'fallo'
@@ -0,0 +1,36 @@
+"""Servidor HTTP a través de un socket real, con pool de hilos y de procesos."""
+import asyncio
+import json
+
+import pytest
+
+from modules.server import AnalysisServer
+
+
+async def _get(port, path):
+    """Petición con Connection: close leída hasta EOF, como nc o un cliente HTTP/1.0."""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n".encode())
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), timeout=60)
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_connection_close_reaches_eof(executor):
+    async def scenario():
+        server = AnalysisServer(port=0, workers=2, executor=executor)
+        await server.start()
+        try:
+            for _ in range(2):
+                status, body = await _get(server.port, '/summary')
+                assert status == 200
+                assert body['total_sorteos'] > 0
+            status, _ = await _get(server.port, '/desconocido')
+            assert status == 404
+        finally:
+            await server.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,79 @@
+"""Búsquedas de similarity frente a una comparación directa de todos los sorteos."""
+import functools
+
+import numpy as np
+import pytest
+
+from modules import similarity
+from modules.synthetic import SyntheticHistory
+
+BLOCK_SIZES = [1 << 22, 5000, 300]
+MAX_PAIRS = 60
+
+
+@functools.lru_cache(maxsize=None)
+def _history():
+    return SyntheticHistory(seed=11).generate(500)
+
+
+@pytest.fixture(scope='module')
+def store():
+    return _history()
+
+
+def _score(table, a_numbers, a_stars, b_numbers, b_stars):
+    hits = len(set(a_numbers) & set(b_numbers)), len(set(a_stars) & set(b_stars))
+    return table[hits]
+
+
+def _brute_nearest(store, numbers, stars, k, table):
+    scores = [_score(table, numbers, stars, store.numbers[i].tolist(), store.stars[i].tolist())
+              for i in range(len(store))]
+    # De más a menos parecido; a igual puntuación, el más reciente primero
+    order = sorted(range(len(store)), key=lambda i: (scores[i], i), reverse=True)[:k]
+    return np.array(order), np.array([scores[i] for i in order])
+
+
+@functools.lru_cache(maxsize=None)
+def _brute_pairs(metric):
+    store, table = _history(), similarity.score_table(metric, 0.5)
+    pairs = []
+    for i in range(len(store)):
+        for j in range(i):
+            score = _score(table, store.numbers[i].tolist(), store.stars[i].tolist(),
+                           store.numbers[j].tolist(), store.stars[j].tolist())
+            pairs.append((score, i, j))
+    pairs.sort(reverse=True)
+    return pairs[:MAX_PAIRS]
+
+
+@pytest.mark.parametrize('block', BLOCK_SIZES)
+@pytest.mark.parametrize('metric', similarity.METRICS)
+def test_nearest_matches_brute_force(store, monkeypatch, block, metric):
+    monkeypatch.setattr(similarity, 'BLOCK_CELLS', block)
+    table = similarity.score_table(metric, 0.5)
+    rng = np.random.default_rng(3)
+    numbers = np.array([rng.choice(50, 5, replace=False) + 1 for _ in range(8)])
+    stars = np.array([rng.choice(12, 2, replace=False) + 1 for _ in range(8)])
+    # Una consulta que es exactamente un sorteo del histórico
+    numbers[0], stars[0] = store.numbers[123], store.stars[123]
+
+    index, scores = similarity.nearest(store, numbers, stars, k=15, metric=metric)
+    for q in range(len(numbers)):
+        expected_index, expected_scores = _brute_nearest(store, numbers[q].tolist(), stars[q].tolist(),
+                                                         15, table)
+        np.testing.assert_array_equal(index[q], expected_index)
+        np.testing.assert_allclose(scores[q], expected_scores)
+
+
+@pytest.mark.parametrize('block', BLOCK_SIZES)
+@pytest.mark.parametrize('workers', [1, 3])
+@pytest.mark.parametrize('metric', similarity.METRICS)
+@pytest.mark.parametrize('k', [1, 10, MAX_PAIRS])
+def test_similar_pairs_matches_brute_force(store, monkeypatch, block, workers, metric, k):
+    monkeypatch.setattr(similarity, 'BLOCK_CELLS', block)
+    first, second, scores = similarity.similar_pairs(store, k=k, metric=metric, workers=workers)
+    expected = _brute_pairs(metric)[:k]
+    np.testing.assert_array_equal(first, [i for _, i, _ in expected])
+    np.testing.assert_array_equal(second, [j for _, _, j in expected])
+    np.testing.assert_allclose(scores, [score for score, _, _ in expected])
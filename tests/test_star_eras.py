@@ -0,0 +1,105 @@
+"""Etapas del bombo de estrellas frente a un recorrido directo del histórico."""
+import numpy as np
+import pytest
+
+from modules import PACKAGE_CONFIG, star_eras
+from modules.draw_store import DrawStore
+from modules.synthetic import SyntheticHistory, star_pool_sizes
+
+SIZE = PACKAGE_CONFIG['max_stars']
+
+
+@pytest.fixture(scope='module')
+def store():
+    # Cruza los cambios de bombo de 2011 y 2016
+    return SyntheticHistory(start='2010-01-01', seed=13).generate(900)
+
+
+def _redated(store, years=20):
+    """El mismo histórico con fechas anteriores a todas las etapas configuradas."""
+    return DrawStore(store.dates - np.timedelta64(365 * years, 'D'), store.numbers, store.stars)
+
+
+def _sizes(eras, draws):
+    """Tamaño del bombo de cada fila según las etapas, comprobando que cubren el histórico."""
+    sizes = np.zeros(draws, dtype=np.int64)
+    position = 0
+    for era in eras:
+        assert era.start == position and era.end > era.start
+        sizes[era.start:era.end] = era.size
+        position = era.end
+    assert position == draws
+    return sizes
+
+
+def _brute_detect(store):
+    eras, largest = [], 0
+    for date, stars in zip(store.dates, store.stars.tolist()):
+        if max(stars) > largest:
+            largest = max(stars)
+            eras.append((date, largest))
+    return eras
+
+
+def _brute_expected(sizes, start, end):
+    expected, variance, available = np.zeros(SIZE), np.zeros(SIZE), np.zeros(SIZE)
+    for size in sizes[start:end]:
+        p = star_eras.STARS_PER_DRAW / size
+        expected[:size] += p
+        variance[:size] += p * (1 - p)
+        available[:size] += 1
+    return expected, variance, available
+
+
+def test_detect_eras(store):
+    for candidate in (store, _redated(store), DrawStore(store.dates[:0], store.numbers[:0], store.stars[:0])):
+        assert star_eras.detect_eras(candidate) == _brute_detect(candidate)
+
+
+def test_resolve_eras_uses_configured_eras(store):
+    sizes = _sizes(star_eras.resolve_eras(store), len(store))
+    np.testing.assert_array_equal(sizes, star_pool_sizes(store.dates))
+    assert set(sizes) == {9, 11, 12}
+
+
+def test_resolve_eras_falls_back_to_detected(store):
+    redated = _redated(store)
+    resolved = star_eras.resolve_eras(redated)
+    assert [(era.date, era.size) for era in resolved] == _brute_detect(redated)
+    largest = np.maximum.accumulate(redated.stars.max(axis=1))
+    np.testing.assert_array_equal(_sizes(resolved, len(redated)), largest)
+
+
+def test_resolve_eras_explicit(store):
+    eras = [(str(date), size) for date, size in _brute_detect(store)]
+    resolved = star_eras.resolve_eras(store, eras[::-1])
+    assert [(str(era.date), era.size) for era in resolved] == eras
+    with pytest.raises(ValueError):
+        star_eras.resolve_eras(store, [(str(store.dates[0]), 9)])
+
+
+@pytest.mark.parametrize('redate', [False, True])
+def test_expected_and_counts(store, redate):
+    store = _redated(store) if redate else store
+    resolved = star_eras.resolve_eras(store)
+    sizes = _sizes(resolved, len(store))
+    n = len(store)
+    for start, end in [(0, n), (0, 1), (10, 400), (n - 20, n), (300, 300), resolved[-1][:2]]:
+        for value, expected in zip(star_eras._expected(resolved, start, end, SIZE),
+                                   _brute_expected(sizes, start, end)):
+            np.testing.assert_allclose(value, expected)
+    for last in (None, 1, 20, 10 * n):
+        start = 0 if last is None else max(n - last, 0)
+        np.testing.assert_allclose(star_eras.expected_counts(store, last), _brute_expected(sizes, start, n)[0])
+
+    by_era, total = star_eras.era_counts(store)
+    counts = np.zeros((n, SIZE), dtype=np.int64)
+    for row, stars in enumerate(store.stars.tolist()):
+        counts[row, np.array(stars) - 1] = 1
+    for era, row in zip(resolved, by_era):
+        assert row['era'] == era
+        np.testing.assert_array_equal(row['apariciones'], counts[era.start:era.end].sum(axis=0))
+        np.testing.assert_allclose(row['esperadas'], _brute_expected(sizes, era.start, era.end)[0])
+    np.testing.assert_array_equal(total['apariciones'], counts.sum(axis=0))
+    for key, expected in zip(['esperadas', 'varianza', 'disponibles'], _brute_expected(sizes, 0, n)):
+        np.testing.assert_allclose(total[key], expected)
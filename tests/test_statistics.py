@@ -0,0 +1,30 @@
+"""Tablas de Statistics frente a un recorrido directo del DataFrame."""
+import pytest
+
+from modules.statistics import Statistics
+from modules.synthetic import SyntheticHistory
+
+
+@pytest.fixture(scope='module')
+def statistics():
+    return Statistics(SyntheticHistory(seed=17).generate(400).to_dataframe())
+
+
+def _brute_maxima(df, number):
+    streak = absence = longest_streak = longest_absence = 0
+    for row in df[['n1', 'n2', 'n3', 'n4', 'n5']].itertuples(index=False):
+        if number in row:
+            streak, absence = streak + 1, 0
+        else:
+            streak, absence = 0, absence + 1
+        longest_streak, longest_absence = max(longest_streak, streak), max(longest_absence, absence)
+    return longest_streak, longest_absence
+
+
+def test_streak_tables(statistics):
+    maxima = {number: _brute_maxima(statistics.df, number) for number in range(1, 51)}
+    tables = statistics._streak_tables()
+    assert tables['rachas'] == [{'numero': n, 'racha': maxima[n][0]}
+                                for n in sorted(maxima, key=lambda n: -maxima[n][0])]
+    assert tables['ausencias'] == [{'numero': n, 'ausencia': maxima[n][1]}
+                                   for n in sorted(maxima, key=lambda n: -maxima[n][1])]
@@ -0,0 +1,67 @@
+"""Huecos, supervivencia y riesgo de survival frente a un recorrido directo del histórico."""
+import numpy as np
+import pytest
+
+from modules import survival
+from modules.synthetic import SyntheticHistory
+
+
+@pytest.fixture(scope='module')
+def store():
+    return SyntheticHistory(seed=5).generate(600)
+
+
+def _brute_gaps(store, pool):
+    draws = store.numbers if pool == 'numbers' else store.stars
+    last, values, lengths = {}, [], []
+    for row, draw in enumerate(draws.tolist()):
+        for value in sorted(draw):
+            if value in last:
+                values.append(value - 1)
+                lengths.append(row - last[value])
+            last[value] = row
+    return np.array(values), np.array(lengths)
+
+
+@pytest.mark.parametrize('pool', ['numbers', 'stars'])
+def test_gap_lengths(store, pool):
+    values, lengths = survival.gap_lengths(store, pool)
+    expected_values, expected_lengths = _brute_gaps(store, pool)
+    np.testing.assert_array_equal(values, expected_values)
+    np.testing.assert_array_equal(lengths, expected_lengths)
+
+
+@pytest.mark.parametrize('pool', ['numbers', 'stars'])
+def test_survival_and_hazard(store, pool):
+    model = survival.fit(store, pool)
+    values, lengths = _brute_gaps(store, pool)
+    for v in range(model.counts.shape[0]):
+        gaps = lengths[values == v]
+        assert model.totals[v] == len(gaps)
+        for d in range(model.counts.shape[1]):
+            assert model.counts[v, d] == (gaps == d).sum()
+            if len(gaps):
+                assert model.survival[v, d] == pytest.approx((gaps > d).mean())
+            else:
+                assert np.isnan(model.survival[v, d])
+            reaching = (gaps >= d).sum()
+            if reaching:
+                assert model.hazard[v, d] == pytest.approx((gaps == d).sum() / reaching)
+            else:
+                assert np.isnan(model.hazard[v, d])
+    assert model.p == pytest.approx(1 / lengths.mean())
+    np.testing.assert_array_equal(model.ages, store.ages(pool)[-1])
+
+
+@pytest.mark.parametrize('pool', ['numbers', 'stars'])
+def test_bootstrap_bands_do_not_depend_on_workers(store, pool):
+    model = survival.fit(store, pool)
+    # Réplicas que no llenan el último bloque
+    replicas = 3 * survival.BOOTSTRAP_CHUNK + 17
+    serial = survival.bootstrap_bands(model, replicas, seed=3, workers=1)
+    for workers in (2, 4):
+        parallel = survival.bootstrap_bands(model, replicas, seed=3, workers=workers)
+        for expected, band in zip(serial, parallel):
+            np.testing.assert_array_equal(band, expected)
+    other = survival.bootstrap_bands(model, replicas, seed=4, workers=1)
+    assert not np.array_equal(other[0], serial[0], equal_nan=True)